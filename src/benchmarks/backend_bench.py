@@ -0,0 +1,150 @@
+"""
+
+Silver / gold backend benchmark : MySQL against the embedded DuckDB file
+
+    python -m src.benchmarks.backend_bench --repeat 20
+
+Reads the bronze tables already in MySQL (run the historical pipeline or
+stage_bench first). For every backend a copy of the bulk config with analytics_backend set
+is written under --work-dir and a fresh worker process runs silver_ddl -> silver_load ->
+gold views, then materializes stock_facts once and times a few analytical queries against
+the view. Build times and median / p95 query latency go to --out.
+
+The mysql run rebuilds the silver and gold schemas of the configured server, the duckdb run
+writes to a file under --work-dir.
+
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from ..utils import load_yml, make_dir, ANALYTICS_BACKENDS
+
+QUERIES = {
+    # whole history scan, every window in the view is evaluated
+    "volatility_by_ticker": """
+        SELECT ticker, AVG(volatility_days_30), MAX(stock_90_day_average)
+        FROM {gold}.stock_facts GROUP BY ticker
+    """,
+    "latest_day": """
+        SELECT ticker, close_price, daily_return, volatility_days_30
+        FROM {gold}.stock_facts
+        WHERE trade_date = (SELECT MAX(date) FROM {silver}.ohclv_silver)
+    """,
+    "single_ticker_history": """
+        SELECT trade_date, close_price, daily_return, stock_90_day_average
+        FROM {gold}.stock_facts WHERE ticker = '{ticker}' ORDER BY trade_date
+    """,
+}
+
+
+def backend_config(bulk_config: dict, work_dir: Path, backend: str, duckdb_path: str | None) -> Path:
+    config = dict(bulk_config)
+    config["analytics_backend"] = backend
+    if duckdb_path:
+        config["duckdb_path"] = duckdb_path
+
+    config_path = work_dir / f"bulk_{backend}.yaml"
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return config_path
+
+
+def run_worker(config_path: str, repeat: int) -> list:
+    """Runs inside the worker process, one result dict per measurement"""
+
+    # the silver / gold modules parse --bulk at import time
+    sys.argv = [sys.argv[0], "--bulk", config_path]
+
+    from sqlalchemy import text
+    from ..utils import get_analytics_engine
+    from ..historical.transform import silver_master, silver_load
+    from ..transform_gold import gold_core
+
+    bulk_config = load_yml(config_path)
+    silver, gold = bulk_config["dbname"][1], bulk_config["dbname"][2]
+    results = []
+
+    start = time.perf_counter()
+    silver_master.silver_ddl()
+    silver_load.silver_load()
+    gold_core.gold_exec()
+    results.append({"measure": "silver_and_gold_build", "seconds": round(time.perf_counter() - start, 4)})
+
+    engine = get_analytics_engine(bulk_config, gold, gold_core.db_pass)
+    with engine.begin() as conn:
+        rows = conn.execute(text(f"SELECT COUNT(*) FROM {silver}.ohclv_silver")).scalar()
+
+        # stock_facts build : the view fully evaluated and written out once
+        conn.execute(text(f"DROP TABLE IF EXISTS {gold}.stock_facts_bench"))
+        start = time.perf_counter()
+        conn.execute(text(f"CREATE TABLE {gold}.stock_facts_bench AS SELECT * FROM {gold}.stock_facts"))
+        results.append({"measure": "stock_facts_build", "rows": rows, "seconds": round(time.perf_counter() - start, 4)})
+        conn.execute(text(f"DROP TABLE {gold}.stock_facts_bench"))
+
+        ticker = conn.execute(text(f"SELECT MIN(ticker) FROM {silver}.ohclv_silver")).scalar()
+
+    with engine.connect() as conn:
+        for name, query in QUERIES.items():
+            sql = text(query.format(gold=gold, silver=silver, ticker=ticker))
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(sql).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results.append({
+                "measure": f"query_{name}",
+                "rows": rows,
+                "median_ms": round(statistics.median(timings), 2),
+                "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", default="config/bulk.yaml")
+    parser.add_argument("--backends", default=",".join(ANALYTICS_BACKENDS))
+    parser.add_argument("--work-dir", default="data/benchmark/backends")
+    parser.add_argument("--duckdb-path", default=None, help="default is the work dir, never the configured warehouse")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", default="reports/benchmarks/backend_benchmark.csv")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.repeat)))
+        return
+
+    bulk_config = load_yml(args.bulk)
+    work_dir = Path(args.work_dir)
+    make_dir(work_dir)
+    duckdb_path = args.duckdb_path or str(work_dir / "analytics_bench.duckdb")
+
+    rows = []
+    for backend in args.backends.split(","):
+        config_path = backend_config(bulk_config, work_dir, backend, duckdb_path)
+        worker = subprocess.run(
+            [sys.executable, "-m", "src.benchmarks.backend_bench", "--worker", str(config_path), "--repeat", str(args.repeat)],
+            capture_output=True, text=True, check=True,
+        )
+        for result in json.loads(worker.stdout.strip().splitlines()[-1]):
+            rows.append({"backend": backend, **result})
+
+    report = pd.DataFrame(rows)
+    make_dir(Path(args.out).parent)
+    report.to_csv(args.out, index=False)
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
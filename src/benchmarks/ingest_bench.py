@@ -0,0 +1,125 @@
+"""
+
+Landing file parse benchmark : default pandas inference against the typed pyarrow reader
+
+    python -m src.benchmarks.ingest_bench --tickers 500 --years 10
+
+Writes one synthetic OHCLV history of tickers x years into a single CSV under --work-dir
+and parses it with each method in a fresh worker process, so the peak RSS of one method
+does not hide the next:
+
+    pandas        pd.read_csv with default inference
+    pandas_dates  the same plus pd.to_datetime(...).dt.date, what daily_load used to do
+    pyarrow       src.ingest.read_landing with the ohclv schema
+
+Parse time (best of --repeat), frame memory and peak RSS growth are printed and written to --out.
+
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..utils import make_dir
+from .synthetic import ohclv_frame, synthetic_tickers
+
+METHODS = ["pandas", "pandas_dates", "pyarrow"]
+
+
+def write_history(path: Path, n_tickers: int, n_years: int, seed: int = 42) -> int:
+    rng = np.random.default_rng(seed)
+    end_date = pd.Timestamp.today().normalize()
+    start_date = end_date - pd.DateOffset(years=n_years)
+    rows = 0
+    with open(path, "w") as f:
+        for i, ticker in enumerate(synthetic_tickers(n_tickers)):
+            df = ohclv_frame(ticker, str(start_date.date()), str(end_date.date()), rng)
+            df.to_csv(f, index=False, header=(i == 0))
+            rows += len(df)
+    return rows
+
+
+def _parse(path: str, method: str) -> pd.DataFrame:
+    if method == "pyarrow":
+        from ..ingest import read_landing
+        return read_landing(path, "ohclv")
+
+    df = pd.read_csv(path)
+    if method == "pandas_dates":
+        df["Date"] = pd.to_datetime(df["Date"]).dt.date
+    return df
+
+
+def _max_rss_mb() -> float:
+    # kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def run_worker(path: str, method: str, repeat: int) -> dict:
+    # import pyarrow before the baseline so its import cost is not counted as parse memory
+    import pyarrow.csv  # noqa: F401
+
+    baseline = _max_rss_mb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = _parse(path, method)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "method": method,
+        "rows": len(df),
+        "parse_seconds": round(min(timings), 4),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        "peak_rss_growth_mb": round(_max_rss_mb() - baseline, 1),
+        "dtypes": ", ".join(f"{c}:{t}" for c, t in df.dtypes.astype(str).items()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--work-dir", default="data/benchmark/ingest")
+    parser.add_argument("--out", default="reports/benchmarks/ingest_benchmark.csv")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--method", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.method, args.repeat)))
+        return
+
+    make_dir(args.work_dir)
+    path = Path(args.work_dir) / f"ohclv_{args.tickers}x{args.years}.csv"
+    if not path.exists():
+        generate_start = time.perf_counter()
+        rows = write_history(path, args.tickers, args.years)
+        print(f"generated {rows} rows ({path.stat().st_size / 2**20:.0f} MB) in {time.perf_counter() - generate_start:.1f}s")
+
+    results = []
+    for method in METHODS:
+        worker = subprocess.run(
+            [sys.executable, "-m", "src.benchmarks.ingest_bench", "--worker", str(path), "--method", method,
+             "--repeat", str(args.repeat)],
+            capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(worker.stdout.strip().splitlines()[-1]))
+
+    report = pd.DataFrame(results)
+    make_dir(Path(args.out).parent)
+    report.to_csv(args.out, index=False)
+    print(report.drop(columns="dtypes").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+
+Micro benchmark : cost of a per-ticker logger.info call in a hot loop
+
+    python -m src.benchmarks.logging_overhead --iterations 10000
+
+Compares the old setup (FileHandler attached straight to the logger) with the
+queue based setup from src.logger, in plain text and JSON format. Writes to a
+page-cached temp dir are nearly free, so the run is repeated with a simulated
+per-write disk latency (--disk-latency-us) to show what a slow or busy disk
+costs the hot loop.
+
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import tempfile
+import time
+
+from .. import logger as pipeline_logger
+
+
+def _hot_loop(logger, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        logger.info(f"Running for ticker : TICK{i % 500}")
+    return time.perf_counter() - start
+
+
+def bench_sync_file_handler(iterations: int) -> float:
+    logger = logging.getLogger("bench-sync")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.FileHandler("sync_handler.log")
+    handler.setFormatter(logging.Formatter(pipeline_logger.TEXT_FORMAT))
+    logger.addHandler(handler)
+    try:
+        return _hot_loop(logger, iterations)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def bench_queue_handler(iterations: int, json_format: bool) -> tuple:
+    pipeline_logger.setup_logging(json_format=json_format)
+    logger = logging.getLogger("daily-execution")
+    try:
+        hot_path = _hot_loop(logger, iterations)
+    finally:
+        # stopping the listener waits for the queue to drain, that is the total cost
+        drain_start = time.perf_counter()
+        pipeline_logger.shutdown_logging()
+        drain = time.perf_counter() - drain_start
+    return hot_path, hot_path + drain
+
+
+@contextlib.contextmanager
+def _disk_latency(latency_us: int):
+    """Delay every FileHandler write, time.sleep releases the GIL like a blocking write would"""
+    if not latency_us:
+        yield
+        return
+
+    original_emit = logging.FileHandler.emit
+
+    def slow_emit(self, record):
+        time.sleep(latency_us / 1e6)
+        original_emit(self, record)
+
+    logging.FileHandler.emit = slow_emit
+    try:
+        yield
+    finally:
+        logging.FileHandler.emit = original_emit
+
+
+def run(iterations: int, latency_us: int) -> None:
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, _disk_latency(latency_us):
+        os.chdir(tmp)
+        try:
+            sync_time = bench_sync_file_handler(iterations)
+            queue_text, queue_text_total = bench_queue_handler(iterations, json_format=False)
+            queue_json, queue_json_total = bench_queue_handler(iterations, json_format=True)
+        finally:
+            os.chdir(cwd)
+
+    print(f"\n{iterations} log calls, simulated disk latency {latency_us} us per write")
+    print(f"{'setup':<28}{'hot path (s)':>14}{'per call (us)':>16}{'incl. drain (s)':>18}")
+    for name, hot, total in (
+        ("sync FileHandler", sync_time, sync_time),
+        ("queue handler, text", queue_text, queue_text_total),
+        ("queue handler, json", queue_json, queue_json_total),
+    ):
+        print(f"{name:<28}{hot:>14.4f}{hot / iterations * 1e6:>16.2f}{total:>18.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=10_000)
+    parser.add_argument("--disk-latency-us", type=int, default=100)
+    args = parser.parse_args()
+
+    run(args.iterations, 0)
+    run(args.iterations, args.disk_latency_us)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+
+Gold returns benchmark : the numpy panel (src/returns_panel.py) from tens to thousands of tickers
+
+    python -m src.benchmarks.returns_bench --tickers 100,1000,5000 --years 6
+
+No database involved. For every size a fresh worker process builds a seeded random-walk
+(ticker, date, close) frame, the rows ohclv_silver hands the gold stage, and times the panel
+build, the horizon returns, the rolling betas and the long gold frame, with the peak RSS of the
+worker. Up to --baseline-max tickers the same worker also times the per-ticker pandas equivalent
+(groupby pct_change and rolling cov / var), the shape of the SQL window views, and checks both
+agree. Results go to --out.
+
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..utils import make_dir
+from .synthetic import synthetic_tickers
+
+BENCHMARK = "T00000"
+
+
+def synthetic_closes(n_tickers: int, years: int, seed: int = 0) -> pd.DataFrame:
+    """Geometric random walks sharing a market factor, so the betas are not all zero"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-12-31", periods=252 * years)
+    market = rng.normal(0, 0.01, (len(dates), 1))
+    loadings = rng.uniform(0.2, 1.8, (1, n_tickers))
+    loadings[0, 0] = 1.0
+    daily = market * loadings + rng.normal(0, 0.015, (len(dates), n_tickers))
+    close = rng.uniform(10, 500, n_tickers) * np.exp(np.cumsum(daily, axis=0))
+
+    return pd.DataFrame({
+        "ticker": np.tile(np.array(synthetic_tickers(n_tickers)), len(dates)),
+        "date": np.repeat(dates.date, n_tickers),
+        "close": close.ravel().round(2),
+    })
+
+
+def pandas_baseline(frame: pd.DataFrame, horizons: list, windows: list) -> pd.DataFrame:
+    """One ticker at a time, as the SQL views partition by ticker"""
+    frame = frame.sort_values(["ticker", "date"]).reset_index(drop=True)
+    by_ticker = frame.groupby("ticker")["close"]
+    for h in horizons:
+        frame[f"return_{h}d"] = by_ticker.pct_change(h)
+
+    market = frame.loc[frame["ticker"] == BENCHMARK, ["date", "return_1d"]].rename(columns={"return_1d": "market"})
+    frame = frame.merge(market, on="date", how="left")
+    for w in windows:
+        grouped = frame.groupby("ticker")
+        cov = grouped[["return_1d", "market"]].rolling(w).cov().xs("market", level=2)["return_1d"]
+        var = grouped["market"].rolling(w).var()
+        frame[f"beta_{w}d"] = (cov / var).reset_index(level=0, drop=True)
+    return frame
+
+
+def run_worker(n_tickers: int, years: int, baseline: bool) -> list:
+    """Runs inside the worker process, one result dict per measurement"""
+    from ..returns_panel import close_panel, horizon_returns, rolling_beta, compute_panel, DEFAULT_HORIZONS, DEFAULT_BETA_WINDOWS
+
+    frame = synthetic_closes(n_tickers, years)
+    results = [{"measure": "input_rows", "value": len(frame)}]
+
+    start = time.perf_counter()
+    dates, tickers, close = close_panel(frame)
+    results.append({"measure": "panel_seconds", "value": round(time.perf_counter() - start, 4)})
+
+    start = time.perf_counter()
+    returns = horizon_returns(close, DEFAULT_HORIZONS)
+    results.append({"measure": "returns_seconds", "value": round(time.perf_counter() - start, 4)})
+
+    start = time.perf_counter()
+    bench = returns[1][:, tickers.get_loc(BENCHMARK)]
+    for window in DEFAULT_BETA_WINDOWS:
+        rolling_beta(returns[1], bench, window)
+    results.append({"measure": "betas_seconds", "value": round(time.perf_counter() - start, 4)})
+
+    start = time.perf_counter()
+    gold = compute_panel(frame, {"horizons": DEFAULT_HORIZONS, "beta_windows": DEFAULT_BETA_WINDOWS,
+                                 "benchmark": BENCHMARK, "block": 1024})
+    seconds = time.perf_counter() - start
+    results.append({"measure": "compute_panel_seconds", "value": round(seconds, 4)})
+    results.append({"measure": "rows_per_second", "value": round(len(gold) / seconds)})
+
+    if baseline:
+        start = time.perf_counter()
+        reference = pandas_baseline(frame, DEFAULT_HORIZONS, DEFAULT_BETA_WINDOWS)
+        results.append({"measure": "pandas_groupby_seconds", "value": round(time.perf_counter() - start, 4)})
+
+        merged = gold.merge(reference, left_on=["ticker", "trade_date"], right_on=["ticker", "date"], suffixes=("", "_ref"))
+        columns = [f"return_{h}d" for h in DEFAULT_HORIZONS] + [f"beta_{w}d" for w in DEFAULT_BETA_WINDOWS]
+        error = max(float(np.nanmax(np.abs(merged[c] - merged[f"{c}_ref"]))) for c in columns)
+        results.append({"measure": "max_abs_difference", "value": error})
+
+    # ru_maxrss is in KB on Linux
+    results.append({"measure": "peak_rss_mb", "value": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", default="100,1000,5000")
+    parser.add_argument("--years", type=int, default=6)
+    parser.add_argument("--baseline-max", type=int, default=1000, help="largest size the pandas baseline runs at")
+    parser.add_argument("--out", default="reports/benchmarks/returns_benchmark.csv")
+    parser.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--baseline", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.years, args.baseline)))
+        return
+
+    rows = []
+    for n_tickers in [int(n) for n in args.tickers.split(",")]:
+        command = [sys.executable, "-m", "src.benchmarks.returns_bench", "--worker", str(n_tickers), "--years", str(args.years)]
+        if n_tickers <= args.baseline_max:
+            command.append("--baseline")
+        worker = subprocess.run(command, capture_output=True, text=True, check=True)
+        for result in json.loads(worker.stdout.strip().splitlines()[-1]):
+            rows.append({"tickers": n_tickers, **result})
+
+    report = pd.DataFrame(rows)
+    make_dir(Path(args.out).parent)
+    report.to_csv(args.out, index=False)
+    print(report.pivot_table(index="measure", columns="tickers", values="value", sort=False).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+
+Stage throughput benchmark on synthetic data
+
+    python -m src.benchmarks.stage_bench --tickers 20,200 --years 1,5
+
+For every tickers x years scale the synthetic generator writes landing files under
+--work-dir, a copy of the bulk config is pointed at them, and each stage runs in a
+fresh worker process (the stage modules read --bulk when they are imported):
+
+    historical load -> rank_trim -> silver_ddl -> silver_load -> gold views -> daily load -> daily transform
+
+Stages run against the MySQL server in the bulk config, the transforms reference the
+bronze / silver / gold schemas by name, so point --host / --port at a local throwaway
+instance. Wall time and rows/sec per stage and scale are printed and written to --out.
+
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from ..utils import load_yml, make_dir
+from .synthetic import write_landing, synthetic_tickers
+
+LANDING_KEYS = [
+    "ohclv_root",
+    "ohclv_daily_root",
+    "meta_data_root",
+    "meta_data_daily_root",
+    "macro_data_root",
+    "exchange_rate_root",
+    "exchange_rate_daily_root",
+    "fx_rate_root",
+    "fx_rate_daily_root",
+]
+
+
+def bench_config(bulk_config: dict, scale_dir: Path, tickers: list, host: str | None, port: str | None) -> Path:
+    """Copy of the bulk config with every landing root moved under the scale directory"""
+    config = dict(bulk_config)
+    for key in LANDING_KEYS:
+        config[key] = str(scale_dir / bulk_config[key])
+    config["tickers"] = tickers
+    # run state starts empty on every benchmark run, the no-op short-circuit must never skip a measured stage
+    for key in ("landing_state_path", "run_state_path"):
+        config[key] = str(scale_dir / Path(bulk_config[key]).name)
+        Path(config[key]).unlink(missing_ok=True)
+    if host:
+        config["host"] = host
+    if port:
+        config["port"] = str(port)
+
+    config_path = scale_dir / "bulk.yaml"
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return config_path
+
+
+def run_worker(config_path: str, counts: dict) -> list:
+    """Runs inside the worker process, returns one result dict per stage"""
+
+    # the historical stage modules parse --bulk at import time
+    sys.argv = [sys.argv[0], "--bulk", config_path]
+
+    from sqlalchemy import text
+    from .. import metrics
+    from ..utils import get_analytics_engine
+    from ..historical.load import ohclv_historic, meta_data_historic, exchange_rate_historic, macro_data_historic
+    from ..historical.transform import bronze_rank_trim, silver_master, silver_load
+    from ..transform_gold import gold_core
+    from ..daily.load.daily_load import daily_load
+    from ..daily.transform.daily_transform import daily_transform
+
+    bulk_config = load_yml(config_path)
+    bronze_rows = counts["ohclv"] + counts["company_meta"] + counts["exchange_rate"] + counts["fx_rates"] + counts["macro_data"]
+    daily_rows = counts["ohclv_daily"] + 1 + counts["fx_rates_daily"]
+
+    def historical_load():
+        ohclv_historic.load_ohclv_bronze()
+        meta_data_historic.load_meta_bronze()
+        exchange_rate_historic.load_exhange_bronze()
+        macro_data_historic.load_macro_bronze()
+
+    def gold_views():
+        # views are free to create, scan stock_facts so the window functions are actually evaluated
+        gold_core.gold_exec()
+        engine = get_analytics_engine(bulk_config, bulk_config["dbname"][2], gold_core.db_pass)
+        with engine.connect() as conn:
+            conn.execute(text(f"SELECT COUNT(*), AVG(volatility_days_30) FROM {bulk_config['dbname'][2]}.stock_facts")).fetchall()
+
+    stages = [
+        ("historical_load", historical_load, bronze_rows),
+        ("rank_trim", bronze_rank_trim.add_rank_trim, bronze_rows),
+        ("silver_ddl", silver_master.silver_ddl, bronze_rows),
+        ("silver_load", silver_load.silver_load, bronze_rows),
+        ("gold_views", gold_views, counts["ohclv"]),
+        ("daily_load", lambda: daily_load(bulk=config_path), daily_rows),
+        ("daily_transform", lambda: daily_transform(bulk=config_path), daily_rows),
+    ]
+
+    results = []
+    for name, func, rows in stages:
+        # the stages log and swallow their own errors, the error counter tells a fast failure from a fast stage
+        errors_before = metrics.counter_value("pipeline_errors_total")
+        with metrics.stage_timer("benchmark", source=name) as timer:
+            func()
+        errors = metrics.counter_value("pipeline_errors_total") - errors_before
+        results.append({
+            "stage": name,
+            "rows": rows,
+            "seconds": round(timer.seconds, 4),
+            "rows_per_sec": round(rows / timer.seconds, 1) if timer.seconds else None,
+            "errors": int(errors),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", default="config/bulk.yaml")
+    parser.add_argument("--tickers", default="20,200", help="comma separated ticker counts")
+    parser.add_argument("--years", default="1,5", help="comma separated history lengths in years")
+    parser.add_argument("--work-dir", default="data/benchmark")
+    parser.add_argument("--out", default="reports/benchmarks/stage_benchmark.csv")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", default=None)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--counts", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, json.loads(args.counts))))
+        return
+
+    bulk_config = load_yml(args.bulk)
+    rows = []
+
+    for n_tickers in [int(t) for t in args.tickers.split(",")]:
+        for n_years in [int(y) for y in args.years.split(",")]:
+            scale_dir = Path(args.work_dir) / f"{n_tickers}x{n_years}"
+            make_dir(scale_dir)
+            config_path = bench_config(bulk_config, scale_dir, synthetic_tickers(n_tickers), args.host, args.port)
+
+            generate_start = time.perf_counter()
+            counts = write_landing(load_yml(config_path), n_tickers, n_years)
+            print(f"[{n_tickers} tickers x {n_years} years] generated {counts['ohclv']} ohclv rows "
+                  f"in {time.perf_counter() - generate_start:.1f}s")
+
+            worker = subprocess.run(
+                [sys.executable, "-m", "src.benchmarks.stage_bench", "--worker", str(config_path), "--counts", json.dumps(counts)],
+                capture_output=True, text=True, check=True,
+            )
+            for result in json.loads(worker.stdout.strip().splitlines()[-1]):
+                rows.append({"tickers": n_tickers, "years": n_years, **result})
+
+    report = pd.DataFrame(rows)
+    make_dir(Path(args.out).parent)
+    report.to_csv(args.out, index=False)
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+
+Offline stand-ins for the extract APIs : FMP, Frankfurter, yfinance and the Global Macro Database
+
+    - FMP and Frankfurter are served by a local HTTP server, the bulk config endpoints are rewritten to it
+    - yfinance.download and global_macro_data.gmd are patched in-process
+
+Responses come from recorded landing files when a recording root has them, otherwise from the
+synthetic generator. Every call goes through a FaultInjector that adds latency, random errors
+and token-bucket rate limiting (HTTP 429 / empty yfinance frame), seeded so runs repeat.
+
+    with offline_apis(bulk_config, work_dir, latency_ms=50, error_rate=0.05) as (config_path, faults):
+        daily_extr(bulk=config_path)
+
+"""
+
+import contextlib
+import datetime as dt
+import json
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from .synthetic import ohclv_frame, meta_frame, macro_frame
+
+ENDPOINT_KEYS = ["fmp_end_point", "frank_exchange_end_point", "frank_exchange_latest_endpoint"]
+
+GMD_COLUMNS = {"NOMINAL_GDP": "nGDP", "REAL_GDP": "rGDP", "INFLATION": "infl", "UNEMPLOYMENT": "unemp"}
+
+
+class FaultInjector:
+    """Latency, error rate and rate limit shared by the HTTP stub and the patched clients"""
+
+    def __init__(self, latency_ms: float = 0, error_rate: float = 0.0, rate_limit_per_sec: float = 0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rate_limit_per_sec = rate_limit_per_sec
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit_per_sec
+        self._last_refill = time.monotonic()
+        self.stats = {"requests": 0, "ok": 0, "error": 0, "rate_limited": 0}
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit_per_sec:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit_per_sec, self._tokens + (now - self._last_refill) * self.rate_limit_per_sec)
+        self._last_refill = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def decide(self) -> str:
+        """Sleep for the configured latency, then return 'ok', 'error' or 'rate_limited'"""
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            self.stats["requests"] += 1
+            if not self._take_token():
+                outcome = "rate_limited"
+            elif self._rng.random() < self.error_rate:
+                outcome = "error"
+            else:
+                outcome = "ok"
+            self.stats[outcome] += 1
+        return outcome
+
+
+def _seed_for(key: str) -> int:
+    return zlib.crc32(key.encode())
+
+
+def _latest_csv(root: Path | None, pattern: str = "*.csv") -> Path | None:
+    if root is None or not root.is_dir():
+        return None
+    files = list(root.rglob(pattern))
+    return max(files, key=lambda f: f.stat().st_mtime) if files else None
+
+
+class StubData:
+    """Recorded landing files first, synthetic data as the fallback"""
+
+    def __init__(self, recorded_config: dict | None = None):
+        self.recorded = recorded_config or {}
+
+    def _root(self, key: str) -> Path | None:
+        return Path(self.recorded[key]) if key in self.recorded else None
+
+    def profile(self, ticker: str) -> dict:
+        recorded = _latest_csv(self._root("meta_data_root"))
+        if recorded is not None:
+            df = pd.read_csv(recorded)
+            match = df[df["symbol"] == ticker]
+            if not match.empty:
+                return json.loads(match.head(1).to_json(orient="records"))[0]
+        synthetic = meta_frame([ticker], np.random.default_rng(_seed_for(ticker)))
+        return json.loads(synthetic.to_json(orient="records"))[0]
+
+    def fx_rates(self, start_date: str, end_date: str, symbols: list) -> dict:
+        dates = pd.bdate_range(start_date, end_date).strftime("%Y-%m-%d")
+        rates = {d: {} for d in dates}
+        for symbol in symbols:
+            rng = np.random.default_rng(_seed_for(symbol))
+            walk = rng.uniform(0.5, 150) * np.exp(np.cumsum(rng.normal(0, 0.002, len(dates))))
+            for d, rate in zip(dates, walk):
+                rates[d][symbol] = round(float(rate), 4)
+        return rates
+
+    def ohclv(self, ticker: str, start: str, end: str) -> pd.DataFrame:
+        recorded = _latest_csv(self._root("ohclv_root") / ticker if self._root("ohclv_root") else None)
+        if recorded is not None:
+            df = pd.read_csv(recorded)
+            return df[(df["Date"] >= start) & (df["Date"] < end)]
+        return ohclv_frame(ticker, start, end, np.random.default_rng(_seed_for(ticker)))
+
+    def macro(self, variables: list) -> pd.DataFrame:
+        recorded = _latest_csv(self._root("macro_data_root"))
+        if recorded is not None:
+            df = pd.read_csv(recorded)
+        else:
+            df = macro_frame(50, 2000, dt.date.today().year, np.random.default_rng(0))
+        df = df.rename(columns=GMD_COLUMNS)
+        keep = ["ISO3"] + [v for v in variables if v in df.columns]
+        return df[list(dict.fromkeys(keep))]
+
+
+# <--- HTTP stub for FMP and Frankfurter --->
+
+def _handler_factory(data: StubData, faults: FaultInjector):
+
+    class StubHandler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, payload, headers: dict | None = None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            outcome = faults.decide()
+            if outcome == "rate_limited":
+                return self._send(429, {"message": "Limit Reach"}, {"Retry-After": "1"})
+            if outcome == "error":
+                return self._send(500, {"message": "stub injected error"})
+
+            url = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            symbols = query.get("symbols", "INR").split(",")
+            base = query.get("base", "USD")
+
+            if url.path.endswith("/profile"):
+                return self._send(200, [data.profile(query.get("symbol", ""))])
+
+            if url.path.endswith("/latest"):
+                today = dt.date.today()
+                rates = data.fx_rates(str(today - dt.timedelta(days=7)), str(today), symbols)
+                last_date = max(rates)
+                return self._send(200, {"amount": 1.0, "base": base, "date": last_date, "rates": rates[last_date]})
+
+            match = re.search(r"/v1/(\d{4}-\d{2}-\d{2})\.\.(\d{4}-\d{2}-\d{2})?$", url.path)
+            if match:
+                start = match.group(1)
+                end = match.group(2) or str(dt.date.today())
+                rates = data.fx_rates(start, end, symbols)
+                return self._send(200, {"amount": 1.0, "base": base, "start_date": start, "end_date": end, "rates": rates})
+
+            return self._send(404, {"message": f"no stub for {url.path}"})
+
+    return StubHandler
+
+
+def start_http_stub(data: StubData, faults: FaultInjector) -> ThreadingHTTPServer:
+    """Serve FMP / Frankfurter on an ephemeral localhost port from a daemon thread"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_factory(data, faults))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# <--- patched library clients --->
+
+@contextlib.contextmanager
+def patch_yfinance(data: StubData, faults: FaultInjector):
+    import yfinance
+
+    original = yfinance.download
+
+    def download(ticker, start=None, end=None, period=None, **kwargs):
+        outcome = faults.decide()
+        if outcome != "ok":
+            # yfinance reports failures and throttling as an empty frame
+            return pd.DataFrame()
+
+        if period:
+            # latest bar available, re-dated to today like a live daily download
+            today = dt.date.today()
+            df = data.ohclv(ticker, str(today - dt.timedelta(days=3650)), str(today + dt.timedelta(days=1))).tail(1)
+            df = df.assign(Date=str(today))
+        else:
+            df = data.ohclv(ticker, str(start), str(end))
+
+        df = df.set_index(pd.to_datetime(df["Date"]).rename("Date"))
+        fields = ["CLOSE", "HIGH", "LOW", "OPEN", "VOLUME"]
+        out = df[fields].copy()
+        out.columns = pd.MultiIndex.from_tuples([(f.title(), ticker) for f in fields], names=["Price", "Ticker"])
+        return out
+
+    yfinance.download = download
+    try:
+        yield
+    finally:
+        yfinance.download = original
+
+
+@contextlib.contextmanager
+def patch_gmd(data: StubData, faults: FaultInjector):
+    """src.gmd_cache calls through the library module, patching its attributes is enough"""
+    import global_macro_data
+
+    originals = {name: getattr(global_macro_data, name) for name in ("gmd", "get_current_version")}
+
+    def gmd(variables=None, **kwargs):
+        if faults.decide() != "ok":
+            raise ConnectionError("stub injected GMD download failure")
+        # no variables is the whole release, which is what the cache asks for
+        df = data.macro(variables or ["countryname", "id", "year", *GMD_COLUMNS.values()])
+        print("Loading GMD data (offline stub)")
+        print(f"Rows: {len(df)}")
+        return df
+
+    def get_current_version():
+        if faults.decide() != "ok":
+            raise ConnectionError("stub injected GMD version check failure")
+        return "stub"
+
+    global_macro_data.gmd = gmd
+    global_macro_data.get_current_version = get_current_version
+    try:
+        yield
+    finally:
+        for name, original in originals.items():
+            setattr(global_macro_data, name, original)
+
+
+def stub_config(bulk_config: dict, base_url: str) -> dict:
+    """Bulk config with the HTTP endpoints pointed at the stub server"""
+    config = dict(bulk_config)
+    for key in ENDPOINT_KEYS:
+        config[key] = re.sub(r"^https?://[^/]+", base_url, bulk_config[key])
+    return config
+
+
+@contextlib.contextmanager
+def offline_apis(bulk_config: dict, work_dir: Path, latency_ms: float = 0, error_rate: float = 0.0,
+                 rate_limit_per_sec: float = 0, seed: int = 0, recorded_config: dict | None = None):
+    """
+    Start the HTTP stub, patch yfinance / gmd and write a stubbed bulk config into work_dir.
+    Yields (config_path, faults) so callers can read the injected fault counts.
+    """
+    data = StubData(recorded_config)
+    faults = FaultInjector(latency_ms, error_rate, rate_limit_per_sec, seed)
+    server = start_http_stub(data, faults)
+
+    config = stub_config(bulk_config, f"http://127.0.0.1:{server.server_address[1]}")
+    # the stub release must never land in the real GMD cache
+    config["gmd_cache_dir"] = str(work_dir / "gmd_cache")
+    work_dir.mkdir(parents=True, exist_ok=True)
+    config_path = work_dir / "bulk_offline.yaml"
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+    try:
+        with patch_yfinance(data, faults), patch_gmd(data, faults):
+            yield config_path, faults
+    finally:
+        server.shutdown()
+        server.server_close()
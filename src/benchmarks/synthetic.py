@@ -0,0 +1,164 @@
+"""
+
+Synthetic landing data for benchmarks : OHCLV, company metadata, exchange rates and macro data
+
+Frames carry the same columns as the files the extract modules write, and
+write_landing() lays them out in the same <root>/<year>/<Mon>/<day> partitions,
+so the loaders pick them up unchanged. Everything is seeded for repeatable runs.
+
+"""
+
+import datetime as dt
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..utils import make_dir, fx_pairs, fx_long
+
+SECTORS = {
+    "Technology": ["Consumer Electronics", "Semiconductors", "Software - Infrastructure", "Software - Application"],
+    "Consumer Cyclical": ["Auto - Manufacturers", "Specialty Retail"],
+    "Financial Services": ["Financial - Capital Markets", "Banks - Diversified"],
+    "Consumer Defensive": ["Discount Stores"],
+}
+
+
+def synthetic_tickers(n_tickers: int) -> list:
+    return [f"T{i:05d}" for i in range(n_tickers)]
+
+
+def ohclv_frame(ticker: str, start_date: str, end_date: str, rng: np.random.Generator) -> pd.DataFrame:
+    """Geometric random walk over business days, columns as written by yfinance in the extract"""
+    dates = pd.bdate_range(start_date, end_date)
+    n = len(dates)
+
+    close = rng.uniform(10, 500) * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+
+    return pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "CLOSE": close.round(2),
+        "HIGH": high.round(2),
+        "LOW": low.round(2),
+        "OPEN": open_.round(2),
+        "VOLUME": rng.integers(100_000, 50_000_000, n),
+        "COMPANY_TICKER": ticker,
+    })
+
+
+def meta_frame(tickers: list, rng: np.random.Generator) -> pd.DataFrame:
+    sectors = list(SECTORS)
+    rows = []
+    for ticker in tickers:
+        sector = sectors[rng.integers(len(sectors))]
+        industries = SECTORS[sector]
+        rows.append({
+            "companyName": f"Synthetic {ticker} Inc.",
+            "symbol": ticker,
+            "price": round(float(rng.uniform(10, 500)), 2),
+            "marketCap": int(rng.integers(10**8, 10**12)),
+            "sector": sector,
+            "industry": industries[rng.integers(len(industries))],
+        })
+    return pd.DataFrame(rows)
+
+
+def fx_frame(start_date: str, end_date: str, rng: np.random.Generator) -> pd.DataFrame:
+    """USD -> INR on business days, the historic Frankfurter extract layout"""
+    dates = pd.bdate_range(start_date, end_date)
+    rate = 75 * np.exp(np.cumsum(rng.normal(0, 0.002, len(dates))))
+    return pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "INR_amount": rate.round(3),
+        "USD_rate": 1,
+    })
+
+
+def fx_rates_frame(fx: pd.DataFrame, quotes: list, base: str, rng: np.random.Generator) -> pd.DataFrame:
+    """Narrow (date, base, quote, rate) rows : the INR series of fx plus a random walk per other quote"""
+    rates = {"INR": fx["INR_amount"].to_numpy()}
+    for quote in quotes:
+        if quote != "INR":
+            rates[quote] = (rng.uniform(0.5, 150) * np.exp(np.cumsum(rng.normal(0, 0.002, len(fx))))).round(4)
+    return fx_long(pd.DataFrame(rates, index=fx["Date"]).to_dict("index"), base)
+
+
+def macro_frame(n_countries: int, start_year: int, end_year: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Yearly GMD style rows, a few values are blanked so the loader's null handling has work to do"""
+    rows = []
+    for c in range(n_countries):
+        iso3 = f"C{c:02d}"
+        gdp = rng.uniform(1e3, 1e6)
+        for year in range(start_year, end_year + 1):
+            gdp *= 1 + rng.normal(0.03, 0.02)
+            rows.append({
+                "ISO3": iso3,
+                "countryname": f"Country {iso3}",
+                "year": year,
+                "id": iso3,
+                "NOMINAL_GDP": gdp,
+                "REAL_GDP": gdp * 0.9,
+                "INFLATION": rng.normal(3, 1.5),
+                "UNEMPLOYMENT": rng.uniform(2, 12),
+            })
+    df = pd.DataFrame(rows)
+    df.loc[df.sample(frac=0.05, random_state=0).index, "INFLATION"] = np.nan
+    return df
+
+
+def _partition(root: Path, run_dt: dt.datetime) -> Path:
+    path = root / str(run_dt.year) / run_dt.strftime("%b") / run_dt.strftime("%d")
+    make_dir(path)
+    return path
+
+
+def write_landing(bulk_config: dict, n_tickers: int, n_years: int, seed: int = 42, n_countries: int = 50) -> dict:
+    """
+    Write historic and daily landing files for n_tickers x n_years under the roots in bulk_config.
+    Returns the row counts per source so the benchmark can report rows/sec.
+    """
+    rng = np.random.default_rng(seed)
+    run_dt = dt.datetime.now()
+    run_time = run_dt.strftime("%H-%M-%S")
+
+    end_date = run_dt.date()
+    start_date = (pd.Timestamp(end_date) - pd.DateOffset(years=n_years)).date()
+    tickers = synthetic_tickers(n_tickers)
+    counts = {"ohclv": 0, "company_meta": n_tickers, "exchange_rate": 0, "macro_data": 0, "ohclv_daily": n_tickers}
+
+    # <--- historic landing --->
+    for ticker in tickers:
+        df = ohclv_frame(ticker, str(start_date), str(end_date), rng)
+        counts["ohclv"] += len(df)
+        df.to_csv(_partition(Path(bulk_config["ohclv_root"]) / ticker, run_dt) / f"{ticker}_stock_{run_time}.csv", index=False)
+
+        # one bar dated today for the daily path
+        daily = df.tail(1).assign(Date=str(end_date))
+        daily.to_csv(_partition(Path(bulk_config["ohclv_daily_root"]) / ticker, run_dt) / f"{ticker}_stock_{run_time}.csv", index=False)
+
+    meta_frame(tickers, rng).to_csv(_partition(Path(bulk_config["meta_data_root"]), run_dt) / f"company_metadata_{run_time}.csv", index=False)
+
+    fx = fx_frame(str(start_date), str(end_date), rng)
+    counts["exchange_rate"] = len(fx)
+    fx.to_csv(_partition(Path(bulk_config["exchange_rate_root"]), run_dt) / f"exchange_rates_{run_time}.csv", index=False)
+
+    daily_fx = pd.DataFrame({"date": [str(end_date)], "inr_rate": [fx["INR_amount"].iloc[-1]], "USD_rate": [1]})
+    daily_fx.to_csv(_partition(Path(bulk_config["exchange_rate_daily_root"]), run_dt) / f"exchange_rate{run_time}.csv", index=False)
+
+    fx_base, fx_quotes = fx_pairs(bulk_config)
+    fx_rates = fx_rates_frame(fx, fx_quotes, fx_base, rng)
+    counts["fx_rates"] = len(fx_rates)
+    fx_rates.to_csv(_partition(Path(bulk_config["fx_rate_root"]), run_dt) / f"fx_rates_{run_time}.csv", index=False)
+
+    daily_fx_rates = fx_rates[fx_rates["date"] == fx_rates["date"].max()].assign(date=str(end_date))
+    counts["fx_rates_daily"] = len(daily_fx_rates)
+    daily_fx_rates.to_csv(_partition(Path(bulk_config["fx_rate_daily_root"]), run_dt) / f"fx_rates_{run_time}.csv", index=False)
+
+    macro = macro_frame(n_countries, start_date.year, end_date.year, rng)
+    counts["macro_data"] = len(macro)
+    macro.to_csv(_partition(Path(bulk_config["macro_data_root"]), run_dt) / f"macro_data_historic_{run_time}.csv", index=False)
+
+    return counts
@@ -0,0 +1,138 @@
+"""
+
+Silver transform benchmark : the processed -> clean -> silver chain against the single ROW_NUMBER() pass
+
+    python -m src.benchmarks.transform_bench --modes chain,single_pass
+
+Reads the bronze tables already in MySQL (run the historical load or stage_bench first). For every
+mode a copy of the bulk config with silver_transform set is written under --work-dir, and a fresh
+worker process runs rank_trim -> silver_ddl -> silver_load, timing every stage. The worker then
+measures the space of the intermediate and silver tables: data + index length from
+information_schema after ANALYZE TABLE, plus the DuckDB file size on that backend. The chain
+measurement is taken before the single pass run drops the intermediates, so run chain first.
+
+The run rebuilds the silver tables of the configured backend.
+
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from ..utils import load_yml, make_dir
+
+MODES = ("chain", "single_pass")
+
+
+def mode_config(bulk_config: dict, work_dir: Path, mode: str) -> Path:
+    config = dict(bulk_config)
+    config["silver_transform"] = mode
+
+    config_path = work_dir / f"bulk_{mode}.yaml"
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return config_path
+
+
+SIZE_SQL = """
+    SELECT data_length + index_length FROM information_schema.TABLES
+    WHERE table_schema = :schema AND table_name = :table
+"""
+
+
+def table_sizes(conn, schema: str, tables: list) -> dict:
+    """MySQL bytes on disk (data + indexes) per existing table, the statistics refreshed first"""
+    from sqlalchemy import text
+
+    sizes = {}
+    for table in tables:
+        if conn.execute(text(SIZE_SQL), {"schema": schema, "table": table}).fetchone() is None:
+            continue
+        conn.execute(text(f"ANALYZE TABLE {schema}.{table}"))
+        sizes[f"{schema}.{table}"] = int(conn.execute(text(SIZE_SQL), {"schema": schema, "table": table}).scalar())
+    return sizes
+
+
+def run_worker(config_path: str) -> list:
+    """Runs inside the worker process, one result dict per measurement"""
+
+    # the transform modules parse --bulk at import time
+    sys.argv = [sys.argv[0], "--bulk", config_path]
+
+    from ..utils import analytics_backend, get_engine_session
+    from ..historical.transform import bronze_rank_trim, silver_master, silver_load
+    from ..historical.transform.silver_dedup import PROCESSED_TABLES, CLEAN_TABLES
+
+    bulk_config = load_yml(config_path)
+    bronze, silver = bulk_config["dbname"][0], bulk_config["dbname"][1]
+    results = []
+
+    total = 0.0
+    for name, stage in (("rank_trim", bronze_rank_trim.add_rank_trim),
+                        ("silver_ddl", silver_master.silver_ddl),
+                        ("silver_load", silver_load.silver_load)):
+        start = time.perf_counter()
+        stage()
+        seconds = time.perf_counter() - start
+        total += seconds
+        results.append({"measure": f"{name}_seconds", "value": round(seconds, 4)})
+    results.append({"measure": "transform_seconds", "value": round(total, 4)})
+
+    backend = analytics_backend(bulk_config)
+    silver_tables = ["ohclv_silver", "company_meta_data_silver", "macro_economic_data_silver", "exchange_rates_silver"]
+    engine, _ = get_engine_session(bronze, bulk_config["user_name"], bulk_config["host"], bulk_config["port"], silver_load.db_pass)
+    with engine.connect() as conn:
+        sizes = table_sizes(conn, bronze, PROCESSED_TABLES)
+        if backend == "mysql":
+            sizes.update(table_sizes(conn, silver, CLEAN_TABLES + silver_tables))
+
+    intermediate = sum(size for table, size in sizes.items() if not table.endswith("_silver"))
+    results.append({"measure": "intermediate_bytes", "value": intermediate})
+    results.append({"measure": "silver_bytes", "value": sum(sizes.values()) - intermediate})
+    if backend == "duckdb":
+        results.append({"measure": "duckdb_file_bytes", "value": Path(bulk_config["duckdb_path"]).stat().st_size})
+    results += [{"measure": f"bytes {table}", "value": size} for table, size in sizes.items()]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", default="config/bulk.yaml")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--work-dir", default="data/benchmark/transform")
+    parser.add_argument("--out", default="reports/benchmarks/transform_benchmark.csv")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker)))
+        return
+
+    bulk_config = load_yml(args.bulk)
+    work_dir = Path(args.work_dir)
+    make_dir(work_dir)
+
+    rows = []
+    for mode in args.modes.split(","):
+        config_path = mode_config(bulk_config, work_dir, mode)
+        worker = subprocess.run(
+            [sys.executable, "-m", "src.benchmarks.transform_bench", "--worker", str(config_path)],
+            capture_output=True, text=True, check=True,
+        )
+        for result in json.loads(worker.stdout.strip().splitlines()[-1]):
+            rows.append({"mode": mode, **result})
+
+    report = pd.DataFrame(rows)
+    make_dir(Path(args.out).parent)
+    report.to_csv(args.out, index=False)
+    print(report.pivot_table(index="measure", columns="mode", values="value", sort=False).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ import logging
 import os
 import datetime as dt
 from ..logger import setup_logging
+from ..metrics import timed_stage,record_error
+from .profiler import profile_table,write_profile
+from sqlalchemy.exc import SQLAlchemyError
 
 # loading environment variables
 load_dotenv(dotenv_path=".env")
@@ -19,6 +22,10 @@ parser = argparse.ArgumentParser()
 parser.add_argument("--bulk", default = "config/bulk.yaml")
 args = parser.parse_args()
 
+# tables profiled by the layer report
+BRONZE_TABLES = ["ohclv_bronze", "company_meta_data_bronze", "macro_economic_data_bronze", "exchange_rates_bronze"]
+
+@timed_stage("validate", source="bronze_layer")
 def bronze_layer_validation():
 
     # start time
@@ -51,77 +58,45 @@ def bronze_layer_validation():
     # Get the engine and the session
     engine, session = get_engine_session(dbname, username, host, port, db_pass)
 
+    chunk_rows = int(bulk_config.get("profile_chunk_rows", 50000))
+    profiles = []
+
     # opening a connection to the database
     conn = engine.connect()
 
     logger.info("Connection established to Bronze DB for MySql source....")
-    logger.info("Running SQL report on the layer....")
-    # MySQL query string
-    query_string = """
-                   SELECT
-                       'ohclv_bronze' AS table_name,
-                       COUNT(*) AS total_records,
-                       (
-                           SUM(ticker IS NULL) +
-                           SUM(date   IS NULL) +
-                           SUM(open   IS NULL) +
-                           SUM(high   IS NULL) +
-                           SUM(low    IS NULL) +
-                           SUM(close  IS NULL) +
-                           SUM(volume IS NULL)
-                           ) AS total_null_values
-                   FROM bronze.ohclv_bronze
-
-                   UNION ALL
-
-                   SELECT
-                       'company_meta_data_bronze' AS table_name,
-                       COUNT(*) AS total_records,
-                       (
-                           SUM(company_name IS NULL) +
-                           SUM(ticker       IS NULL) +
-                           SUM(price        IS NULL) +
-                           SUM(market_cap   IS NULL) +
-                           SUM(sector       IS NULL) +
-                           SUM(industry     IS NULL)
-                           ) AS total_null_values
-                   FROM bronze.company_meta_data_bronze
-
-                   UNION ALL
-
-                   SELECT
-                       'macro_economic_data_bronze' AS table_name,
-                       COUNT(*) AS total_records,
-                       (
-                           SUM(country_id      IS NULL) +
-                           SUM(year            IS NULL) +
-                           SUM(country_name    IS NULL) +
-                           SUM(nominal_gdp     IS NULL) +
-                           SUM(real_gdp        IS NULL) +
-                           SUM(inflation       IS NULL) +
-                           SUM(unemployment    IS NULL) 
-                           ) AS total_null_values
-                   FROM bronze.macro_economic_data_bronze
-
-                   UNION ALL
-
-                   SELECT
-                       'exchange_rates_bronze' AS table_name,
-                       COUNT(*) AS total_records,
-                       (
-                           SUM(date       IS NULL) +
-                           SUM(inr_rate   IS NULL) +
-                           SUM(usd_amount IS NULL)
-                           ) AS total_null_values
-                   FROM bronze.exchange_rates_bronze;
-                   """
-    # building data frames for row count and the null values
-    bronze_layer_df = pd.read_sql(query_string, conn)
-    logger.info("Finished running SQL report on the layer....")
-    report_path = Path('reports/bronzeValidation')
-    bronze_layer_df.to_csv(report_path/ "bronze_layer_metrics.csv", index=False)
+    logger.info("Profiling the columns of the layer....")
+
+    # one streamed pass per table : null ratio, min / max, mean / stddev and approximate distinct count per column
+    for table in BRONZE_TABLES:
+        try:
+            profiles.append(profile_table(conn, f"bronze.{table}", chunk_rows))
+            logger.info(f"Profiled bronze.{table}....")
+        except SQLAlchemyError:
+            record_error("validate", source="bronze_layer")
+            logger.exception(f"Database error while profiling bronze.{table}")
+            conn.rollback()
 
     conn.close()
+    logger.info("Finished profiling the layer....")
+
+    if not profiles:
+        logger.error("No bronze table could be profiled, no report written....")
+        return
+
+    profile = pd.concat(profiles, ignore_index=True)
+    report_path = Path('reports/bronzeValidation')
+
+    # run history, one parquet file per run, read back with profiler.profile_history
+    history_file = write_profile(profile, report_path / "bronze_layer_metrics", runtime_start)
+    logger.info(f"Column profiles written to {history_file}....")
+
+    # latest row count and null total per table, the report this stage always produced
+    bronze_layer_df = (profile.groupby("table_name", sort=False)
+                       .agg(total_records=("row_count", "max"), total_null_values=("null_count", "sum"))
+                       .reset_index())
+    bronze_layer_df.to_csv(report_path / "bronze_layer_metrics.csv", index=False)
+
     # end time
     runtime_end = dt.datetime.now()
 
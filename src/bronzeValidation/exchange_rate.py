@@ -11,6 +11,8 @@ import json
 from great_expectations.exceptions import GreatExpectationsError
 from sqlalchemy.exc import SQLAlchemyError
 from ..logger import setup_logging
+from ..metrics import timed_stage,record_error
+from ..validation_store import save_validation,table_fingerprint,reusable_run
 
 # loading environment variables
 load_dotenv(dotenv_path=".env")
@@ -26,6 +28,7 @@ args = parser.parse_args()
 # great expectations context
 context = gx.get_context(mode = 'ephemeral')
 
+@timed_stage("validate", source="exchange_rate")
 def bronze_exchange_rate_validation():
 
     # start time
@@ -58,6 +61,14 @@ def bronze_exchange_rate_validation():
         # Get the engine and the session
         engine, session = get_engine_session(dbname, username, host, port, db_pass)
 
+        # table fingerprint block : an unchanged table and suite keep the result of the latest run when it passed
+        fingerprint = table_fingerprint(engine, "exchange_rates_bronze", "bronze", bulk_config, suite=[__file__])
+        previous_run = reusable_run(bulk_config, "exchange_rate", fingerprint)
+        if previous_run:
+            logger.info(f"bronze.exchange_rates_bronze unchanged since passing run {previous_run}, reusing its result and skipping the validation....")
+            logger.info("Finished Bronze exchange rate Validation....")
+            return
+
         # connection string builder block
         conn_string = list(str(engine.url).split(":"))
         conn_string[2] = f'{db_pass}@{host}'
@@ -113,18 +124,17 @@ def bronze_exchange_rate_validation():
         )
         result = validator.validate().to_json_dict()
 
-        # report file directory
-        report_path = Path('reports/bronzeValidation/exchange_rate')
-        report_path.mkdir(parents=True, exist_ok=True)
-        # write the report file
-        with open(report_path / f'exchange_rate_bronze_report.json_{dt.datetime.now().strftime("%Y-%m-%dT%H-%M-%S")}', 'w') as f:
-            json.dump(result, f, indent=4)
+        # one row per expectation in the validation store, the raw JSON report only when validation_raw_json is on
+        save_validation(result, "exchange_rate", bulk_config, Path('reports/bronzeValidation/exchange_rate'), 'exchange_rate_bronze_report', fingerprint=fingerprint)
 
     except SQLAlchemyError as db_error:
+        record_error("validate", source="exchange_rate")
         logger.exception("Database error while configuring or running GX on exchange_rate_bronze")
     except GreatExpectationsError as gx_err:
+        record_error("validate", source="exchange_rate")
         logger.exception("Great Expectations error while validating exchange_rate_bronze")
     except Exception as e:
+        record_error("validate", source="exchange_rate")
         logger.exception("Unexpected error in bronze_exchange_rate_validation")
 
     # end time
@@ -9,8 +9,13 @@ import datetime as dt
 import great_expectations as gx
 import json
 from great_expectations.exceptions import GreatExpectationsError
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from ..logger import setup_logging
+from ..metrics import timed_stage,record_error
+from ..validation_store import save_validation,table_fingerprint,reusable_run
+from . import sampling
+from .sampling import SAMPLE_RESULT_FORMAT,sample_query,subset_query,failure_bounds,failing_tickers
 
 # loading environment variables
 load_dotenv(dotenv_path=".env")
@@ -26,6 +31,150 @@ args = parser.parse_args()
 # great expectations context
 context = gx.get_context(mode = 'ephemeral')
 
+# columns of bronze.ohclv_bronze selected by the sample and escalation queries
+OHCLV_COLUMNS = ["id", "ticker", "date", "open", "high", "low", "close", "volume", "insert_datetime"]
+
+
+def add_ohclv_expectations(validator):
+    """The OHCLV suite, shared by the whole table, sample and escalation validators"""
+
+    # 1. company tick field validation
+    validator.expect_column_values_to_not_be_null('ticker')
+    validator.expect_column_value_lengths_to_be_between('ticker', min_value=1, max_value=7)
+    validator.expect_column_values_to_match_regex("ticker", r'^[A-Z0-9]{1,7}$')
+
+    # 2. date field validation
+    validator.expect_column_values_to_not_be_null('date')
+    validator.expect_column_values_to_be_between(
+        "date",
+        min_value=dt.datetime(2000, 1, 1),
+        max_value=dt.datetime.today()
+    )
+
+    # 3. open stock value validation
+    validator.expect_column_values_to_not_be_null("open")
+    validator.expect_column_values_to_be_between(
+        "open",
+        min_value=0.0,
+        max_value=None,
+        strict_min=True
+    )
+
+    # 4. low stock value validation
+    validator.expect_column_values_to_not_be_null("low")
+
+    validator.expect_column_values_to_be_between(
+        "open",
+        min_value=0.0,
+        max_value=None,
+        strict_min=True
+    )
+
+    # 5. high stock value validation
+    validator.expect_column_values_to_not_be_null("high")
+
+    # high ≥ low && high >=open
+    validator.expect_column_pair_values_A_to_be_greater_than_B(
+        column_A="high",
+        column_B="low",
+        or_equal=True
+    )
+    validator.expect_column_pair_values_A_to_be_greater_than_B(
+        column_A="high",
+        column_B="open",
+        or_equal=True
+    )
+
+
+    # 6. stock volume value validation
+    validator.expect_column_values_to_not_be_null("volume")
+
+    validator.expect_column_values_to_be_between(
+        "volume",
+        min_value=0.0,
+        max_value=None,
+        strict_min=False
+    )
+
+    # 7. stock close value validation
+    validator.expect_column_values_to_not_be_null("close")
+    # logic between low <= close <= high
+    validator.expect_column_pair_values_A_to_be_greater_than_B(
+        column_A="close",
+        column_B="low",
+        or_equal=True
+    )
+    validator.expect_column_pair_values_A_to_be_greater_than_B(
+        column_A="high",
+        column_B="close",
+        or_equal=True
+    )
+
+    validator.expect_column_values_to_be_between(
+        "volume",
+        min_value=0.0,
+        max_value=None,
+        strict_min=False
+    )
+
+
+def sampled_ohclv_validation(engine, data_source, bulk_config, mode, fingerprint, logger):
+    """
+    Validate a reproducible sample of bronze.ohclv_bronze (mode random or stratified by ticker),
+    report confidence bounds on every failure rate and validate the failing tickers in full
+    """
+    sample_rows = int(bulk_config.get("ohclv_sample_rows", 200000))
+    seed = int(bulk_config.get("ohclv_sample_seed", 0))
+    confidence = float(bulk_config.get("validation_confidence", 0.95))
+    report_dir = Path('reports/bronzeValidation/ohclv')
+
+    # table size block : the share to sample, or the rows per ticker
+    with engine.connect() as conn:
+        total, ticker_count = conn.execute(text("SELECT COUNT(*), COUNT(DISTINCT ticker) FROM bronze.ohclv_bronze")).one()
+
+    query = sample_query("bronze.ohclv_bronze", OHCLV_COLUMNS, ["ticker", "date"], sample_rows, total, seed,
+                         strata="ticker" if mode == "stratified" else None, strata_count=ticker_count)
+    sample_asset = data_source.add_query_asset(name = "ohclv_bronze_sample", query = query)
+    batch = sample_asset.add_batch_definition_whole_table(name = "ohclv_bronze_sample").get_batch()
+
+    logger.info(f"Validating a {mode} sample of about {min(sample_rows, total)} of {total} rows (seed {seed})....")
+
+    validator = context.get_validator(batch = batch, create_expectation_suite_with_name="bronze_ohclv_sample_suit")
+    add_ohclv_expectations(validator)
+    result = validator.validate(result_format=SAMPLE_RESULT_FORMAT).to_json_dict()
+    save_validation(result, "ohclv_sample", bulk_config, report_dir, 'ohclv_sample_report', fingerprint=fingerprint)
+
+    # confidence bounds block : what the sample says about the failure rates of the whole table
+    bounds = failure_bounds(result, confidence)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    bounds.to_csv(report_dir / f"ohclv_sample_bounds_{dt.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv", index=False)
+    worst = bounds["upper_bound"].max()
+    if pd.notna(worst):
+        logger.info(f"Sample failure rates are below {worst:.4%} for every expectation at {confidence:.0%} confidence....")
+
+    if result["success"]:
+        logger.info("Sample passed, no escalation needed....")
+        return
+
+    # escalation block : the tickers behind the unexpected rows, in full
+    tickers = failing_tickers(result)
+    if tickers:
+        logger.warning(f"Sample failed, validating {len(tickers)} affected tickers in full : {sorted(tickers)}....")
+        query = subset_query("bronze.ohclv_bronze", OHCLV_COLUMNS, "ticker", tickers)
+    else:
+        logger.warning("Sample failed without naming the affected tickers, validating the whole table....")
+        query = f"SELECT {', '.join(OHCLV_COLUMNS)} FROM bronze.ohclv_bronze"
+
+    escalation_asset = data_source.add_query_asset(name = "ohclv_bronze_escalation", query = query)
+    batch = escalation_asset.add_batch_definition_whole_table(name = "ohclv_bronze_escalation").get_batch()
+    validator = context.get_validator(batch = batch, create_expectation_suite_with_name="bronze_ohclv_escalation_suit")
+    add_ohclv_expectations(validator)
+    result = validator.validate().to_json_dict()
+    save_validation(result, "ohclv_escalation", bulk_config, report_dir, 'ohclv_escalation_report')
+    logger.info(f"Escalated validation {'passed' if result['success'] else 'failed'}....")
+
+
+@timed_stage("validate", source="ohclv")
 def bronze_ohclv_validation():
 
     # start time
@@ -58,6 +207,17 @@ def bronze_ohclv_validation():
         # Get the engine and the session
         engine, session = get_engine_session(dbname, username, host, port, db_pass)
 
+        # full validates the whole table, random / stratified a sample of it (sampled_ohclv_validation)
+        mode = bulk_config.get("ohclv_validation_mode", "full")
+
+        # table fingerprint block : an unchanged table and suite keep the result of the latest run when it passed
+        fingerprint = table_fingerprint(engine, "ohclv_bronze", "bronze", bulk_config, suite=[__file__, sampling.__file__])
+        previous_run = reusable_run(bulk_config, "ohclv" if mode == "full" else "ohclv_sample", fingerprint)
+        if previous_run:
+            logger.info(f"bronze.ohclv_bronze unchanged since passing run {previous_run}, reusing its result and skipping the validation....")
+            logger.info("Finished Bronze OHCLV Validation....")
+            return
+
         # connection string builder block
         conn_string = list(str(engine.url).split(":"))
         conn_string[2] = f'{db_pass}@{host}'
@@ -65,112 +225,35 @@ def bronze_ohclv_validation():
 
         # great expectations data connection block
         data_source = context.data_sources.add_sql(name = "ohclv_bronze", connection_string=conn_string) # connects to the MySql engine as data source
-        data_asset = data_source.add_table_asset(name = "ohclv_bronze", table_name = "bronze.ohclv_bronze") # adding the table as the data asset
-        batch_definition = data_asset.add_batch_definition_whole_table(name = "ohclv_bronze") # batch definition passing the whole table
-
-        # getting the whole table as the batch
-        batch = batch_definition.get_batch()
-
-        logger.info("Successfully connected to the Bronze DB table - ohclv_bronze....")
-
-        # creating a great expectation suit
-        validator = context.get_validator(batch = batch, create_expectation_suite_with_name="bronze_ohclv_suit")
-
-        # 1. company tick field validation
-        validator.expect_column_values_to_not_be_null('ticker')
-        validator.expect_column_value_lengths_to_be_between('ticker', min_value=1, max_value=7)
-        validator.expect_column_values_to_match_regex("ticker", r'^[A-Z0-9]{1,7}$')
-
-        # 2. date field validation
-        validator.expect_column_values_to_not_be_null('date')
-        validator.expect_column_values_to_be_between(
-            "date",
-            min_value=dt.datetime(2000, 1, 1),
-            max_value=dt.datetime.today()
-        )
-
-        # 3. open stock value validation
-        validator.expect_column_values_to_not_be_null("open")
-        validator.expect_column_values_to_be_between(
-            "open",
-            min_value=0.0,
-            max_value=None,
-            strict_min=True
-        )
-
-        # 4. low stock value validation
-        validator.expect_column_values_to_not_be_null("low")
-
-        validator.expect_column_values_to_be_between(
-            "open",
-            min_value=0.0,
-            max_value=None,
-            strict_min=True
-        )
-
-        # 5. high stock value validation
-        validator.expect_column_values_to_not_be_null("high")
-
-        # high ≥ low && high >=open
-        validator.expect_column_pair_values_A_to_be_greater_than_B(
-            column_A="high",
-            column_B="low",
-            or_equal=True
-        )
-        validator.expect_column_pair_values_A_to_be_greater_than_B(
-            column_A="high",
-            column_B="open",
-            or_equal=True
-        )
-
-
-        # 6. stock volume value validation
-        validator.expect_column_values_to_not_be_null("volume")
-
-        validator.expect_column_values_to_be_between(
-            "volume",
-            min_value=0.0,
-            max_value=None,
-            strict_min=False
-        )
-
-        # 7. stock close value validation
-        validator.expect_column_values_to_not_be_null("close")
-        # logic between low <= close <= high
-        validator.expect_column_pair_values_A_to_be_greater_than_B(
-            column_A="close",
-            column_B="low",
-            or_equal=True
-        )
-        validator.expect_column_pair_values_A_to_be_greater_than_B(
-            column_A="high",
-            column_B="close",
-            or_equal=True
-        )
-
-        validator.expect_column_values_to_be_between(
-            "volume",
-            min_value=0.0,
-            max_value=None,
-            strict_min=False
-        )
-
-        result = validator.validate().to_json_dict()
-
-
-
-        # report file directory
-        report_path = Path('reports/bronzeValidation/ohclv')
-        report_path.mkdir(parents=True, exist_ok=True)
-        # write the report file
-        with open(report_path / f'ohclv_bronze_report.json_{dt.datetime.now().strftime("%Y-%m-%dT%H-%M-%S")}', 'w') as f:
-            json.dump(result, f, indent=4)
+
+        if mode in ("random", "stratified"):
+            sampled_ohclv_validation(engine, data_source, bulk_config, mode, fingerprint, logger)
+        else:
+            data_asset = data_source.add_table_asset(name = "ohclv_bronze", table_name = "bronze.ohclv_bronze") # adding the table as the data asset
+            batch_definition = data_asset.add_batch_definition_whole_table(name = "ohclv_bronze") # batch definition passing the whole table
+
+            # getting the whole table as the batch
+            batch = batch_definition.get_batch()
+
+            logger.info("Successfully connected to the Bronze DB table - ohclv_bronze....")
+
+            # creating a great expectation suit
+            validator = context.get_validator(batch = batch, create_expectation_suite_with_name="bronze_ohclv_suit")
+            add_ohclv_expectations(validator)
+
+            result = validator.validate().to_json_dict()
+
+            # one row per expectation in the validation store, the raw JSON report only when validation_raw_json is on
+            save_validation(result, "ohclv", bulk_config, Path('reports/bronzeValidation/ohclv'), 'ohclv_bronze_report', fingerprint=fingerprint)
 
     except SQLAlchemyError as db_error:
+        record_error("validate", source="ohclv")
         logger.exception("Database error while configuring or running GX on exchange_rate_bronze")
     except GreatExpectationsError as gx_err:
+        record_error("validate", source="ohclv")
         logger.exception("Great Expectations error while validating exchange_rate_bronze")
     except Exception as e:
+        record_error("validate", source="ohclv")
         logger.exception("Unexpected error in bronze_exchange_rate_validation")
 
     # end time
@@ -0,0 +1,104 @@
+"""
+
+Bronze validation suites in a process pool
+
+    results = run_suites(["validate_ohclv", "validate_meta", "validate_layer"], bulk="config/bulk.yaml", workers=5)
+
+Every suite runs in a freshly spawned process that is retired after it (max_tasks_per_child=1).
+Nothing is shared with the parent, but spawn re-imports the parent's main module as __mp_main__ :
+run from historic_load_pipeline, every worker imports all the suite modules, and those parse --bulk
+and build their GX context at import, so each worker builds every suite's context, not only the one
+it runs. The suites write their reports to the usual reports/bronzeValidation paths. The worker
+appends its own metric events but leaves pipeline.prom alone; it hands its counters and timings back
+with the result, they are merged into this process's metrics and the parent rewrites the Prometheus
+file once all suites are in, so the error checks and the file see them as if the suite had run here.
+The wall time is the slowest suite instead of the sum.
+
+"""
+
+import importlib
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .. import metrics
+
+# pipeline stage name -> (suite module, entry function)
+SUITES = {
+    "validate_ohclv": (f"{__package__}.ohclv", "bronze_ohclv_validation"),
+    "validate_meta": (f"{__package__}.company_meta_data", "bronze_company_meta_data_validation"),
+    "validate_fx": (f"{__package__}.exchange_rate", "bronze_exchange_rate_validation"),
+    "validate_macro": (f"{__package__}.macro_data", "bronze_macro_data_validation"),
+    "validate_layer": (f"{__package__}.bronze_layer_validation", "bronze_layer_validation"),
+}
+
+
+def _errors(counters: dict) -> int:
+    return int(sum(value for (name, _), value in counters.items() if name == "pipeline_errors_total"))
+
+
+def _run_suite(name: str, bulk: str, run_id: str) -> dict:
+    """Worker side : import the suite with --bulk set, run it, return its outcome and metrics"""
+
+    sys.argv = [sys.argv[0], "--bulk", bulk]
+    metrics.set_run_id(run_id)
+    # several workers rewriting the textfile with partial state at once, the parent writes it after merge()
+    metrics.set_prom_textfile(False)
+
+    module, func = SUITES[name]
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        getattr(importlib.import_module(module), func)()
+    except Exception as e:
+        status = repr(e)
+
+    state = metrics.snapshot()
+    return {"stage": name, "status": status, "seconds": time.perf_counter() - start,
+            "errors": _errors(state["counters"]), "metrics": state}
+
+
+def run_suites(names: list, bulk: str, workers: int | None = None) -> list:
+    """
+    Run the named suites, concurrently when workers > 1, and return one result per suite in the order given :
+    {"stage", "status" ("ok" or the escaped exception), "seconds", "errors" (handled errors it recorded)}
+    """
+    unknown = [name for name in names if name not in SUITES]
+    if unknown:
+        raise ValueError(f"unknown validation suites {unknown}, expected some of {list(SUITES)}")
+
+    workers = min(len(names), workers or len(names))
+    results = {}
+
+    if workers <= 1:
+        for name in names:
+            errors_before = metrics.counter_value("pipeline_errors_total")
+            module, func = SUITES[name]
+            start = time.perf_counter()
+            status = "ok"
+            try:
+                getattr(importlib.import_module(module), func)()
+            except Exception as e:
+                status = repr(e)
+            results[name] = {"stage": name, "status": status, "seconds": time.perf_counter() - start,
+                             "errors": int(metrics.counter_value("pipeline_errors_total") - errors_before)}
+        return [results[name] for name in names]
+
+    # spawn rather than fork : no inherited GX context, engine pool or metrics in the workers
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             max_tasks_per_child=1) as pool:
+        futures = {pool.submit(_run_suite, name, bulk, metrics.get_run_id()): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+                metrics.merge(result.pop("metrics"))
+            except Exception as e:
+                # the worker died (or its result could not come back), nothing of it was merged
+                metrics.record_error("validate", source=name)
+                result = {"stage": name, "status": repr(e), "seconds": None, "errors": 1}
+            results[name] = result
+
+    metrics.flush()
+    return [results[name] for name in names]
@@ -0,0 +1,117 @@
+"""
+
+Sampled validation of large bronze tables, with confidence bounds and escalation
+
+    query = sample_query("bronze.ohclv_bronze", columns, ["ticker", "date"], rows=200000, total=total, seed=7)
+    bounds = failure_bounds(result, confidence=0.95)     # one row per expectation
+    tickers = failing_tickers(result)                    # None when the failure cannot be narrowed down
+
+Rows are picked by a hash of their natural key and a seed instead of RAND(), so the same seed over the
+same data gives the same sample on every run and the sample can be reproduced when a failure is looked
+into. The stratified mode takes the same number of rows from every ticker, a ticker with little history
+is then never left out of the sample. The sample's failure counts give Wilson score bounds on each
+expectation's failure rate over the whole table, e.g. 0 failures in 200000 rows puts it below 0.002%
+at 95%. A failed sample names the tickers behind the unexpected rows, only those are validated in full.
+
+"""
+
+import math
+from statistics import NormalDist
+
+import pandas as pd
+
+from ..validation_store import expectation_key
+
+# GX result format of a sample run : every unexpected row reports its ticker
+SAMPLE_RESULT_FORMAT = {"result_format": "COMPLETE", "unexpected_index_column_names": ["ticker"]}
+
+
+def _key_hash(key_columns: list, seed: int) -> str:
+    """MySQL expression hashing the natural key with the seed, stable across runs unlike RAND()"""
+    return f"CRC32(CONCAT_WS('|', {', '.join(key_columns)}, {int(seed)}))"
+
+
+def sample_query(table: str, columns: list, key_columns: list, rows: int, total: int, seed: int = 0,
+                 strata: str | None = None, strata_count: int | None = None) -> str:
+    """
+    SELECT of about rows rows of table. Random : a hash threshold keeps a rows / total share of the table.
+    Stratified (strata set) : the first rows / strata_count rows of every strata value in hash order
+    """
+    select = ", ".join(columns)
+    key_hash = _key_hash(key_columns, seed)
+
+    if strata:
+        per_stratum = max(1, math.ceil(rows / max(1, strata_count or 1)))
+        return f"""
+            SELECT {select} FROM (
+                SELECT {select}, ROW_NUMBER() OVER (PARTITION BY {strata} ORDER BY {key_hash}) AS sample_rank
+                FROM {table}
+            ) ranked
+            WHERE sample_rank <= {per_stratum}
+        """
+
+    # CRC32 is uniform over 2**32, keep the hashes under the sampled share of that range
+    threshold = min(2 ** 32, math.ceil(2 ** 32 * rows / max(1, total)))
+    return f"SELECT {select} FROM {table} WHERE {key_hash} < {threshold}"
+
+
+def subset_query(table: str, columns: list, column: str, values: list) -> str:
+    """SELECT of every row of table whose column is one of values, the escalation batch"""
+    quoted = ", ".join("'" + str(value).replace("'", "''") + "'" for value in sorted(values))
+    return f"SELECT {', '.join(columns)} FROM {table} WHERE {column} IN ({quoted})"
+
+
+def wilson_bounds(failures: int, n: int, confidence: float = 0.95) -> tuple:
+    """Wilson score interval of a failure rate seen as failures out of n sampled rows"""
+    if not n:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    rate = failures / n
+    centre = rate + z * z / (2 * n)
+    spread = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n))
+    denominator = 1 + z * z / n
+    return max(0.0, (centre - spread) / denominator), min(1.0, (centre + spread) / denominator)
+
+
+def failure_bounds(result: dict, confidence: float = 0.95) -> pd.DataFrame:
+    """Failure rate of every expectation of a sample run with its confidence bounds over the whole table"""
+
+    rows = []
+    for item in result.get("results") or []:
+        outcome = item.get("result") or {}
+        n = outcome.get("element_count")
+        failures = outcome.get("unexpected_count")
+        if n is None or failures is None:
+            # aggregate expectations have no per row failure rate
+            low = high = rate = None
+        else:
+            rate = failures / n if n else 0.0
+            low, high = wilson_bounds(int(failures), int(n), confidence)
+        rows.append({
+            "expectation": expectation_key(item.get("expectation_config") or {}),
+            "success": bool(item.get("success")),
+            "sampled_rows": n,
+            "unexpected_count": failures,
+            "failure_rate": rate,
+            "lower_bound": low,
+            "upper_bound": high,
+            "confidence": confidence,
+        })
+    return pd.DataFrame(rows)
+
+
+def failing_tickers(result: dict) -> set | None:
+    """Tickers of the unexpected rows of every failed expectation, None when one of them does not say"""
+
+    tickers = set()
+    for item in result.get("results") or []:
+        if item.get("success"):
+            continue
+        unexpected = (item.get("result") or {}).get("unexpected_index_list")
+        if (item.get("exception_info") or {}).get("raised_exception") or not unexpected:
+            return None
+        for row in unexpected:
+            if not isinstance(row, dict) or row.get("ticker") is None:
+                return None
+            tickers.add(row["ticker"])
+    return tickers
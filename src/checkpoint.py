@@ -0,0 +1,98 @@
+"""
+
+Run-state checkpoints for the historical pipeline
+
+    state = RunState("data/run_state/historic_load_pipeline.json", stage_names, resume=True)
+    if not state.skip("load_ohclv", fingerprint(...)):
+        ...
+        state.done("load_ohclv", fp, seconds)   # or state.failed("load_ohclv", reason)
+
+Every stage is recorded with a fingerprint of its inputs (config values, landing files).
+With resume, a stage is skipped while it is recorded done with the same fingerprint. The
+stages are a chain, so once one stage runs every later stage runs too, their inputs are
+the tables it just rewrote. from_stage skips everything before the named stage and runs
+from there, a stale checkpoint before it is only logged.
+
+"""
+
+import datetime as dt
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger("pipeline-historical")
+
+
+def fingerprint(*parts) -> str:
+    """sha256 over JSON-able parts, dict order does not matter"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def config_values(bulk_config: dict, keys: list) -> dict:
+    return {key: bulk_config.get(key) for key in keys}
+
+
+def landing_files(root, day: dt.date) -> list:
+    """Name, size and mtime of every CSV in the day's landing partitions under root, ticker folders included"""
+
+    partition = f"{day.year}/{day.strftime('%b')}/{day.strftime('%d')}"
+    return sorted(
+        (str(path.relative_to(root)), path.stat().st_size, path.stat().st_mtime_ns)
+        for path in Path(root).glob(f"**/{partition}/*.csv")
+    )
+
+
+class RunState:
+    """Stage checkpoints kept in one JSON file, rewritten after every stage"""
+
+    def __init__(self, path, stage_names: list, resume: bool = False, from_stage: str | None = None):
+        if from_stage is not None and from_stage not in stage_names:
+            raise ValueError(f"unknown stage {from_stage!r}, expected one of {stage_names}")
+
+        self.path = Path(path)
+        self.stage_names = stage_names
+        self.resume = resume
+        self.from_stage = from_stage
+        self.stages = {}
+        self._rerun = False
+
+        if (resume or from_stage) and self.path.exists():
+            with open(self.path) as f:
+                self.stages = json.load(f).get("stages", {})
+
+    def skip(self, name: str, stage_fingerprint: str) -> bool:
+        """True when the stage can be skipped in this run"""
+
+        recorded = self.stages.get(name, {})
+        current = recorded.get("status") == "done" and recorded.get("fingerprint") == stage_fingerprint
+
+        if self.from_stage is not None:
+            if self.stage_names.index(name) < self.stage_names.index(self.from_stage):
+                if not current:
+                    logger.warning(f"Skipping {name} for --from-stage {self.from_stage} although its checkpoint is missing or stale....")
+                return True
+            return False
+
+        if not self.resume or self._rerun or not current:
+            self._rerun = True
+            return False
+        return True
+
+    def done(self, name: str, stage_fingerprint: str, seconds: float, **details) -> None:
+        self._record(name, {"status": "done", "fingerprint": stage_fingerprint, "seconds": round(seconds, 3), **details})
+
+    def failed(self, name: str, reason: str) -> None:
+        self._record(name, {"status": "failed", "reason": reason})
+
+    def _record(self, name: str, entry: dict) -> None:
+        # stages of other processes may have finished since this state was loaded, keep their entries
+        if self.path.exists():
+            with open(self.path) as f:
+                self.stages = json.load(f).get("stages", {})
+        self.stages[name] = {**entry, "finished_at": dt.datetime.now().isoformat(timespec="seconds")}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"updated_at": self.stages[name]["finished_at"], "stages": self.stages}, f, indent=2)
+        tmp.replace(self.path)
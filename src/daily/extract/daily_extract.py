@@ -11,9 +11,11 @@ import os
 import pandas as pd
 from pathlib import Path
 import logging
-from ...utils import make_dir,load_yml
+from ...utils import make_dir,load_yml,fx_endpoint,fx_long,fx_pivot
 from ...logger import setup_logging
-import requests
+from ...metrics import timed_stage,record_rows,record_error,set_run_id,counter_value
+from ...landing import write_landing,landing_digest,daily_state
+from ...retry import retry_call,get_json,policy,RetryError
 import datetime as dt
 from dotenv import load_dotenv
 
@@ -26,6 +28,7 @@ import yfinance as yf
 #
 ##########################
 
+@timed_stage("extract", source="daily")
 def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = None ):
 
     #loading environment variables
@@ -42,6 +45,7 @@ def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
     logger = logging.getLogger('daily-execution')
 
     # logging Dagster run id and timestamp - correlation log
+    set_run_id(dagster_run_id)
     if dagster_run_id:
         logger.info(f"**dagster_run_id** : {dagster_run_id} -> starting daily extract orchestration")
         logger.info(f"**dagster_log_ts** : {dt.datetime.now().isoformat()} -> starting daily extract marking")
@@ -66,9 +70,14 @@ def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
         meta_data_root = Path(bulk_config['meta_data_daily_root']) # Company meta data landing path
         exchange_root = Path(bulk_config['exchange_rate_daily_root']) # daily exchange rate data landing path
         meta_data_keys = bulk_config['meta_keys']
-        exchange_api = bulk_config['frank_exchange_latest_endpoint']
+        fx_root = Path(bulk_config['fx_rate_daily_root']) # daily narrow fx rates landing path
+        exchange_api = fx_endpoint(bulk_config, 'frank_exchange_latest_endpoint') # all configured currencies in one call
         fmp_endpoint = bulk_config['fmp_end_point']
 
+        # landing files written / skipped as identical to the partition's latest file
+        written, unchanged = [], []
+        errors_before = counter_value("pipeline_errors_total")
+
         # <--- ohclv daily load block --->
         try:
             ohclv_runtime_start = dt.datetime.now()
@@ -88,18 +97,14 @@ def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
                 # creating the landing path folder
                 make_dir(ticker_landing)
 
-                # retry block for handling failed attempts
-                for i in range(5):
-
-                    # Yfinance API call
-                    org_df = yf.download(ticker, period ='1d', rounding=True, keepna=True)
-
-                    # retry trigger
-                    if org_df.empty:
-                        logger.info(f"Implementing retry for ticker : {ticker}")
-                        continue
-                    else:
-                        break
+                # Yfinance API call, an empty frame is retried with backoff and never written
+                try:
+                    org_df = retry_call(bulk_config, "yfinance", yf.download, ticker, period='1d', rounding=True, keepna=True,
+                                        timeout=policy(bulk_config, "yfinance")["timeout"], empty=lambda df: df.empty)
+                except RetryError as e:
+                    record_error("extract", source="ohclv_daily", ticker=ticker)
+                    logger.error(f"No ohclv data for {ticker}, skipping the ticker : {e}")
+                    continue
 
                 # flattening the multi_index columns names
                 org_df.columns = [col[0].upper() for col in org_df.columns]
@@ -111,14 +116,20 @@ def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
 
                 # loading the data into the landing path
                 ticker_file_path = ticker_landing / f"{ticker}_stock_{ohclv_file_ts}.csv"
-                org_df.to_csv(ticker_file_path, index=False)
-                logger.info(f"Successfully extracted the ohclv data for : {ticker}")
+                if write_landing(org_df, ticker_file_path):
+                    written.append(f"ohclv/{ticker}")
+                    record_rows(len(org_df), "extract", source="ohclv_daily", ticker=ticker)
+                    logger.info(f"Successfully extracted the ohclv data for : {ticker}")
+                else:
+                    unchanged.append(f"ohclv/{ticker}")
+                    logger.info(f"ohclv data for {ticker} unchanged since the last extract, no file written....")
 
             logger.info("Ran the extract pipeline for all the tickers")
 
             ohclv_runtime_end = dt.datetime.now()
             logger.info(f"Extract for ohclv took : {ohclv_runtime_end - ohclv_runtime_start}")
         except Exception as e:
+            record_error("extract", source="ohclv_daily")
             logger.error(f"OHCLV execution failed, ohclv data load is not completed. \n{e}")
 
         # <--- company metadata extract for CDC check --->
@@ -146,7 +157,18 @@ def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
                 url = fmp_endpoint + tick + '&apikey=' + fmp_key
 
                 # single dict list
-                response = requests.get(url).json()
+                try:
+                    response = get_json(bulk_config, "fmp", url)
+                except RetryError as e:
+                    record_error("extract", source="company_meta_daily", ticker=tick)
+                    logger.error(f"No company profile for {tick}, skipping the ticker : {e}")
+                    continue
+
+                # FMP answers an unknown ticker with an empty list
+                if not response:
+                    record_error("extract", source="company_meta_daily", ticker=tick)
+                    logger.error(f"FMP returned no profile for {tick}, skipping the ticker....")
+                    continue
 
                 logger.info(f"Extracting the data for : {response[0]['companyName']}")
 
@@ -157,13 +179,21 @@ def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
 
             meta_data_df = pd.DataFrame(company_meta_data_list)
 
-            meta_data_df.to_csv(meta_landing_path / f'company_metadata_{meta_data_runtime_ts}.csv', index=False)
+            if meta_data_df.empty:
+                logger.error("No company profile was extracted, nothing written to the landing path....")
+            elif write_landing(meta_data_df, meta_landing_path / f'company_metadata_{meta_data_runtime_ts}.csv'):
+                written.append("company_meta")
+                record_rows(len(meta_data_df), "extract", source="company_meta_daily")
+            else:
+                unchanged.append("company_meta")
+                logger.info("Company meta data unchanged since the last extract, no file written....")
 
             logger.info("Ran the company meta data end point for all the tickers....")
             meta_runtime_end = dt.datetime.now()
             logger.info(f"Meta data extract took {meta_runtime_end - meta_runtime_start}")
 
         except Exception as e:
+            record_error("extract", source="company_meta_daily")
             logger.error(f"Company Meta Data execution failed, meta data load is not completed. \n{e}")
 
         # <--- Block for running the exchange rate api endpoint to load the data in landing path
@@ -183,16 +213,30 @@ def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
             make_dir(exchange_rate_path)
 
             # data point extraction for exchange rate
-            frank_response = requests.get(exchange_api).json()
-            exchange_rate_df = pd.json_normalize(frank_response)
-            exchange_rate_df.reset_index(inplace=True)
+            frank_response = get_json(bulk_config, "frankfurter", exchange_api)
+            fx_df = fx_long({frank_response['date']: frank_response['rates']}, frank_response['base'])
+
+            # narrow rows for every currency
+            fx_path = fx_root / exchange_rate_year / exchange_rate_month / exchange_rate_day
+            make_dir(fx_path)
+            if write_landing(fx_df, fx_path / f'fx_rates_{exchange_rate_runtime_start}.csv'):
+                written.append("fx_rates")
+                record_rows(len(fx_df), "extract", source="fx_rates_daily")
+            else:
+                unchanged.append("fx_rates")
+
+            # legacy USD -> INR data point from the same response
+            exchange_rate_df = fx_pivot(fx_df, ['INR']).rename(columns={'INR': 'inr_rate'}).rename_axis('date').reset_index()
             exchange_rate_df['USD_rate'] = 1
-            exchange_rate_df.rename(columns={'rates.INR': 'inr_rate'},inplace=True)
-            exchange_rate_df.drop(columns=['index','amount','base'], inplace=True)
 
             # storing the df
             exchange_file_path = exchange_rate_path / f'exchange_rate{exchange_rate_runtime_start}.csv'
-            exchange_rate_df.to_csv(exchange_file_path, index=False)
+            if write_landing(exchange_rate_df, exchange_file_path):
+                written.append("exchange_rate")
+                record_rows(len(exchange_rate_df), "extract", source="exchange_rate_daily")
+            else:
+                unchanged.append("exchange_rate")
+                logger.info("Exchange rate data point unchanged since the last extract, no file written....")
 
             logger.info(f"Exchange rate data point extracted for {str(exchange_rate_start.date())}...")
 
@@ -200,12 +244,21 @@ def daily_extr( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
             logger.info(f"Exchange rate data extracted in : {exchange_rate_runtime_end - exchange_rate_start}")
 
         except Exception as e:
+            record_error("extract", source="exchange_rate_daily")
             logger.error(f"Exchange rate data load is not completed without error. \n{e}")
 
         logger.info("Ran the extraction execution for ohclv, Exchange rate and meta data....")
         runtime_end = dt.datetime.now()
         logger.info(f"Daily extract took : {runtime_end - runtime_start}")
 
+        # <--- run marker : a run that landed nothing new is a no-op, load / validate / transform skip on it --->
+        if counter_value("pipeline_errors_total") == errors_before:
+            landing_fp = landing_digest([ohclv_root, meta_data_root, exchange_root, fx_root], runtime_start.date())
+            daily_state(bulk_config).done("extract", landing_fp, (runtime_end - runtime_start).total_seconds(),
+                                          noop=not written, written=written, unchanged=unchanged)
+            if not written:
+                logger.info("Every landing file matched the previous extract, the daily run is a no-op....")
+
     except Exception as e:
         logger.error(f"There is an error while processing the daily load : {e}")
 
@@ -2,8 +2,11 @@ import os
 from dotenv import load_dotenv
 import argparse
 import pandas as pd
-from ...utils import mysql_connect_create_db,get_engine_session, load_yml
+from ...utils import mysql_connect_create_db,get_engine_session, load_yml,read_landing,upsert_clause
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error,set_run_id,counter_value
+from ... import sql_profile
+from ...landing import landing_digest,daily_state
 import logging
 import datetime as dt
 from sqlalchemy import text
@@ -11,6 +14,7 @@ from pathlib import Path
 
 # main execution block
 
+@timed_stage("load", source="daily")
 def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = None ):
 
     # loading the database password
@@ -26,6 +30,7 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
     bulk_config = load_yml(bulk)
     ohclv_root = Path(bulk_config['ohclv_daily_root'])
     exchange_root = Path(bulk_config['exchange_rate_daily_root'])
+    fx_root = Path(bulk_config['fx_rate_daily_root'])
     db_name = bulk_config['dbname'][0]
     user_name = bulk_config['user_name']
     host = bulk_config['host']
@@ -36,6 +41,8 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
     logger = logging.getLogger('daily-execution')
 
     # logging Dagster run id and timestamp - correlation log
+    set_run_id(dagster_run_id)
+    sql_profile.configure(bulk_config)
     if dagster_run_id:
         logger.info(f"**dagster_run_id** : {dagster_run_id} -> starting daily load orchestration")
         logger.info(f"**dagster_log_ts** : {dt.datetime.now().isoformat()} -> starting daily load marking")
@@ -51,6 +58,14 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
         runtime_month = runtime_start.strftime("%b")
         runtime_date_day = runtime_start.strftime("%d")
 
+        # <--- no-op short-circuit : the day's latest landing files are the ones already loaded --->
+        state = daily_state(bulk_config)
+        landing_fp = landing_digest([ohclv_root, exchange_root, fx_root], runtime_start.date())
+        if state.skip("load", landing_fp):
+            logger.info("Landing files unchanged since the last successful daily load, skipping the load....")
+            return
+        errors_before = counter_value("pipeline_errors_total")
+
         # start a connection to - MySQL server
         try:
             mysql_connect_create_db(db_name, user_name, host, port, db_pass, create_flag=False)
@@ -178,8 +193,39 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
 
                     ))
 
+                    # narrow multi-currency rates, the unique key keeps re-runs idempotent so no lineage copy is needed
+                    conn.execute(text(
+
+                        f"""
+                        
+                        CREATE TABLE IF NOT EXISTS {db_name}.fx_rates_bronze (
+                        
+                            id INT PRIMARY KEY AUTO_INCREMENT,
+                            date DATE NOT NULL,
+                            base VARCHAR(3) NOT NULL,
+                            quote VARCHAR(3) NOT NULL,
+                            rate DOUBLE NOT NULL,
+                            insert_datetime DATETIME NOT NULL,
+                            UNIQUE KEY uq_fx_date_base_quote (date, base, quote)
+                            
+                        );
+    
+                        """
+
+                    ))
+
+                    # tables created before rates were double precision
+                    rate_type = conn.execute(text(f"""
+                        SELECT DATA_TYPE FROM information_schema.COLUMNS
+                        WHERE table_schema = :schema AND table_name = 'fx_rates_bronze' AND column_name = 'rate'
+                    """), {"schema": db_name}).scalar()
+                    if rate_type == "float":
+                        conn.execute(text(f"ALTER TABLE {db_name}.fx_rates_bronze MODIFY rate DOUBLE NOT NULL"))
+                        logger.info("Widened fx_rates_bronze.rate to DOUBLE....")
+
                     logger.info("successfully completed the DDL execution for daily load....")
             except Exception as e:
+                record_error("load", source="daily_ddl")
                 logger.exception(f"Error while processing the DDL executions : {e}")
 
             # <--- Data loading for ohclv block --->
@@ -202,7 +248,8 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
                     else:
                         logger.exception(f"There are no files in {leaf_folder}")
 
-                    ohclv_df = pd.read_csv(latest_file)
+                    # typed read, the date column already holds dates
+                    ohclv_df = read_landing(latest_file, "ohclv_daily", bulk_config)
 
                     batch_ts = runtime_start
 
@@ -217,8 +264,6 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
                         "COMPANY_TICKER": "ticker",
                     }).copy()
 
-                    #parsing the datetime as date
-                    load_df['date'] = pd.to_datetime(load_df['date']).dt.date
                     # adding the insert timestamp
                     load_df['insert_datetime'] = batch_ts
 
@@ -262,9 +307,11 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
                         conn.execute(sql_statement,rows)
 
 
+                    record_rows(len(load_df), "load", source="ohclv_daily", ticker=ticker)
                     logger.info(f"Loaded the ohclv for the ticker : {ticker}")
                 logger.info("Completed the each ticker load into the bronze layer")
             except Exception as e:
+                record_error("load", source="ohclv_daily")
                 logger.exception(f"Error while processing ohclv load into bronze tables : {e}")
 
             # <--- Data load for exchange rate --->
@@ -278,12 +325,11 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
                 exchange_run_time_file = max(exchange_files, key=os.path.getmtime)
 
                 # loading the df
-                exchange_df = pd.read_csv(exchange_run_time_file)
+                exchange_df = read_landing(exchange_run_time_file, "exchange_rate_daily", bulk_config)
 
                 batch_ts = runtime_start
 
                 load_df = exchange_df.rename(columns={"USD_rate" : "usd_amount"}).copy()
-                load_df['date'] = pd.to_datetime(load_df['date']).dt.date
                 load_df['insert_datetime'] = batch_ts
 
                 load_df = load_df[[
@@ -320,18 +366,49 @@ def daily_load( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = Non
                 # executing the statement
                 with engine.begin() as conn:
                     conn.execute(sql_statement, rows)
+                record_rows(len(load_df), "load", source="exchange_rate_daily")
                 logging.info("loaded the values into the lineage table and the daily loader table for the exchange rate")
 
             except Exception as e:
+                record_error("load", source="exchange_rate_daily")
                 logger.exception(f"Error while processing exchange rate data into bronze tables : {e}")
 
+            # <--- Data load for the narrow fx rates --->
+            try:
+                fx_folder = fx_root / runtime_year / runtime_month / runtime_date_day
+                fx_files = list(fx_folder.glob("*.csv"))
+                if not fx_files:
+                    logger.info(f"No narrow fx rates landed in {fx_folder}....")
+                else:
+                    fx_df = read_landing(max(fx_files, key=os.path.getmtime), "fx_rates", bulk_config)
+                    rows = fx_df.assign(insert_datetime=runtime_start).to_dict('records')
+
+                    with engine.begin() as conn:
+                        conn.execute(text(f"""
+                            INSERT INTO {db_name}.fx_rates_bronze (date, base, quote, rate, insert_datetime)
+                            VALUES (:date, :base, :quote, :rate, :insert_datetime)
+                            {upsert_clause("mysql", ["date", "base", "quote"], ["rate", "insert_datetime"])}
+                        """), rows)
+                    record_rows(len(rows), "load", source="fx_rates_daily")
+                    logger.info(f"Upserted {len(rows)} fx rates into the bronze layer....")
+
+            except Exception as e:
+                record_error("load", source="fx_rates_daily")
+                logger.exception(f"Error while processing fx rate data into bronze tables : {e}")
+
         except Exception as e:
+            record_error("load", source="daily")
             logger.exception(f"Error while processing execution in daily load landing to DB : {e}")
 
         logger.info("Completed the run for daily load into the bronze layer")
         runtime_end = dt.datetime.now()
         logger.info(f"Processed the daily load execution in : {runtime_end - runtime_start}")
 
+        if counter_value("pipeline_errors_total") > errors_before:
+            state.failed("load", "errors recorded during the daily load")
+        else:
+            state.done("load", landing_fp, (runtime_end - runtime_start).total_seconds())
+
     except Exception as e:
         logger.exception(f"Error while executing the daily load process : {e}")
 
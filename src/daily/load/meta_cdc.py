@@ -0,0 +1,150 @@
+import os
+from dotenv import load_dotenv
+import argparse
+import pandas as pd
+from ...utils import mysql_connect_create_db,get_engine_session,load_yml,read_landing,hash_record,get_analytics_engine,upsert_clause,scd2_merge,META_CDC_FIELDS
+from ...models.bronze.company_meta_data import CompanyMetaDataBronze
+from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error,set_run_id
+from ... import sql_profile
+import logging
+import datetime as dt
+from sqlalchemy import text, inspect
+from pathlib import Path
+
+# main execution block
+
+@timed_stage("load", source="company_meta_cdc")
+def meta_cdc( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = None ):
+
+    # loading the database password
+    load_dotenv(dotenv_path='.env')
+    db_pass = os.getenv("DB_PASS")
+
+    # loading the arguments
+    bulk_config = load_yml(bulk)
+    meta_root = Path(bulk_config['meta_data_daily_root'])
+    db_name = bulk_config['dbname'][0]
+    db_name_silver = bulk_config['dbname'][1]
+    user_name = bulk_config['user_name']
+    host = bulk_config['host']
+    port = bulk_config['port']
+    cdc_fields = bulk_config.get('meta_cdc_fields', META_CDC_FIELDS)
+
+    # logging configuration
+    setup_logging()
+    logger = logging.getLogger('daily-execution')
+
+    # logging Dagster run id and timestamp - correlation log
+    set_run_id(dagster_run_id)
+    sql_profile.configure(bulk_config)
+    if dagster_run_id:
+        logger.info(f"**dagster_run_id** : {dagster_run_id} -> starting company metadata CDC orchestration")
+        logger.info(f"**dagster_log_ts** : {dt.datetime.now().isoformat()} -> starting company metadata CDC marking")
+
+    try:
+
+        logger.info("Starting the change data capture for company metadata....")
+        runtime_start = dt.datetime.now()
+
+        # <--- hashing the landed profiles --->
+
+        meta_folder = meta_root / str(runtime_start.year) / runtime_start.strftime("%b") / runtime_start.strftime("%d")
+        files = list(meta_folder.glob("*.csv"))
+        if not files:
+            logger.info(f"No company metadata landed in {meta_folder}, nothing to capture....")
+            return
+
+        latest_file = max(files, key=os.path.getmtime)
+        records = read_landing(latest_file, "company_meta", bulk_config).rename(columns={
+            "companyName": "company_name",
+            "symbol": "ticker",
+            "marketCap": "market_cap",
+        })[["company_name", "ticker", "price", "market_cap", "sector", "industry"]].to_dict('records')
+        hashes = {r["ticker"]: hash_record(r, cdc_fields) for r in records}
+
+        # start a connection to - MySQL server
+        try:
+            mysql_connect_create_db(db_name, user_name, host, port, db_pass, create_flag=False)
+            logger.info("successfully connected to the MySql Server....")
+        except Exception as e:
+            logger.exception("Connection to the MySql Server failed...")
+            raise RuntimeError("Cannot connect to the MySql Server...")
+
+        engine, session = get_engine_session(db_name, user_name, host, port, db_pass)
+
+        # <--- comparing with the last known hash per ticker, a read only --->
+
+        known = {}
+        if inspect(engine).has_table("company_meta_cdc_state", schema=db_name):
+            with engine.connect() as conn:
+                known = dict(conn.execute(text(f"SELECT ticker, row_hash FROM {db_name}.company_meta_cdc_state")).fetchall())
+
+        changed = [r for r in records if known.get(r["ticker"]) != hashes[r["ticker"]]]
+        logger.info(f"{len(changed)} of {len(records)} companies changed since the last capture....")
+        record_rows(len(changed), "load", source="company_meta_cdc")
+
+        if not changed:
+            # unchanged tickers cost no writes at all
+            runtime_end = dt.datetime.now()
+            logger.info(f"Company metadata CDC finished without writes in : {runtime_end - runtime_start}")
+            return
+
+        load_df = pd.DataFrame(changed)
+
+        # <--- bronze : changed profiles are appended, the table keeps every captured version --->
+        try:
+            CompanyMetaDataBronze.__table__.create(engine, checkfirst=True)
+            load_df.assign(insert_datetime=runtime_start).to_sql(
+                name="company_meta_data_bronze",
+                con=engine,
+                schema=db_name,
+                if_exists="append",
+                index=False,
+                method="multi",
+                chunksize=500
+            )
+            logger.info("Appended the changed company profiles to the bronze layer....")
+        except Exception as e:
+            record_error("load", source="company_meta_cdc")
+            logger.exception(f"Error while writing the changed company profiles to bronze : {e}")
+            return
+
+        # <--- silver : the changed tickers get a new version in the type 2 dimension --->
+        try:
+            analytics_engine = get_analytics_engine(bulk_config, db_name_silver, db_pass)
+            with analytics_engine.begin() as conn:
+                versions = scd2_merge(conn, f"{db_name_silver}.company_meta_data_silver", "ticker", changed,
+                                      cdc_fields, runtime_start.date())
+            logger.info(f"Opened {versions} new company versions in the silver layer....")
+        except Exception as e:
+            record_error("load", source="company_meta_cdc")
+            logger.exception(f"Error while writing the changed company profiles to silver : {e}")
+            return
+
+        # <--- state : hashes move last so a failed run is captured again next time --->
+        with engine.begin() as conn:
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {db_name}.company_meta_cdc_state (
+                    ticker VARCHAR(10) PRIMARY KEY,
+                    row_hash CHAR(64) NOT NULL,
+                    updated_at DATETIME NOT NULL
+                )
+            """))
+            conn.execute(text(f"""
+                INSERT INTO {db_name}.company_meta_cdc_state (ticker, row_hash, updated_at)
+                VALUES (:ticker, :row_hash, :updated_at)
+                {upsert_clause("mysql", ["ticker"], ["row_hash", "updated_at"])}
+            """), [{"ticker": t, "row_hash": hashes[t], "updated_at": runtime_start} for t in load_df["ticker"]])
+
+        runtime_end = dt.datetime.now()
+        logger.info(f"Company metadata CDC wrote {len(changed)} changed companies in : {runtime_end - runtime_start}")
+
+    except Exception as e:
+        logger.exception(f"Error while running the company metadata CDC : {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", default="config/bulk.yaml")
+    args = parser.parse_args()
+    meta_cdc(bulk=args.bulk)
@@ -2,14 +2,18 @@ import os
 from dotenv import load_dotenv
 import argparse
 import pandas as pd
-from ...utils import mysql_connect_create_db,get_engine_session, load_yml
+from ...utils import mysql_connect_create_db,get_engine_session, load_yml,get_analytics_engine,analytics_backend,upsert_clause
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_error,set_run_id,counter_value
+from ... import sql_profile
+from ...landing import daily_state,upstream_fingerprint
 import logging
 import datetime as dt
 from sqlalchemy import text
 
 # main execution block
 
+@timed_stage("transform", source="daily")
 def daily_transform( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = None ):
 
     # loading the database password
@@ -34,6 +38,8 @@ def daily_transform( bulk: str = "config/bulk.yaml", dagster_run_id: str | None
     logger = logging.getLogger('daily-execution')
 
     # logging Dagster run id and timestamp - correlation log
+    set_run_id(dagster_run_id)
+    sql_profile.configure(bulk_config)
     if dagster_run_id:
         logger.info(f"**dagster_run_id** : {dagster_run_id} -> starting daily transform orchestration")
         logger.info(f"**dagster_log_ts** : {dt.datetime.now().isoformat()} -> starting daily transform marking")
@@ -45,6 +51,14 @@ def daily_transform( bulk: str = "config/bulk.yaml", dagster_run_id: str | None
         # runtime start
         runtime_start = dt.datetime.now()
 
+        # <--- no-op short-circuit : the day's bronze rows were already merged into silver --->
+        state = daily_state(bulk_config)
+        load_fp = upstream_fingerprint(state)
+        if load_fp and state.skip("transform", load_fp):
+            logger.info("Daily load unchanged since the last transform, skipping the silver merge....")
+            return
+        errors_before = counter_value("pipeline_errors_total")
+
         # start a connection to - MySQL server
         try:
             mysql_connect_create_db(db_name, user_name, host, port, db_pass, create_flag=False)
@@ -101,12 +115,14 @@ def daily_transform( bulk: str = "config/bulk.yaml", dagster_run_id: str | None
 
                     logger.info("Created the daily processed ohclv table with clean data")
 
-                    # block to insert the records into the silver layer
+                # block to insert the records into the silver layer, on duckdb the bronze tables are read through the attached MySQL db
+                backend = analytics_backend(bulk_config)
+                analytics_engine = get_analytics_engine(bulk_config, db_name_silver, db_pass)
+
+                with analytics_engine.begin() as conn:
 
                     conn.execute(text(f"""
                                     
-                                                                            
-                                        
                                     INSERT INTO {db_name_silver}.ohclv_silver
                                           (ticker, date, open, high, low, close, volume, insert_datetime)
                                     SELECT
@@ -119,20 +135,13 @@ def daily_transform( bulk: str = "config/bulk.yaml", dagster_run_id: str | None
                                           p.volume,
                                           p.insert_datetime
                                     FROM {db_name}.ohclv_daily_processed p
-                                        ON DUPLICATE KEY UPDATE
-                                          open  = VALUES(open),
-                                          high  = VALUES(high),
-                                          low   = VALUES(low),
-                                          close = VALUES(close),
-                                          volume = VALUES(volume),
-                                          insert_datetime = VALUES(insert_datetime);
-                                          
-                                          
+                                        {upsert_clause(backend, ["ticker", "date"], ["open", "high", "low", "close", "volume", "insert_datetime"])};
                                     
                                     """))
 
-                    logger.info("Ran the process to insert and append the record to ohclv silver table")
+                    logger.info(f"Ran the process to insert and append the record to ohclv silver table on {backend}")
 
+                    # latest row per date, duckdb refuses to update the same key twice in one statement
                     conn.execute(text(f"""
 
                                         INSERT INTO {db_name_silver}.exchange_rates_silver
@@ -141,26 +150,56 @@ def daily_transform( bulk: str = "config/bulk.yaml", dagster_run_id: str | None
                                             p.date,
                                             p.inr_rate,
                                             p.usd_amount,
-                                            CAST(p.insert_datetime AS DATE)
-                                        FROM {db_name}.exchange_daily_bronze p
-                                            ON DUPLICATE KEY UPDATE
-                                            inr_rate = VALUES(inr_rate),
-                                            usd_amount = VALUES(usd_amount),
-                                            insert_datetime = VALUES(insert_datetime);                                            
+                                            p.insert_datetime
+                                        FROM (SELECT
+                                                date,
+                                                inr_rate,
+                                                usd_amount,
+                                                CAST(insert_datetime AS DATE) AS insert_datetime,
+                                                ROW_NUMBER() OVER(PARTITION BY date ORDER BY insert_datetime DESC) AS rn
+                                            FROM {db_name}.exchange_daily_bronze) p
+                                        WHERE p.rn = 1
+                                            {upsert_clause(backend, ["date"], ["inr_rate", "usd_amount", "insert_datetime"])};
                                         
                                     """))
 
                     logger.info("Ran the process to insert and append the record to exchange silver table")
 
+                    # narrow fx rates upserted by today's daily load
+                    conn.execute(text(f"""
+
+                                        INSERT INTO {db_name_silver}.fx_rates_silver
+                                            (date, base, quote, rate, insert_datetime)
+                                        SELECT
+                                            date,
+                                            base,
+                                            quote,
+                                            rate,
+                                            CAST(insert_datetime AS DATE)
+                                        FROM {db_name}.fx_rates_bronze
+                                        WHERE insert_datetime >= :since
+                                            {upsert_clause(backend, ["date", "base", "quote"], ["rate", "insert_datetime"])};
+
+                                    """), {"since": runtime_start.replace(hour=0, minute=0, second=0, microsecond=0)})
+
+                    logger.info("Ran the process to upsert the day's records to the fx rates silver table")
+
 
 
             except Exception as e:
+                record_error("transform", source="daily")
                 logger.exception(f"Error while performing ranking and trimming : {e}")
 
 
         except Exception as e:
+            record_error("transform", source="daily")
             logger.exception(f"Error while performing operations on the database: {e}")
 
+        if counter_value("pipeline_errors_total") > errors_before:
+            state.failed("transform", "errors recorded during the daily transform")
+        elif load_fp:
+            state.done("transform", load_fp, (dt.datetime.now() - runtime_start).total_seconds())
+
     except Exception as e:
         logger.exception(f"Error while processing the transformation layer : {e}")
 
@@ -0,0 +1,85 @@
+import os
+from dotenv import load_dotenv
+import argparse
+from ...utils import load_yml,get_analytics_engine,analytics_backend
+from ...fx_calendar import update_fx_calendar,refresh_stock_facts_inr
+from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error,set_run_id
+from ... import sql_profile
+import logging
+import datetime as dt
+from sqlalchemy import inspect,text
+
+# main execution block
+
+@timed_stage("transform", source="fx_asof")
+def fx_asof( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = None ):
+
+    # loading the database password
+    load_dotenv(dotenv_path='.env')
+    db_pass = os.getenv("DB_PASS")
+
+    # loading the arguments
+    bulk_config = load_yml(bulk)
+    db_name_bronze = bulk_config['dbname'][0]
+    db_name_silver = bulk_config['dbname'][1]
+    db_name_gold = bulk_config['dbname'][2]
+
+    # logging configuration
+    setup_logging()
+    logger = logging.getLogger('daily-execution')
+
+    # logging Dagster run id and timestamp - correlation log
+    set_run_id(dagster_run_id)
+    sql_profile.configure(bulk_config)
+    if dagster_run_id:
+        logger.info(f"**dagster_run_id** : {dagster_run_id} -> starting fx as-of orchestration")
+        logger.info(f"**dagster_log_ts** : {dt.datetime.now().isoformat()} -> starting fx as-of marking")
+
+    try:
+
+        logger.info("Starting the as-of fx calendar maintenance....")
+        runtime_start = dt.datetime.now()
+
+        engine = get_analytics_engine(bulk_config, db_name_silver, db_pass)
+
+        # <--- silver : extend / repair the calendar from the first stale day --->
+        try:
+            with engine.begin() as conn:
+                since, rows = update_fx_calendar(conn, db_name_silver)
+            record_rows(rows, "transform", source="fx_rates_calendar")
+            logger.info(f"fx_rates_calendar rewrote {rows} rows from {since} on {analytics_backend(bulk_config)}....")
+        except Exception as e:
+            record_error("transform", source="fx_rates_calendar")
+            logger.exception(f"Error while updating the fx calendar : {e}")
+            return
+
+        # <--- gold : the latest loaded bars always (a Friday bar loaded on Saturday included), older trade dates only when their rate moved --->
+        try:
+            if not inspect(engine).has_table("stock_facts_inr", schema=db_name_gold):
+                logger.info("gold.stock_facts_inr not built yet, gold_exec materializes it....")
+            else:
+                with engine.connect() as conn:
+                    # earliest trade date of the daily batch, ohclv_daily_bronze is recreated by every daily load
+                    # (silver's insert_datetime is a DATE, a historical silver load stamps all of history with one)
+                    batch_from = conn.execute(text(f"SELECT MIN(date) FROM {db_name_bronze}.ohclv_daily_bronze")).scalar()
+                candidates = [day for day in (since, batch_from) if day is not None]
+                refresh_from = min(candidates) if candidates else runtime_start.date()
+                with engine.begin() as conn:
+                    refresh_stock_facts_inr(conn, db_name_silver, db_name_gold, refresh_from)
+                logger.info(f"Refreshed gold.stock_facts_inr from {refresh_from}....")
+        except Exception as e:
+            record_error("transform", source="stock_facts_inr")
+            logger.exception(f"Error while refreshing stock facts in INR : {e}")
+
+        runtime_end = dt.datetime.now()
+        logger.info(f"fx as-of maintenance finished in : {runtime_end - runtime_start}")
+
+    except Exception as e:
+        logger.exception(f"Error while running the fx as-of maintenance : {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", default="config/bulk.yaml")
+    args = parser.parse_args()
+    fx_asof(bulk=args.bulk)
@@ -0,0 +1,70 @@
+import os
+from dotenv import load_dotenv
+import argparse
+from ...utils import load_yml,get_analytics_engine,analytics_backend
+from ...returns_panel import refresh_stock_returns,STOCK_RETURNS
+from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error,set_run_id
+from ... import sql_profile
+import logging
+import datetime as dt
+from sqlalchemy import inspect,text
+
+# main execution block
+
+@timed_stage("transform", source="gold_returns")
+def gold_returns( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = None ):
+
+    # loading the database password
+    load_dotenv(dotenv_path='.env')
+    db_pass = os.getenv("DB_PASS")
+
+    # loading the arguments
+    bulk_config = load_yml(bulk)
+    db_name_silver = bulk_config['dbname'][1]
+    db_name_gold = bulk_config['dbname'][2]
+
+    # logging configuration
+    setup_logging()
+    logger = logging.getLogger('daily-execution')
+
+    # logging Dagster run id and timestamp - correlation log
+    set_run_id(dagster_run_id)
+    sql_profile.configure(bulk_config)
+    if dagster_run_id:
+        logger.info(f"**dagster_run_id** : {dagster_run_id} -> starting gold returns orchestration")
+        logger.info(f"**dagster_log_ts** : {dt.datetime.now().isoformat()} -> starting gold returns marking")
+
+    try:
+
+        logger.info("Starting the gold returns refresh....")
+        runtime_start = dt.datetime.now()
+
+        engine = get_analytics_engine(bulk_config, db_name_gold, db_pass)
+
+        # <--- gold : the trade dates from the last one already computed on, their windows read the history before --->
+        try:
+            if not inspect(engine).has_table(STOCK_RETURNS, schema=db_name_gold):
+                logger.info("gold.stock_returns not built yet, gold_exec materializes it....")
+                return
+
+            with engine.begin() as conn:
+                since = conn.execute(text(f"SELECT MAX(trade_date) FROM {db_name_gold}.{STOCK_RETURNS}")).scalar()
+                rows = refresh_stock_returns(conn, db_name_silver, db_name_gold, bulk_config, since)
+            record_rows(rows, "transform", source="stock_returns")
+            logger.info(f"Refreshed {rows} gold.stock_returns rows from {since} on {analytics_backend(bulk_config)}....")
+        except Exception as e:
+            record_error("transform", source="stock_returns")
+            logger.exception(f"Error while refreshing the stock returns : {e}")
+
+        runtime_end = dt.datetime.now()
+        logger.info(f"gold returns refresh finished in : {runtime_end - runtime_start}")
+
+    except Exception as e:
+        logger.exception(f"Error while running the gold returns refresh : {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", default="config/bulk.yaml")
+    args = parser.parse_args()
+    gold_returns(bulk=args.bulk)
@@ -11,9 +11,14 @@ import json
 from great_expectations.exceptions import GreatExpectationsError
 from sqlalchemy.exc import SQLAlchemyError
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_error,set_run_id,counter_value
+from ... import sql_profile
+from ...landing import daily_state,upstream_fingerprint
+from ...validation_store import save_validation
 
 # main execution block
 
+@timed_stage("validate", source="daily")
 def daily_validation( bulk: str = "config/bulk.yaml", dagster_run_id: str | None = None ):
 
     # parsing the arguments from configuration
@@ -38,10 +43,20 @@ def daily_validation( bulk: str = "config/bulk.yaml", dagster_run_id: str | None
     setup_logging()
     logger = logging.getLogger('daily-validation-execution')
 
+    set_run_id(dagster_run_id)
+    sql_profile.configure(bulk_config)
     if dagster_run_id:
         logger.info(f"**dagster_run_id** : {dagster_run_id} -> starting daily validation orchestration")
         logger.info(f"**dagster_log_ts** : {dt.datetime.now().isoformat()} -> starting daily validation marking")
 
+    # <--- no-op short-circuit : bronze still holds the load this stage already validated --->
+    state = daily_state(bulk_config)
+    load_fp = upstream_fingerprint(state)
+    if load_fp and state.skip("validate", load_fp):
+        logger.info("Daily load unchanged since the last validation, skipping the expectations....")
+        return
+    errors_before = counter_value("pipeline_errors_total")
+
     logger.info("Starting daily validation for the tables loaded....")
 
     runtime_start = dt.datetime.now()
@@ -171,22 +186,21 @@ def daily_validation( bulk: str = "config/bulk.yaml", dagster_run_id: str | None
 
                 ohclv_result = ohclv_validator.validate().to_json_dict()
 
-                # report file directory
-                report_path = Path('reports/bronzeValidation/ohclv_daily')
-                report_path.mkdir(parents=True, exist_ok=True)
-                # write the report file
-                with open(report_path / f'ohclv_bronze_report.json_{dt.datetime.now().strftime("%Y-%m-%dT%H-%M-%S")}', 'w') as f:
-                    json.dump(ohclv_result, f, indent=4)
+                # one row per expectation in the validation store, the raw JSON report only when validation_raw_json is on
+                save_validation(ohclv_result, "ohclv_daily", bulk_config, Path('reports/bronzeValidation/ohclv_daily'), 'ohclv_bronze_report')
 
                 logger.info("Completed the Ohclv daily load bronze validation")
                 ohclv_end_time = dt.datetime.now()
                 logger.info(f"ohclv validation took - {ohclv_end_time - ohclv_start_time}")
 
             except SQLAlchemyError as db_error:
+                record_error("validate", source="ohclv_daily")
                 logger.exception("Database error while configuring or running GX on bronze ohclv")
             except GreatExpectationsError as gx_err:
+                record_error("validate", source="ohclv_daily")
                 logger.exception("Great Expectations error while validating ohclv bronze")
             except Exception as e:
+                record_error("validate", source="ohclv_daily")
                 logger.exception("Unexpected error in bronze_ohclv_validation")
 
             try:
@@ -241,30 +255,35 @@ def daily_validation( bulk: str = "config/bulk.yaml", dagster_run_id: str | None
                 )
                 exchg_result = exchg_validator.validate().to_json_dict()
 
-                # report file directory
-                report_path = Path('reports/bronzeValidation/daily_exchange_rate')
-                report_path.mkdir(parents=True, exist_ok=True)
-                # write the report file
-                with open(report_path / f'exchange_rate_bronze_report.json_{dt.datetime.now().strftime("%Y-%m-%dT%H-%M-%S")}', 'w') as f:
-                    json.dump(exchg_result, f, indent=4)
+                # one row per expectation in the validation store, the raw JSON report only when validation_raw_json is on
+                save_validation(exchg_result, "daily_exchange_rate", bulk_config, Path('reports/bronzeValidation/daily_exchange_rate'), 'exchange_rate_bronze_report')
 
                 logger.info("Completed the exchange rate daily load bronze validation")
                 exchg_end_time = dt.datetime.now()
                 logger.info(f"exchange data validation took - {exchg_end_time - exchg_start_time}")
 
             except SQLAlchemyError as db_error:
+                record_error("validate", source="exchange_rate_daily")
                 logger.exception("Database error while configuring or running GX on exchange_rate_bronze")
             except GreatExpectationsError as gx_err:
+                record_error("validate", source="exchange_rate_daily")
                 logger.exception("Great Expectations error while validating exchange_rate_bronze")
             except Exception as e:
+                record_error("validate", source="exchange_rate_daily")
                 logger.exception("Unexpected error in bronze_exchange_rate_validation")
         except Exception as e:
+            record_error("validate", source="daily")
             logger.exception("Unexpected error while validation process for daily load....")
 
         logger.info("completed running the expectations on the daily load....")
         runtime_end = dt.datetime.now()
         logger.info(f"Expectations runtime took - {runtime_end - runtime_start}")
 
+        if counter_value("pipeline_errors_total") > errors_before:
+            state.failed("validate", "errors recorded during the daily validation")
+        elif load_fp:
+            state.done("validate", load_fp, (runtime_end - runtime_start).total_seconds())
+
     except Exception as e:
         logger.exception("Unexpected error while running great expectations....")
 
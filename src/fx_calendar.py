@@ -0,0 +1,115 @@
+"""
+
+Calendar-complete exchange rates : one row per calendar day and currency pair
+
+Frankfurter only publishes on ECB business days while the OHCLV bars follow US exchange days,
+so silver.fx_rates_calendar carries every day with the last published rate forward filled
+(rate_date says which publication it came from). Gold joins it on plain date equality.
+
+    with engine.begin() as conn:
+        since, rows = update_fx_calendar(conn, "silver")
+        refresh_stock_facts_inr(conn, "silver", "gold", since)
+
+The update is incremental : it restarts at the first day a late or revised silver rate disagrees
+with the calendar, or the day after the calendar ends, and only rewrites from there.
+
+"""
+
+import datetime as dt
+
+import pandas as pd
+from sqlalchemy import text
+
+FX_CALENDAR = "fx_rates_calendar"
+
+
+def fx_calendar_frame(rates: pd.DataFrame, start, end) -> pd.DataFrame:
+    """
+    Forward fill rates (date, base, quote, rate, rate_date) onto every day from start to end with one
+    vectorized merge_asof per call, pairs without a rate yet on a day are left out
+    """
+    rates = rates.assign(date=pd.to_datetime(rates["date"]), rate_date=pd.to_datetime(rates["rate_date"]))
+    rates = rates.astype({"base": str, "quote": str}).sort_values("date")
+
+    days = pd.DataFrame({"date": pd.date_range(start, end, freq="D")})
+    grid = days.merge(rates[["base", "quote"]].drop_duplicates(), how="cross")
+
+    filled = pd.merge_asof(grid, rates, on="date", by=["base", "quote"], direction="backward")
+    filled = filled.dropna(subset=["rate"])
+    return filled.assign(date=filled["date"].dt.date, rate_date=filled["rate_date"].dt.date)
+
+
+def _restart_date(conn, silver: str, end):
+    """First day the calendar has to be rebuilt from, None when it is already complete up to end"""
+
+    # silver rates missing from the calendar or disagreeing with it : late arrivals, revisions, new currencies
+    stale = conn.execute(text(f"""
+        SELECT MIN(s.date)
+        FROM {silver}.fx_rates_silver s
+        LEFT JOIN {silver}.{FX_CALENDAR} c
+            ON c.date = s.date AND c.base = s.base AND c.quote = s.quote
+        WHERE c.date IS NULL OR c.rate_date <> s.date OR c.rate <> s.rate
+    """)).scalar()
+    last = conn.execute(text(f"SELECT MAX(date) FROM {silver}.{FX_CALENDAR}")).scalar()
+
+    candidates = [d for d in (stale, last + dt.timedelta(days=1) if last else None) if d is not None]
+    start = min(candidates) if candidates else None
+    return start if start is not None and start <= end else None
+
+
+def update_fx_calendar(conn, silver: str, end=None) -> tuple:
+    """Extend / repair silver.fx_rates_calendar up to end (today), returns (first rewritten day or None, rows written)"""
+
+    end = end or dt.date.today()
+    start = _restart_date(conn, silver, end)
+    if start is None:
+        return None, 0
+
+    # the rates from start on, plus the calendar's last filled rate before start as the anchor
+    rates = pd.read_sql(text(f"""
+        SELECT date, base, quote, rate, date AS rate_date
+        FROM {silver}.fx_rates_silver
+        WHERE date >= :start
+        UNION ALL
+        SELECT date, base, quote, rate, rate_date
+        FROM {silver}.{FX_CALENDAR}
+        WHERE date = :anchor
+    """), conn, params={"start": start, "anchor": start - dt.timedelta(days=1)})
+
+    calendar = fx_calendar_frame(rates, start, end)
+
+    conn.execute(text(f"DELETE FROM {silver}.{FX_CALENDAR} WHERE date >= :start"), {"start": start})
+    if len(calendar):
+        conn.execute(text(f"""
+            INSERT INTO {silver}.{FX_CALENDAR} (date, base, quote, rate, rate_date)
+            VALUES (:date, :base, :quote, :rate, :rate_date)
+        """), calendar[["date", "base", "quote", "rate", "rate_date"]].to_dict("records"))
+    return start, len(calendar)
+
+
+def refresh_stock_facts_inr(conn, silver: str, gold: str, since=None) -> None:
+    """
+    gold.stock_facts_inr : close prices converted at the as-of USD -> INR rate of the trade date.
+    Without since the table is rebuilt, with since only trade dates from there on are replaced
+    """
+
+    select = f"""
+        SELECT
+            o.ticker,
+            o.date AS trade_date,
+            o.close AS close_price,
+            f.rate AS usd_inr_rate,
+            f.rate_date AS rate_published_date,
+            o.close * f.rate AS close_price_inr
+        FROM {silver}.ohclv_silver o
+        JOIN {silver}.{FX_CALENDAR} f
+            ON f.date = o.date AND f.base = 'USD' AND f.quote = 'INR'
+    """
+
+    if since is None:
+        conn.execute(text(f"DROP TABLE IF EXISTS {gold}.stock_facts_inr"))
+        conn.execute(text(f"CREATE TABLE {gold}.stock_facts_inr AS {select}"))
+        return
+
+    conn.execute(text(f"DELETE FROM {gold}.stock_facts_inr WHERE trade_date >= :since"), {"since": since})
+    conn.execute(text(f"INSERT INTO {gold}.stock_facts_inr {select} WHERE o.date >= :since"), {"since": since})
@@ -0,0 +1,144 @@
+"""
+
+Local cache of the Global Macro Database keyed by release version
+
+    df = read_macro(bulk_config, ["nGDP", "rGDP"], 2020, 2026, countries=["USA", "IND"])
+
+The whole release is downloaded once per GMD version into <gmd_cache_dir>/GMD_<version>.parquet.
+Reads only load the requested columns and filter countries / the end year inside the parquet
+reader, so nothing outside the configured slice reaches pandas or the landing zone. The published
+version is checked at most every gmd_version_check_hours; a newer release replaces the cache,
+an unreachable version endpoint falls back to the cached release. Both calls go through
+the shared retry policy (src/retry.py, source gmd).
+
+"""
+
+import contextlib
+import datetime as dt
+import io
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+import global_macro_data
+
+from .retry import retry_call
+
+# columns gmd always carries, in its order, next to the requested variables
+ID_COLUMNS = ["ISO3", "year", "id", "countryname"]
+
+logger = logging.getLogger("bronze-execution")
+
+
+def _cache_dir(bulk_config: dict) -> Path:
+    path = Path(bulk_config.get("gmd_cache_dir", "data/cache/gmd"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _read_manifest(cache_dir: Path) -> dict:
+    manifest = cache_dir / "manifest.json"
+    if not manifest.exists():
+        return {}
+    with open(manifest) as f:
+        return json.load(f)
+
+
+def _write_manifest(cache_dir: Path, manifest: dict) -> None:
+    tmp = cache_dir / "manifest.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    tmp.replace(cache_dir / "manifest.json")
+
+
+def _quiet(func, *args, **kwargs):
+    """Call into the library with its prints sent to the log instead of stdout"""
+    with io.StringIO() as buf, contextlib.redirect_stdout(buf):
+        result = func(*args, **kwargs)
+        lines = [line for line in buf.getvalue().splitlines() if line.strip()]
+    for line in lines:
+        logger.info(f"GMD : {line}")
+    return result
+
+
+def published_version(bulk_config: dict, manifest: dict) -> str | None:
+    """Latest GMD release, from the manifest while the last check is fresh enough"""
+
+    ttl = dt.timedelta(hours=float(bulk_config.get("gmd_version_check_hours", 24)))
+    checked_at = manifest.get("checked_at")
+    if checked_at and dt.datetime.now() - dt.datetime.fromisoformat(checked_at) < ttl:
+        return manifest.get("version")
+
+    try:
+        version = str(retry_call(bulk_config, "gmd", _quiet, global_macro_data.get_current_version))
+    except Exception as e:
+        logger.warning(f"GMD version check failed, using the cached release : {e}")
+        return manifest.get("version")
+
+    manifest["checked_at"] = dt.datetime.now().isoformat(timespec="seconds")
+    return version
+
+
+def ensure_release(bulk_config: dict) -> Path:
+    """Parquet file of the current GMD release, downloaded only when the published version moved"""
+
+    cache_dir = _cache_dir(bulk_config)
+    manifest = _read_manifest(cache_dir)
+    version = published_version(bulk_config, manifest)
+    if version is None:
+        raise RuntimeError("GMD version unknown and no cached release, the first run needs network access")
+
+    path = cache_dir / f"GMD_{version}.parquet"
+    if path.exists():
+        _write_manifest(cache_dir, {**manifest, "version": version})
+        return path
+
+    logger.info(f"Downloading GMD release {version} into the local cache....")
+    release = retry_call(bulk_config, "gmd", _quiet, global_macro_data.gmd, version=version)
+
+    tmp = path.with_suffix(".parquet.tmp")
+    release.to_parquet(tmp, index=False)
+    tmp.replace(path)
+
+    # superseded releases are dropped once the new one is in place
+    for old in cache_dir.glob("GMD_*.parquet"):
+        if old != path:
+            old.unlink()
+
+    _write_manifest(cache_dir, {
+        **manifest,
+        "version": version,
+        "downloaded_at": dt.datetime.now().isoformat(timespec="seconds"),
+        "rows": len(release),
+        "columns": len(release.columns),
+    })
+    return path
+
+
+def read_macro(bulk_config: dict, variables: list, start_year: int, end_year: int, countries: list | None = None) -> pd.DataFrame:
+    """
+    Configured slice of the cached release : id columns plus variables, start_year..end_year and
+    countries (ISO3, all when empty). Leading years without any value are trimmed per country as gmd does
+    """
+    import pyarrow.parquet as pq
+
+    path = ensure_release(bulk_config)
+    available = pq.read_schema(path).names
+    values = [v for v in variables if v not in ID_COLUMNS]
+    missing = [v for v in values if v not in available]
+    if missing:
+        raise ValueError(f"GMD release {path.stem} has no variables {missing}")
+
+    # the start year is applied after the trim, a country with older values keeps its empty first years
+    filters = [("year", "<=", end_year)]
+    if countries:
+        filters.append(("ISO3", "in", list(countries)))
+
+    columns = [c for c in ID_COLUMNS if c in available] + values
+    df = pd.read_parquet(path, columns=columns, filters=filters).sort_values(["ISO3", "year"])
+
+    has_value = df[values].notna().any(axis=1)
+    df = df[(has_value.groupby(df["ISO3"]).cumsum() > 0) & (df["year"] >= start_year)]
+    return df.reset_index(drop=True)
@@ -1,14 +1,63 @@
-import logging
+import argparse
+import sys
+
+# configuration arguments, parsed before the stage imports since those parse --bulk at import time
+parser = argparse.ArgumentParser()
+parser.add_argument("--bulk", default="config/bulk.yaml")
+parser.add_argument("--resume", action="store_true", help="skip stages already done with unchanged inputs")
+parser.add_argument("--from-stage", default=None, help="skip every stage before this one and run from here")
+args, _ = parser.parse_known_args()
+sys.argv = [sys.argv[0], "--bulk", args.bulk]
+
 from src.historical.extract import ohclv_extract,company_metadata_extract,exchange_rate_extract,macro_data_extract
 from src.historical.load import ohclv_historic,meta_data_historic,exchange_rate_historic,macro_data_historic
 from src.bronzeValidation import ohclv,company_meta_data,macro_data,exchange_rate,bronze_layer_validation
+from src.bronzeValidation.runner import run_suites
 from src.historical.transform import bronze_rank_trim,silver_master,silver_load
-import pandas as pd
+from src.utils import load_yml
+from src import sql_profile
+from src.checkpoint import RunState,fingerprint,config_values,landing_files
 import datetime as dt
+import time
 import logging
 from src.logger import setup_logging
-
-def main():
+from src.metrics import timed_stage,counter_value
+
+# <--- stage table : (phase, stage, log label, function, config keys and landing roots its inputs depend on) --->
+
+DB_KEYS = ["dbname", "host", "port"]
+LOAD_KEYS = DB_KEYS + ["load_streaming", "load_chunk_rows", "load_memory_budget_mb", "ingest_engine", "ohclv_partitioning", "ohclv_partitions_ahead"]
+SILVER_KEYS = DB_KEYS + ["analytics_backend", "duckdb_path", "meta_cdc_fields", "silver_transform"]
+
+STAGES = [
+    ("Extract", "extract_ohclv", "OHCLV Extract", ohclv_extract.ohclv_load, ["tickers", "start_date", "end_date"], []),
+    ("Extract", "extract_meta", "Metadata Extract", company_metadata_extract.load_metadata, ["tickers", "meta_keys", "fmp_end_point"], []),
+    ("Extract", "extract_fx", "Exchange Rate Extract", exchange_rate_extract.load_exchange_rates, ["start_date", "fx_base", "fx_currencies", "frank_exchange_end_point"], []),
+    ("Extract", "extract_macro", "MacroData Extract", macro_data_extract.load_macro, ["macro_variables", "macro_countries", "start_date", "end_date"], []),
+    ("Load", "load_ohclv", "OHCLV Load", ohclv_historic.load_ohclv_bronze, LOAD_KEYS, ["ohclv_root"]),
+    ("Load", "load_meta", "Metadata Load", meta_data_historic.load_meta_bronze, LOAD_KEYS, ["meta_data_root"]),
+    ("Load", "load_fx", "Exchange Rate Load", exchange_rate_historic.load_exhange_bronze, LOAD_KEYS, ["exchange_rate_root", "fx_rate_root"]),
+    ("Load", "load_macro", "MacroData Load", macro_data_historic.load_macro_bronze, LOAD_KEYS, ["macro_data_root"]),
+    ("Validation", "validate_ohclv", "OHCLV Validation", ohclv.bronze_ohclv_validation, DB_KEYS, []),
+    ("Validation", "validate_meta", "Metadata Validation", company_meta_data.bronze_company_meta_data_validation, DB_KEYS, []),
+    ("Validation", "validate_fx", "Exchange Rate Validation", exchange_rate.bronze_exchange_rate_validation, DB_KEYS, []),
+    ("Validation", "validate_macro", "MacroData Validation", macro_data.bronze_macro_data_validation, DB_KEYS, []),
+    ("Validation", "validate_layer", "layer wide statistic count", bronze_layer_validation.bronze_layer_validation, DB_KEYS, []),
+    ("Transformations", "rank_trim", "bronze ranking and trimming", bronze_rank_trim.add_rank_trim, DB_KEYS + ["silver_transform"], []),
+    ("Transformations", "silver_ddl", "silver master DDL", silver_master.silver_ddl, SILVER_KEYS, []),
+    ("Transformations", "silver_load", "Silver layer final setup", silver_load.silver_load, SILVER_KEYS, []),
+]
+
+STAGE_NAMES = [stage for _, stage, _, _, _, _ in STAGES]
+
+def stage_fingerprint(bulk_config: dict, stage: str, keys: list, roots: list, run_day: dt.date) -> str:
+    # extracts land in the day's partition that the loads read, so an extract is only current on its own day
+    day = str(run_day) if stage.startswith("extract_") else None
+    landing = {root: landing_files(bulk_config[root], run_day) for root in roots}
+    return fingerprint(stage, config_values(bulk_config, keys), landing, day)
+
+@timed_stage("pipeline", source="historical")
+def main(resume: bool = False, from_stage: str | None = None):
     """This is the main function that will control all the historical function calls"""
 
     # logger module configuration
@@ -16,140 +65,63 @@ def main():
     logger = logging.getLogger('pipeline-historical')
 
     pipeline_start_time = dt.datetime.now()
-
-    # Historical extract execution block
+    bulk_config = load_yml(args.bulk)
+    sql_profile.configure(bulk_config)
+    state = RunState(bulk_config.get("run_state_path", "data/run_state/historic_load_pipeline.json"),
+                     STAGE_NAMES, resume=resume, from_stage=from_stage)
+    workers = int(bulk_config.get("validation_workers", 1))
 
     logger.info("starting Historical ETL pipeline...")
     try:
-        extract_start_time = dt.datetime.now()
-        logger.info("Starting Historical Extract...")
-        try:
-            logger.info("Starting OHCLV Extract...")
-            ohclv_extract.ohclv_load()
-            logger.info("Successfully completed OHCLV Extract...")
-        except Exception as e:
-            logger.exception("Error in extracting OHCLV data...")
-        try:
-            logger.info("Starting Metadata Extract...")
-            company_metadata_extract.load_metadata()
-            logger.info("Successfully completed Metadata Extract...")
-        except Exception as e:
-            logger.exception("Error in loading Metadata data...")
-        try:
-            logger.info("Starting Exchange Rate Extract...")
-            exchange_rate_extract.load_exchange_rates()
-            logger.info("Successfully completed Exchange Rate Extract...")
-        except Exception as e:
-            logger.exception("Error in loading Exchange Rate data...")
-        try:
-            logger.info("Starting MacroData Extract...")
-            macro_data_extract.load_macro()
-            logger.info("Successfully completed MacroData Extract...")
-        except Exception as e:
-            logger.exception("Error in loading MacroData data...")
-
-        extract_end_time = dt.datetime.now()
-        logger.info("Finished Historical Extract...")
-        logger.info(f"Extract took: {extract_end_time - extract_start_time}")
-
-        # historical data load block
-
-        load_start_time = dt.datetime.now()
-        logger.info("Starting Load Pipeline...")
-        try:
-            logger.info("Starting OHCLV Load...")
-            ohclv_historic.load_ohclv_bronze()
-            logger.info("Successfully completed OHCLV Load...")
-        except Exception as e:
-            logger.exception("Error in loading OHCLV data...")
-        try:
-            logger.info("Starting Metadata Load...")
-            meta_data_historic.load_meta_bronze()
-            logger.info("Successfully completed Metadata Load...")
-        except Exception as e:
-            logger.info("Error in loading Metadata data...")
-        try:
-            logger.info("Starting Exchange Rate Load...")
-            exchange_rate_historic.load_exhange_bronze()
-            logger.info("Successfully completed Exchange Rate Load...")
-        except Exception as e:
-            logger.exception("Error in loading Exchange Rate data...")
-        try:
-            logger.info("Starting MacroData Load...")
-            macro_data_historic.load_macro_bronze()
-            logger.info("Successfully completed MacroData Load...")
-        except Exception as e:
-            logger.exception("Error in loading MacroData data...")
-
-        load_end_time = dt.datetime.now()
-        logger.info("Finished Historical Load...")
-        logger.info(f"Load took: {load_end_time - load_start_time}")
-
-        # validation code block
-        validation_start_time = dt.datetime.now()
-        logger.info("Starting Validation Pipeline...")
-        try:
-            logger.info("Starting OHCLV Validation...")
-            ohclv.bronze_ohclv_validation()
-            logger.info("Successfully completed OHCLV Validation...")
-        except Exception as e:
-            logger.exception("Error in validating OHCLV data...")
-        try:
-            logger.info("Starting Metadata Validation...")
-            company_meta_data.bronze_company_meta_data_validation()
-            logger.info("Successfully completed Metadata Validation...")
-        except Exception as e:
-            logger.exception("Error in validating Metadata data...")
-        try:
-            logger.info("Starting Exchange Rate Validation...")
-            exchange_rate.bronze_exchange_rate_validation()
-            logger.info("Successfully completed Exchange Rate Validation...")
-        except Exception as e:
-            logger.exception("Error in validating Exchange Rate data...")
-        try:
-            logger.info("Starting MacroData Validation...")
-            macro_data.bronze_macro_data_validation()
-            logger.info("Successfully completed MacroData Validation...")
-        except Exception as e:
-            logger.exception("Error in validating MacroData data...")
-        try:
-            logger.info("Starting layer wide statistic count....")
-            bronze_layer_validation.bronze_layer_validation()
-            logger.info("Successfully completed layer wide statistic count...")
-        except Exception as e:
-            logger.exception("Error in accumulating layer wide statistic data...")
-
-        validation_end_time = dt.datetime.now()
-        logger.info("Finished Historical Validation...")
-        logger.info(f"Validation took: {validation_end_time - validation_start_time}")
-
-        # Transformation code block
-
-        transform_start_time = dt.datetime.now()
-        logger.info("Starting tansformations on DB...")
-        try:
-            logger.info("Starting bronze ranking and trimming...")
-            bronze_rank_trim.add_rank_trim()
-            logger.info("Successfully completed Bronze ranking and trimming on DB...")
-        except Exception as e:
-            logger.exception("Error in processing Bronze ranking and trimming data...")
-
-        try:
-            logger.info("Starting silver master DDL...")
-            silver_master.silver_ddl()
-            logger.info("Successfully completed Silver master DDL...")
-        except Exception as e:
-            logger.exception("Error in processing Silver master DDL...")
-
-        try:
-            logger.info("Starting Silver layer final setup...")
-            silver_load.silver_load()
-            logger.info("Successfully completed Silver layer final setup...")
-        except Exception as e:
-            logger.info("Error in processing Silver layer final setup...")
-        transform_end_time = dt.datetime.now()
-        logger.info("Finished Historical Transformations on silver layer...")
-        logger.info(f"Transformations took: {transform_end_time - transform_start_time}")
+        for phase in dict.fromkeys(stage[0] for stage in STAGES):
+
+            phase_start_time = dt.datetime.now()
+            logger.info(f"Starting Historical {phase}...")
+
+            # checkpoint decisions first, in stage order, so a stale stage still reruns everything after it
+            pending = []
+            for _, stage, label, func, keys, roots in (s for s in STAGES if s[0] == phase):
+                fp = stage_fingerprint(bulk_config, stage, keys, roots, pipeline_start_time.date())
+                if state.skip(stage, fp):
+                    logger.info(f"Skipping {label}, {stage} completed earlier with unchanged inputs...")
+                else:
+                    pending.append((stage, label, func, fp))
+
+            if phase == "Validation" and workers > 1 and len(pending) > 1:
+                # the suites only read bronze, they run side by side in their own processes
+                logger.info(f"Starting {len(pending)} validation suites on {min(workers, len(pending))} worker processes...")
+                labels = {stage: (label, fp) for stage, label, _, fp in pending}
+                for result in run_suites(list(labels), args.bulk, workers):
+                    label, fp = labels[result["stage"]]
+                    if result["status"] != "ok":
+                        state.failed(result["stage"], result["status"])
+                        logger.error(f"Error in {label}... {result['status']}")
+                    elif result["errors"]:
+                        state.failed(result["stage"], "errors recorded during the stage")
+                        logger.error(f"{label} recorded errors, {result['stage']} runs again on --resume...")
+                    else:
+                        state.done(result["stage"], fp, result["seconds"])
+                        logger.info(f"Successfully completed {label} in {result['seconds']:.1f}s...")
+            else:
+                for stage, label, func, fp in pending:
+                    logger.info(f"Starting {label}...")
+                    # the stages log and swallow their errors, each handler counts its error with record_error, a new count marks a failure
+                    errors_before = counter_value("pipeline_errors_total")
+                    stage_start = time.perf_counter()
+                    try:
+                        func()
+                        if counter_value("pipeline_errors_total") > errors_before:
+                            state.failed(stage, "errors recorded during the stage")
+                            logger.error(f"{label} recorded errors, {stage} runs again on --resume...")
+                        else:
+                            state.done(stage, fp, time.perf_counter() - stage_start)
+                            logger.info(f"Successfully completed {label}...")
+                    except Exception as e:
+                        state.failed(stage, repr(e))
+                        logger.exception(f"Error in {label}...")
+
+            logger.info(f"Finished Historical {phase}...")
+            logger.info(f"{phase} took: {dt.datetime.now() - phase_start_time}")
 
         pipeline_end_time = dt.datetime.now()
         logger.info(f"Finished Historical Pipeline in {pipeline_end_time - pipeline_start_time}...")
@@ -159,9 +131,4 @@ def main():
         print(e)
 
 if __name__ == '__main__':
-    main()
-
-
-
-
-
+    main(resume=args.resume, from_stage=args.from_stage)
@@ -3,17 +3,20 @@ from ...utils import load_yml,make_dir
 from dotenv import load_dotenv
 from pathlib import Path
 from argparse import ArgumentParser
-import requests
 import pandas as pd
 import datetime as dt
 import logging
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error
+from ...landing import write_landing
+from ...retry import get_json,RetryError
 
 load_dotenv(dotenv_path='.env')
 #load_dotenv()
 fmp_key = os.getenv('FMP_KEY')
 
 
+@timed_stage("extract", source="company_meta")
 def load_metadata():
 
     # logger configuration
@@ -65,7 +68,18 @@ def load_metadata():
                 url = fmp_end_point + tick + '&apikey=' + fmp_key
 
                 # single dict list
-                response = requests.get(url).json()
+                try:
+                    response = get_json(bulk_config, "fmp", url)
+                except RetryError as e:
+                    record_error("extract", source="company_meta", ticker=tick)
+                    logger.error(f"No company profile for {tick}, skipping the ticker : {e}")
+                    continue
+
+                # FMP answers an unknown ticker with an empty list
+                if not response:
+                    record_error("extract", source="company_meta", ticker=tick)
+                    logger.error(f"FMP returned no profile for {tick}, skipping the ticker....")
+                    continue
 
                 print(f"Extracting data for  {response[0]['companyName']}")
 
@@ -77,10 +91,16 @@ def load_metadata():
 
             meta_data_df = pd.DataFrame(company_meta_data_list)
 
-            meta_data_df.to_csv(path_dest / f'company_metadata_{runtime_time}.csv', index=False)
+            if meta_data_df.empty:
+                logger.error("No company profile was extracted, nothing written to the landing path....")
+            elif write_landing(meta_data_df, path_dest / f'company_metadata_{runtime_time}.csv'):
+                record_rows(len(meta_data_df), "extract", source="company_meta")
+            else:
+                logger.info("Company meta data unchanged since the last extract of the day, no file written....")
 
             logger.info("Company meta data extracted successfully for each ticker....")
         except Exception as e:
+            record_error("extract", source="company_meta")
             logger.info("Error while downloading the company Meta data...")
 
 
@@ -89,7 +109,8 @@ def load_metadata():
         logger.info(f"Runtime finished in - {runtime_end - runtime_start} ...")
 
     except Exception as e:
-        logger.info("Error processing the company meta data extract...")
+        record_error("extract", source="company_meta")
+        logger.exception("Error processing the company meta data extract...")
 
 
 if __name__ == "__main__":
@@ -1,13 +1,16 @@
 from pathlib import Path
-import requests
 import pandas as pd
-from ...utils import load_yml,make_dir
+from ...utils import load_yml,make_dir,fx_pairs,fx_endpoint,fx_long,fx_pivot
 import json
 import argparse
 import datetime as dt
 import logging
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error
+from ...landing import write_landing
+from ...retry import get_json
 
+@timed_stage("extract", source="exchange_rate")
 def load_exchange_rates():
     parser = argparse.ArgumentParser()
     parser.add_argument('--bulk',default='config/bulk.yaml')
@@ -16,7 +19,10 @@ def load_exchange_rates():
     bulk_config = load_yml(args.bulk)
 
     exchange_root = Path(bulk_config['exchange_rate_root'])
-    exchange_end_point = bulk_config['frank_exchange_end_point'].format(start_date=bulk_config['start_date'])
+    fx_root = Path(bulk_config['fx_rate_root'])
+    fx_base, fx_quotes = fx_pairs(bulk_config)
+    # every configured currency in one request for the whole range
+    exchange_end_point = fx_endpoint(bulk_config, 'frank_exchange_end_point', start_date=bulk_config['start_date'])
 
     #logger configuration
     setup_logging()
@@ -39,31 +45,42 @@ def load_exchange_rates():
 
         make_dir(runtime_folder)
         try:
-            response = requests.get(exchange_end_point).json()
+            response = get_json(bulk_config, "frankfurter", exchange_end_point)
 
-            exchange_df = pd.DataFrame.from_dict(response['rates'], orient='index') # pandas data parsing from the response
+            # narrow (date, base, quote, rate) rows for every currency
+            fx_df = fx_long(response['rates'], response.get('base', fx_base))
 
-            exchange_df.index.name = 'Date'
+            fx_folder = fx_root / runtime_year / runtime_month / runtime_date
+            make_dir(fx_folder)
+            if write_landing(fx_df, fx_folder / f'fx_rates_{runtime_time}.csv'):
+                record_rows(len(fx_df), "extract", source="fx_rates")
+            else:
+                logger.info("fx rates unchanged since the last extract of the day, no file written....")
+            logger.info(f"Extracted {fx_df['quote'].nunique()} of {len(fx_quotes)} currencies in a single request....")
 
-            exchange_df.reset_index(inplace=True)
+            # legacy USD -> INR landing from the same response
+            exchange_df = fx_pivot(fx_df, ['INR']).rename(columns={'INR': 'INR_amount'}).rename_axis('Date').reset_index()
 
             exchange_df['USD_rate'] = 1
 
-            exchange_df.rename(columns={'INR': 'INR_amount'},inplace=True)
-
             logger.info("Exchange rates data extracted successfully and data is parsed into usable format...")
 
             exchange_file_path = runtime_folder / f'exchange_rates_{runtime_time}.csv'
 
-            exchange_df.to_csv(exchange_file_path, index=False)
+            if write_landing(exchange_df, exchange_file_path):
+                record_rows(len(exchange_df), "extract", source="exchange_rate")
+            else:
+                logger.info("Exchange rates unchanged since the last extract of the day, no file written....")
 
             logger.info("Successfully extracted the exchange rates and data is staged, process completed...")
             runtime_end = dt.datetime.now()
             logger.info(f"Runtime in - {runtime_end-runtime_start}...")
         except Exception as e:
+            record_error("extract", source="exchange_rate")
             logger.exception(f"Error while downloading the exchange rates data from the API {e}")
 
     except Exception as e:
+        record_error("extract", source="exchange_rate")
         logger.exception(f"Error while executing the download for the exchange rate data {e}...")
 if __name__ == "__main__":
     load_exchange_rates()
@@ -8,18 +8,19 @@ Macro economics data : GDP, inflation, interest rates and unemployment trends
 
 """
 
-from global_macro_data import gmd
 import pandas as pd
 from ...utils import load_yml,make_dir
+from ...gmd_cache import read_macro
 from pathlib import Path
 from argparse import ArgumentParser
 import datetime as dt
 import logging
-import io
-from contextlib import redirect_stdout
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows
+from ...landing import write_landing
 
 
+@timed_stage("extract", source="macro_data")
 def load_macro():
 
     # runtime start for macro data extract
@@ -50,26 +51,22 @@ def load_macro():
     runtime_date = runtime_datetime.strftime("%d")
     runtime_time = runtime_datetime.time().strftime("%H-%M-%S")
 
-    with io.StringIO() as buf,redirect_stdout(buf):
-        macro_df = gmd(variables=macro_variables)
-        output = buf.getvalue().strip().split("\n")
-    logger.info(f"{output[0]}")
-    logger.info(f"{output[1]}")
-    logger.info(f"{output[2]}")
+    # pruned read of the cached GMD release, the download only happens for a new release
+    filtered_macro_df = read_macro(bulk_config, macro_variables, start_year, end_year, bulk_config.get("macro_countries"))
 
-    if not macro_df.empty:
-        logger.info("Data from GMD API loaded successfully....")
-
-    # applying the year filer
-    filtered_macro_df = macro_df[(macro_df["year"] >= start_year) & (macro_df["year"] <= end_year)]
+    if not filtered_macro_df.empty:
+        logger.info("Data from GMD cache loaded successfully....")
 
     filtered_macro_df = filtered_macro_df.rename(columns={"nGDP": "NOMINAL_GDP","rGDP": "REAL_GDP","infl": "INFLATION","unemp": "UNEMPLOYMENT"})
 
 
     runtime_filepath = macro_file_path / runtime_year / runtime_month / runtime_date
     make_dir(runtime_filepath)
-    filtered_macro_df.to_csv(runtime_filepath / f"macro_data_historic_{runtime_time}.csv", index=False)
-    logger.info("Data successfully extracted and loaded into landing path....")
+    if write_landing(filtered_macro_df, runtime_filepath / f"macro_data_historic_{runtime_time}.csv"):
+        record_rows(len(filtered_macro_df), "extract", source="macro_data")
+        logger.info("Data successfully extracted and loaded into landing path....")
+    else:
+        logger.info("Macro data unchanged since the last extract of the day, no file written....")
     #end time macro data extract
     runtime_end = dt.datetime.now()
     runtime = str(runtime_end - runtime_start)
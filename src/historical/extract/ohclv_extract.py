@@ -5,9 +5,13 @@ import yfinance as yf
 from pathlib import Path
 import datetime as dt
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error
+from ...landing import write_landing
+from ...retry import retry_call,policy,RetryError
 import logging
 
 
+@timed_stage("extract", source="ohclv")
 def ohclv_load():
 
     # logger configuration
@@ -59,17 +63,15 @@ def ohclv_load():
                 # make folders for each of the select company
                 make_dir(ticker_out_path)
 
-                # retry block for implementing Yfinance API
-
-                for i in range(5):
-                    # downloading the companies data as data frame
-                    org_df = yf.download(ticker, start=start_date,end=end_date, interval='1d', rounding=True, keepna=True)
-                    if org_df.empty:
-                        logger.info("Data Frame is empty, call the Yfinance API...")
-                        print("implementing retry")
-                        continue
-                    else:
-                        break
+                # Yfinance API call, an empty frame is retried with backoff and never written
+                try:
+                    org_df = retry_call(bulk_config, "yfinance", yf.download, ticker, start=start_date, end=end_date,
+                                        interval='1d', rounding=True, keepna=True,
+                                        timeout=policy(bulk_config, "yfinance")["timeout"], empty=lambda df: df.empty)
+                except RetryError as e:
+                    record_error("extract", source="ohclv", ticker=ticker)
+                    logger.error(f"No OHCLV data for {ticker}, skipping the ticker : {e}")
+                    continue
 
                 # flattening the multi_index columns
                 org_df.columns = [col[0].upper() for col in org_df.columns]
@@ -80,11 +82,15 @@ def ohclv_load():
                 org_df.reset_index(inplace=True)
 
                 ticker_file_path = ticker_out_path / f"{ticker}_stock_{runtime_time}.csv"
-                org_df.to_csv(ticker_file_path, index=False)
+                if write_landing(org_df, ticker_file_path):
+                    record_rows(len(org_df), "extract", source="ohclv", ticker=ticker)
+                else:
+                    logger.info(f"OHCLV data for {ticker} unchanged since the last extract of the day, no file written....")
 
                 print("\n----------------------------------------------------------------------------------\n**********************************************************************************\n")
             logger.info("Successfully extracted the OHCLV stock data for the respective company ticker values...")
         except Exception as e:
+            record_error("extract", source="ohclv")
             print(f"OHCLV stock data download failed.......\n\n[ERROR] failed to process the data:  {e}")
 
         runtime_end = dt.datetime.now()
@@ -92,7 +98,8 @@ def ohclv_load():
         logger.info(f"Runtime finished in - {runtime_end - runtime_start} ...")
 
     except Exception as e:
-        logger.info("Error while processing the ohclv data extract....")
+        record_error("extract", source="ohclv")
+        logger.exception("Error while processing the ohclv data extract....")
 
 
 if __name__ == '__main__':
@@ -1,13 +1,15 @@
-from ...utils import load_yml,mysql_connect_create_db,get_engine_session,recreate_table
+from ...utils import load_yml,mysql_connect_create_db,get_engine_session,recreate_table,landing_chunks
 import pandas as pd
 import argparse
 from dotenv import load_dotenv
 import os
 from ...models.bronze.exchange_rate_data import ExchangeRateData
+from ...models.bronze.fx_rate_data import FxRateData
 from pathlib import Path
 import datetime as dt
 import logging
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error,peak_rss
 
 load_dotenv(dotenv_path=".env")
 db_pass = os.getenv("DB_PASS")
@@ -17,6 +19,7 @@ parser.add_argument("--bulk", default='config/bulk.yaml')
 args = parser.parse_args()
 bulk_config = load_yml(args.bulk)
 
+@timed_stage("load", source="exchange_rate")
 def load_exhange_bronze():
 
     # loading the logging configuration
@@ -25,6 +28,7 @@ def load_exhange_bronze():
 
     # configure options loading
     DATA_DIR = Path(bulk_config["exchange_rate_root"])
+    FX_DIR = Path(bulk_config["fx_rate_root"])
 
     db_name = bulk_config["dbname"][0]
     user_name = bulk_config["user_name"]
@@ -43,6 +47,7 @@ def load_exhange_bronze():
         print("Engine to work with DB created and session is activated...")
         # dropping and recreating the table
         recreate_table(engine,ExchangeRateData)
+        recreate_table(engine,FxRateData)
 
         runtime_datetime = dt.datetime.now()
         runtime_year = str(runtime_datetime.year)
@@ -61,23 +66,46 @@ def load_exhange_bronze():
             if not os.path.isfile(runtime_file):
                 print("Source file for exchange rate data not found...")
 
-            df = pd.read_csv(runtime_file)
-
-            for _, row in df.iterrows():
-                record = ExchangeRateData(
-                    date=row["Date"],
-                    inr_rate=row["INR_amount"],
-                    usd_amount=row["USD_rate"],
-                )
-                session.add(record)
-            session.commit()
+            rows = 0
+            with peak_rss("load", source="exchange_rate") as rss:
+                for chunk in landing_chunks(runtime_file, bulk_config, source="exchange_rate"):
+                    for _, row in chunk.iterrows():
+                        record = ExchangeRateData(
+                            date=row["Date"],
+                            inr_rate=row["INR_amount"],
+                            usd_amount=row["USD_rate"],
+                        )
+                        session.add(record)
+                    rss.sample()
+                    session.commit()
+                    session.expunge_all()
+                    rows += len(chunk)
+            record_rows(rows, "load", source="exchange_rate")
+            logger.info(f"Peak RSS during the exchange rate load : {rss.peak / 2**20:.1f} MB....")
             print("Exchange rate data loaded...")
             logger.info("Successfully loaded the exchange rate data into the bronze layer....")
+
+            # narrow multi-currency rates from the same extract
+            fx_files = list((FX_DIR / runtime_year / runtime_month / runtime_date).glob("*.csv"))
+            if fx_files:
+                fx_rows = 0
+                for chunk in landing_chunks(max(fx_files, key=os.path.getmtime), bulk_config, source="fx_rates"):
+                    for _, row in chunk.iterrows():
+                        session.add(FxRateData(date=row["date"], base=row["base"], quote=row["quote"], rate=row["rate"]))
+                    session.commit()
+                    session.expunge_all()
+                    fx_rows += len(chunk)
+                record_rows(fx_rows, "load", source="fx_rates")
+                logger.info(f"Loaded {fx_rows} narrow fx rate rows into the bronze layer....")
+            else:
+                logger.info(f"No narrow fx rates landed in {FX_DIR}....")
             runtime_end = dt.datetime.now()
             logger.info(f"Runtime duration: {runtime_end - runtime_start}")
         except Exception as e:
+            record_error("load", source="exchange_rate")
             print(e)
     except Exception as e:
+        record_error("load", source="exchange_rate")
         logger.exception(e)
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from ...utils import load_yml,mysql_connect_create_db,get_engine_session,recreate_table,gmd_null_handler
+from ...utils import load_yml,mysql_connect_create_db,get_engine_session,recreate_table,gmd_null_handler,frame_chunks,read_landing
 import pandas as pd
 import os
 from ...models.bronze.macro_economic_data import MacroEconomicData
@@ -8,6 +8,7 @@ from pathlib import Path
 import datetime as dt
 import logging
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error,peak_rss
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--bulk", default='config/bulk.yaml')
@@ -17,6 +18,7 @@ bulk_config = load_yml(args.bulk)
 load_dotenv(dotenv_path=".env")
 db_pass = os.getenv("DB_PASS")
 
+@timed_stage("load", source="macro_data")
 def load_macro_bronze():
 
     # loading the logging configuration
@@ -69,30 +71,38 @@ def load_macro_bronze():
         if not os.path.isfile(runtime_file):
             print("Macro data file does not exist")
 
-        df = pd.read_csv(runtime_file)
-
-        # data handling for null values
-        df_filled = df.groupby('ISO3',group_keys=False).apply(gmd_null_handler, include_groups=False)
-
-        logger.info("Null values handled successfully and data frame is ready for loading into MySQL table")
-
-
-        # convert the numpy numeric to python object, this allows the nan to be changed as None
-        # Using where to convert conditionally False values to None
-        #df = df.astype(object).where(pd.notna(df), None)
-
-        for _,row in df_filled.iterrows():
-            record = MacroEconomicData(
-                country_id = row["id"],
-                year = row["year"],
-                country_name = row["countryname"],
-                nominal_gdp = row["NOMINAL_GDP_FILLED"],
-                real_gdp = row["REAL_GDP_FILLED"],
-                inflation = row["INFLATION_FILLED"],
-                unemployment = row["UNEMPLOYMENT_FILLED"]
-            )
-            session.add(record)
-        session.commit()
+        with peak_rss("load", source="macro_data") as rss:
+            df = read_landing(runtime_file, "macro_data", bulk_config)
+
+            # data handling for null values, the medians need every year of a country so the file is read whole
+            df_filled = df.groupby('ISO3',group_keys=False).apply(gmd_null_handler, include_groups=False)
+
+            logger.info("Null values handled successfully and data frame is ready for loading into MySQL table")
+
+
+            # convert the numpy numeric to python object, this allows the nan to be changed as None
+            # Using where to convert conditionally False values to None
+            #df = df.astype(object).where(pd.notna(df), None)
+
+            # inserts are still committed per chunk
+            for chunk in frame_chunks(df_filled, bulk_config):
+                for _,row in chunk.iterrows():
+                    record = MacroEconomicData(
+                        country_id = row["id"],
+                        year = row["year"],
+                        country_name = row["countryname"],
+                        nominal_gdp = row["NOMINAL_GDP_FILLED"],
+                        real_gdp = row["REAL_GDP_FILLED"],
+                        inflation = row["INFLATION_FILLED"],
+                        unemployment = row["UNEMPLOYMENT_FILLED"]
+                    )
+                    session.add(record)
+                rss.sample()
+                session.commit()
+                session.expunge_all()
+
+        record_rows(len(df_filled), "load", source="macro_data")
+        logger.info(f"Peak RSS during the macro data load : {rss.peak / 2**20:.1f} MB....")
         # end time
         runtime_end = dt.datetime.now()
 
@@ -101,6 +111,7 @@ def load_macro_bronze():
         logger.info(f"Runtime in : {runtime_end - runtime_start}") # time difference for the validation runtime
 
     except Exception as e :
+        record_error("load", source="macro_data")
         print(e)
 
 if __name__ == "__main__":
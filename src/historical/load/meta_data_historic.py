@@ -1,12 +1,13 @@
 import os
 from dotenv import load_dotenv
 import pandas as pd
-from ...utils import load_yml,recreate_table,mysql_connect_create_db,get_engine_session
+from ...utils import load_yml,recreate_table,mysql_connect_create_db,get_engine_session,landing_chunks
 from ...models.bronze.company_meta_data import CompanyMetaDataBronze
 import argparse
 import datetime as dt
 from pathlib import Path
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error,peak_rss
 import logging
 
 load_dotenv(dotenv_path=".env")
@@ -18,6 +19,7 @@ args = parser.parse_args()
 bulk_config = load_yml(args.bulk)
 
 
+@timed_stage("load", source="company_meta")
 def load_meta_bronze():
 
     # calling the log configuration
@@ -39,6 +41,7 @@ def load_meta_bronze():
             mysql_connect_create_db(db_name,user_name,host,port,db_pass)
             logger.info("Sucessfully connected to the MySQL database server")
         except Exception as e:
+            record_error("load", source="company_meta")
             logger.exception(f"Error while connecting to MySql.... : {e}")
         # creating the engine and session for the select db
         engine, session = get_engine_session(db_name,user_name,host,port,db_pass)
@@ -59,30 +62,39 @@ def load_meta_bronze():
             files = list(runtime_file_path.glob("*.csv"))
             latest_file = max(files, key=os.path.getmtime)
 
-            df = pd.read_csv(latest_file)
-
             print("Loading the company's meta data...\n")
-            for _, row in df.iterrows():
-                record = CompanyMetaDataBronze(
-                    company_name=row['companyName'],
-                    ticker=row["symbol"],
-                    price=row["price"],
-                    market_cap=row["marketCap"],
-                    sector=row["sector"],
-                    industry=row["industry"]
-                )
-                session.add(record)
+            rows = 0
+            with peak_rss("load", source="company_meta") as rss:
+                for chunk in landing_chunks(latest_file, bulk_config, source="company_meta"):
+                    for _, row in chunk.iterrows():
+                        record = CompanyMetaDataBronze(
+                            company_name=row['companyName'],
+                            ticker=row["symbol"],
+                            price=row["price"],
+                            market_cap=row["marketCap"],
+                            sector=row["sector"],
+                            industry=row["industry"]
+                        )
+                        session.add(record)
+
+                    rss.sample()
+                    session.commit()
+                    session.expunge_all()
+                    rows += len(chunk)
 
-            session.commit()
+            record_rows(rows, "load", source="company_meta")
+            logger.info(f"Peak RSS during the company meta data load : {rss.peak / 2**20:.1f} MB....")
             print("CompanyMetaData Bronze load complete...")
             logger.info("Successfully loaded the company's meta data into the bronze layer....")
         except Exception as err:
+            record_error("load", source="company_meta")
             print(f"CompanyMetaData Bronze load failed...: {err}")
 
         runtime_end = dt.datetime.now()
         logger.info("Completed the company meta data load process into database....")
         logger.info(f"Finished in {runtime_end - runtime_start}...")
     except Exception as e:
+        record_error("load", source="company_meta")
         logger.exception(f"Error while loading the company data into the bronze layer: {e}")
 if __name__ == "__main__":
     load_meta_bronze()
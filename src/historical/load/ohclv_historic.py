@@ -1,13 +1,15 @@
 import os
 from dotenv import load_dotenv
 import pandas as pd
-from ...utils import load_yml,get_engine_session,recreate_table,mysql_connect_create_db
+from ...utils import load_yml,get_engine_session,recreate_table,mysql_connect_create_db,landing_chunks
 from ...models.bronze.ohclv import OHCLVBronze
 import argparse
 import datetime as dt
 from pathlib import Path
 import logging
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_rows,record_error,peak_rss
+from ...partitions import partition_by_year
 
 load_dotenv(dotenv_path=".env")
 db_pass = os.getenv("DB_PASS")
@@ -17,6 +19,7 @@ parser.add_argument("--bulk",default="config/bulk.yaml")
 args = parser.parse_args()
 bulk_config = load_yml(args.bulk)
 
+@timed_stage("load", source="ohclv")
 def load_ohclv_bronze():
 
     # logging configuration
@@ -47,6 +50,7 @@ def load_ohclv_bronze():
             mysql_connect_create_db(db_name,user_name,host,port,db_pass)
             logger.info("Successfully established connection to the MySQL  database")
         except Exception as e:
+            record_error("load", source="ohclv")
             logger.error(e)
 
         try:
@@ -54,47 +58,64 @@ def load_ohclv_bronze():
             engine, session = get_engine_session(db_name,user_name,host,port,db_pass)
             # dropping and recreating the table
             recreate_table(engine,OHCLVBronze)
-            logger.info("Starting the data load from CSV to Database Bronze table")
-            for ticker in os.listdir(DATA_DIR):
-                ticker_path = DATA_DIR / ticker
-                if not os.path.isdir(ticker_path):
-                    continue
-
-                # root folder with csv's
-                leaf_folder = ticker_path / runtime_year / runtime_month / runtime_date
-
-                # list of csv files in the root folder
-                files = list(leaf_folder.glob("*.csv"))
-                latest_file = None
-                if files:
-                    latest_file = max(files, key=os.path.getmtime)
-                else:
-                    print("error")
-
-                if not os.path.exists(latest_file):
-                    print(f"No CSV for {ticker}")
-                    continue
-
-                print(f"Loading: {ticker}...")
-
-                df = pd.read_csv(latest_file)
-
-                for _, row in df.iterrows():
-                    record = OHCLVBronze(
-                        ticker=ticker,
-                        date=row["Date"],
-                        open=row["OPEN"],
-                        high=row["HIGH"],
-                        low=row["LOW"],
-                        close=row["CLOSE"],
-                        volume=row["VOLUME"]
-                    )
-                    session.add(record)
-
-                session.commit()
 
+            # yearly partitions from the first year of history to the years ahead, p_future takes the rest
+            if bulk_config.get("ohclv_partitioning", True):
+                with engine.begin() as conn:
+                    partition_by_year(conn, db_name, OHCLVBronze.__tablename__, dt.date.fromisoformat(str(bulk_config["start_date"])).year,
+                                      dt.date.today().year + int(bulk_config.get("ohclv_partitions_ahead", 1)))
+                logger.info("Partitioned ohclv_bronze by year....")
+
+            logger.info("Starting the data load from CSV to Database Bronze table")
+            with peak_rss("load", source="ohclv") as rss:
+                for ticker in os.listdir(DATA_DIR):
+                    ticker_path = DATA_DIR / ticker
+                    if not os.path.isdir(ticker_path):
+                        continue
+
+                    # root folder with csv's
+                    leaf_folder = ticker_path / runtime_year / runtime_month / runtime_date
+
+                    # list of csv files in the root folder
+                    files = list(leaf_folder.glob("*.csv"))
+                    latest_file = None
+                    if files:
+                        latest_file = max(files, key=os.path.getmtime)
+                    else:
+                        print("error")
+
+                    if not os.path.exists(latest_file):
+                        print(f"No CSV for {ticker}")
+                        continue
+
+                    print(f"Loading: {ticker}...")
+
+                    rows = 0
+                    for chunk in landing_chunks(latest_file, bulk_config, source="ohclv"):
+                        for _, row in chunk.iterrows():
+                            record = OHCLVBronze(
+                                ticker=ticker,
+                                date=row["Date"],
+                                open=row["OPEN"],
+                                high=row["HIGH"],
+                                low=row["LOW"],
+                                close=row["CLOSE"],
+                                volume=row["VOLUME"]
+                            )
+                            session.add(record)
+
+                        # commit per chunk and let go of the objects, memory stays at one chunk
+                        rss.sample()
+                        session.commit()
+                        session.expunge_all()
+                        rows += len(chunk)
+
+                    record_rows(rows, "load", source="ohclv", ticker=ticker)
+
+            logger.info(f"Peak RSS during the ohclv load : {rss.peak / 2**20:.1f} MB....")
             logger.info("Finished loading data for each ticker into the database....")
         except Exception as e:
+            record_error("load", source="ohclv")
             logger.exception("OHCLV Bronze load failed, there was an error with data loading....")
 
         logger.info("Completed OHCLV Data load process into Database....")
@@ -102,6 +123,7 @@ def load_ohclv_bronze():
         logger.info(f"Finished in {runtime_end - runtime_start}...")
 
     except Exception as e:
+        record_error("load", source="ohclv")
         logger.exception("Error while processing the OHCLV data load....")
 
 if __name__ == "__main__":
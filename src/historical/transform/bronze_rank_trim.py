@@ -6,6 +6,9 @@ import logging
 import datetime as dt
 from sqlalchemy import text
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_error
+from .silver_dedup import silver_transform,drop_tables,PROCESSED_TABLES
+from ...table_tasks import run_table_tasks,table_workers
 
 # loading data base password
 load_dotenv(dotenv_path='.env')
@@ -16,6 +19,7 @@ parser = argparse.ArgumentParser()
 parser.add_argument("--bulk",default = "config/bulk.yaml")
 args = parser.parse_args()
 
+@timed_stage("transform", source="bronze_rank_trim")
 def add_rank_trim():
 
     #logging module configuration
@@ -44,132 +48,153 @@ def add_rank_trim():
         engine, session = get_engine_session(db_name,user_name,host,port,db_pass)
         logger.info("Successfully connected to the Bronze Database in MySql Server....")
 
-        # ranking the stock market data to deduplicate in silver layer and trimming the string fields
-        try:
+        # single pass : silver_load dedups straight from bronze, the processed copies are only dropped
+        if silver_transform(bulk_config) == "single_pass":
+            with engine.begin() as conn:
+                drop_tables(conn, db_name, PROCESSED_TABLES)
+            logger.info("single pass silver transform, dropped the processed tables instead of building them....")
+            return
 
-            with engine.connect() as conn:
+        def build_ohclv_processed():
+            # ranking the stock market data to deduplicate in silver layer and trimming the string fields
+            try:
 
-                conn.execute(text("""DROP TABLE IF EXISTS bronze.ohclv_processed"""))
+                with engine.connect() as conn:
 
-                logger.info("ohclv_processed table dropped successfully in the Bronze layer....")
+                    conn.execute(text("""DROP TABLE IF EXISTS bronze.ohclv_processed"""))
 
-                conn.execute(text("""
+                    logger.info("ohclv_processed table dropped successfully in the Bronze layer....")
+
+                    conn.execute(text("""
                 
-                CREATE TABLE bronze.ohclv_processed AS
-                SELECT 
-                    id AS stock_id,
-                    TRIM(ticker) AS ticker,
-                    date,
-                    open,
-                    high,
-                    low,
-                    close,
-                    volume,
-                    ROW_NUMBER() OVER(PARTITION BY ticker,date) AS rank_assigned
-                FROM bronze.ohclv_bronze
+                    CREATE TABLE bronze.ohclv_processed AS
+                    SELECT 
+                        id AS stock_id,
+                        TRIM(ticker) AS ticker,
+                        date,
+                        open,
+                        high,
+                        low,
+                        close,
+                        volume,
+                        ROW_NUMBER() OVER(PARTITION BY ticker,date) AS rank_assigned
+                    FROM bronze.ohclv_bronze
                     
-                """))
-
-            logger.info("created new table - ohclv data processed successfully in the Bronze layer....")
-
-        except Exception as e:
-            logger.exception("Error while processing stock market data...")
+                    """))
 
+                logger.info("created new table - ohclv data processed successfully in the Bronze layer....")
 
+            except Exception as e:
+                record_error("transform", source="ohclv_processed")
+                logger.exception("Error while processing stock market data...")
 
-        # ranking company metadata and trimming the string fields
+        def build_company_meta_data_processed():
+            # ranking company metadata and trimming the string fields
 
-        try:
+            try:
 
-            with engine.connect() as conn:
+                with engine.connect() as conn:
 
-                conn.execute(text("""DROP TABLE IF EXISTS bronze.company_meta_data_processed"""))
-                logger.info("company_meta_data_processed table dropped successfully in the Bronze layer....")
+                    conn.execute(text("""DROP TABLE IF EXISTS bronze.company_meta_data_processed"""))
+                    logger.info("company_meta_data_processed table dropped successfully in the Bronze layer....")
 
-                conn.execute(text("""
+                    conn.execute(text("""
                 
-                CREATE TABLE bronze.company_meta_data_processed AS
-                SELECT
-                    company_id,
-                    TRIM(company_name) AS company_name,
-                    TRIM(ticker) AS ticker,
-                    price,
-                    market_cap,
-                    TRIM(sector) AS sector,
-                    TRIM(industry) AS industry,
-                    ROW_NUMBER() OVER(PARTITION BY ticker) AS rank_assigned
-                FROM bronze.company_meta_data_bronze
+                    CREATE TABLE bronze.company_meta_data_processed AS
+                    SELECT
+                        company_id,
+                        TRIM(company_name) AS company_name,
+                        TRIM(ticker) AS ticker,
+                        price,
+                        market_cap,
+                        TRIM(sector) AS sector,
+                        TRIM(industry) AS industry,
+                        ROW_NUMBER() OVER(PARTITION BY ticker ORDER BY company_id DESC) AS rank_assigned
+                    FROM bronze.company_meta_data_bronze
                     
                 
-                """))
+                    """))
 
-            logger.info("created new table - company_meta data processed successfully in the Bronze layer....")
-        except Exception as e:
-            logger.exception("Error while processing company meta data....")
+                logger.info("created new table - company_meta data processed successfully in the Bronze layer....")
+            except Exception as e:
+                record_error("transform", source="company_meta_data_processed")
+                logger.exception("Error while processing company meta data....")
 
-        # ranking the exchange rate data to dedup in silver layer
+        def build_exchange_rates_processed():
+            # ranking the exchange rate data to dedup in silver layer
 
-        try:
+            try:
 
-            with engine.connect() as conn:
+                with engine.connect() as conn:
 
-                conn.execute(text("""DROP TABLE IF EXISTS bronze.exchange_rates_processed"""))
+                    conn.execute(text("""DROP TABLE IF EXISTS bronze.exchange_rates_processed"""))
 
-                logger.info("exchange_rates_processed table dropped successfully in the Bronze layer....")
+                    logger.info("exchange_rates_processed table dropped successfully in the Bronze layer....")
 
-                conn.execute(text("""
+                    conn.execute(text("""
                 
-                CREATE TABLE bronze.exchange_rates_processed AS
-                SELECT
-                    id AS rate_id,
-                    DATE(date) AS date,
-                    inr_rate,
-                    usd_amount,
-                    ROW_NUMBER() OVER(PARTITION BY date) AS rank_assigned
-                FROM bronze.exchange_rates_bronze
+                    CREATE TABLE bronze.exchange_rates_processed AS
+                    SELECT
+                        id AS rate_id,
+                        DATE(date) AS date,
+                        inr_rate,
+                        usd_amount,
+                        ROW_NUMBER() OVER(PARTITION BY date) AS rank_assigned
+                    FROM bronze.exchange_rates_bronze
                 
-                """))
+                    """))
 
-            logger.info("created new table - exchange_rates processed successfully in the Bronze layer....")
+                logger.info("created new table - exchange_rates processed successfully in the Bronze layer....")
 
-        except Exception as e:
-            logger.exception("Error while processing exchange rate data....")
+            except Exception as e:
+                record_error("transform", source="exchange_rates_processed")
+                logger.exception("Error while processing exchange rate data....")
 
+        def build_macro_economic_data_processed():
+            # adding rank and trimming text fields for the silver layer
+            try:
 
-        # adding rank and trimming text fields for the silver layer
-        try:
+                with engine.connect() as conn:
 
-            with engine.connect() as conn:
+                    conn.execute(text("""DROP TABLE IF EXISTS bronze.macro_economic_data_processed"""))
 
-                conn.execute(text("""DROP TABLE IF EXISTS bronze.macro_economic_data_processed"""))
+                    logger.info("macro_economic_data_processed table dropped successfully in the Bronze layer....")
 
-                logger.info("macro_economic_data_processed table dropped successfully in the Bronze layer....")
 
-
-                conn.execute(text("""
+                    conn.execute(text("""
                 
-                CREATE TABLE bronze.macro_economic_data_processed AS
-                SELECT
-                    id AS data_id,
-                    TRIM(country_name) AS country_name,
-                    TRIM(country_id) AS country_code,
-                    year,
-                    nominal_gdp,
-                    real_gdp,
-                    inflation,
-                    unemployment,
-                    ROW_NUMBER() OVER(PARTITION BY country_id,year) AS rank_assigned
-                FROM bronze.macro_economic_data_bronze
+                    CREATE TABLE bronze.macro_economic_data_processed AS
+                    SELECT
+                        id AS data_id,
+                        TRIM(country_name) AS country_name,
+                        TRIM(country_id) AS country_code,
+                        year,
+                        nominal_gdp,
+                        real_gdp,
+                        inflation,
+                        unemployment,
+                        ROW_NUMBER() OVER(PARTITION BY country_id,year) AS rank_assigned
+                    FROM bronze.macro_economic_data_bronze
                     
-                """))
+                    """))
+
+                logger.info("created new table - macro economic data processed successfully in the Bronze layer....")
 
-            logger.info("created new table - macro economic data processed successfully in the Bronze layer....")
+            except Exception as e:
+                record_error("transform", source="macro_economic_data_processed")
+                logger.exception("Error while processing macro economic data....")
 
-        except Exception as e:
-            logger.exception("Error while processing macro economic data....")
+        # independent per-table builds, transform_workers at a time on separate pooled connections
+        run_table_tasks({
+            "ohclv_processed": build_ohclv_processed,
+            "company_meta_data_processed": build_company_meta_data_processed,
+            "exchange_rates_processed": build_exchange_rates_processed,
+            "macro_economic_data_processed": build_macro_economic_data_processed,
+        }, table_workers(bulk_config), "transform", logger)
 
     except Exception as e:
-        print(e)
+        record_error("transform", source="bronze_rank_trim")
+        logger.exception("Error processing the bronze ranking and trimming...")
 
 
     runtime_datetime = dt.datetime.now()
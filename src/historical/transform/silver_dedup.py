@@ -0,0 +1,82 @@
+"""
+
+Single-pass bronze -> silver dedup
+
+    INSERT INTO silver.ohclv_silver (...) SELECT ... FROM {silver_source(bulk_config, "ohclv")}
+
+With silver_transform: single_pass the silver load reads bronze through one ROW_NUMBER() select per
+dataset (trim, rename and dedup in the same scan) straight into the schema-enforced silver tables.
+The chain (bronze.*_processed by rank_trim, silver.*_clean by silver_ddl, then the silver load) wrote
+every dataset three times, in single_pass mode those intermediates are dropped instead of rebuilt.
+silver_transform: chain keeps the old path, src/benchmarks/transform_bench.py compares the two.
+
+"""
+
+from sqlalchemy import text
+
+SILVER_TRANSFORMS = ("single_pass", "chain")
+
+# dataset -> (bronze table, select list, dedup partition, tie break, chain table in silver)
+# the tie break puts the latest loaded row first : change tracking appends a changed profile to
+# company_meta_data_bronze, and the silver load has to hand that one to the SCD2 merge
+DEDUP_SOURCES = {
+    "ohclv": (
+        "ohclv_bronze",
+        "id AS stock_id, TRIM(ticker) AS ticker, date, open, high, low, close, volume",
+        "TRIM(ticker), date", "id DESC", "ohclv_clean",
+    ),
+    "company_meta_data": (
+        "company_meta_data_bronze",
+        "company_id, TRIM(company_name) AS company_name, TRIM(ticker) AS ticker, price, market_cap, "
+        "TRIM(sector) AS sector, TRIM(industry) AS industry",
+        "TRIM(ticker)", "company_id DESC", "company_meta_data_clean",
+    ),
+    "macro_economic_data": (
+        "macro_economic_data_bronze",
+        "id AS data_id, TRIM(country_name) AS country_name, TRIM(country_id) AS country_code, year, "
+        "nominal_gdp, real_gdp, inflation, unemployment",
+        "country_id, year", "id DESC", "macro_economic_data_clean",
+    ),
+    "exchange_rates": (
+        "exchange_rates_bronze",
+        "id AS rate_id, CAST(date AS DATE) AS date, inr_rate, usd_amount",
+        "CAST(date AS DATE)", "id DESC", "exchange_rates_clean",
+    ),
+}
+
+# tables only the chain writes, dropped by the stage that used to build them
+PROCESSED_TABLES = ["ohclv_processed", "company_meta_data_processed", "exchange_rates_processed", "macro_economic_data_processed"]
+CLEAN_TABLES = [source[4] for source in DEDUP_SOURCES.values()]
+
+
+def silver_transform(bulk_config: dict) -> str:
+    mode = bulk_config.get("silver_transform", "single_pass")
+    if mode not in SILVER_TRANSFORMS:
+        raise ValueError(f"silver_transform must be one of {SILVER_TRANSFORMS}, got {mode!r}")
+    return mode
+
+
+def dedup_select(bronze: str, dataset: str) -> str:
+    """One row per natural key of the bronze table, the last loaded one, trimmed and renamed for silver"""
+    table, columns, partition, order, _ = DEDUP_SOURCES[dataset]
+    return f"""
+        SELECT * FROM (
+            SELECT {columns}, ROW_NUMBER() OVER(PARTITION BY {partition} ORDER BY {order}) AS rank_assigned
+            FROM {bronze}.{table}
+        ) ranked
+        WHERE rank_assigned = 1
+    """
+
+
+def silver_source(bulk_config: dict, dataset: str) -> str:
+    """What the silver load selects from : the dedup select over bronze, or the chain's clean table"""
+    bronze, silver = bulk_config["dbname"][0], bulk_config["dbname"][1]
+    if silver_transform(bulk_config) == "chain":
+        return f"{silver}.{DEDUP_SOURCES[dataset][4]}"
+    return f"({dedup_select(bronze, dataset)}) AS deduped"
+
+
+def drop_tables(conn, schema: str, tables: list) -> None:
+    for table in tables:
+        conn.execute(text(f"DROP TABLE IF EXISTS {schema}.{table}"))
+
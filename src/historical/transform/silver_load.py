@@ -2,10 +2,14 @@ import os
 from dotenv import load_dotenv
 import argparse
 from sqlalchemy import text
-from ...utils import mysql_connect_create_db,load_yml,get_engine_session
+from ...utils import mysql_connect_create_db,load_yml,get_analytics_engine,analytics_backend,scd2_merge,META_CDC_FIELDS,upsert_clause
 import datetime as dt
 import logging
 from ...logger import setup_logging
+from ...fx_calendar import update_fx_calendar
+from ...metrics import timed_stage,record_error
+from ...table_tasks import run_table_tasks,table_workers
+from .silver_dedup import silver_source,silver_transform
 
 #loading the database password
 load_dotenv(dotenv_path=".env")
@@ -16,6 +20,7 @@ parser = argparse.ArgumentParser()
 parser.add_argument("--bulk", default = "config/bulk.yaml")
 args = parser.parse_args()
 
+@timed_stage("transform", source="silver_load")
 def silver_load():
 
     #logging configuration
@@ -30,6 +35,7 @@ def silver_load():
     bulk_config = load_yml(args.bulk)
     # initializing the config variables
     dbname = bulk_config["dbname"][1]
+    dbname_bronze = bulk_config["dbname"][0]
     username = bulk_config["user_name"]
     host = bulk_config["host"]
     port = bulk_config["port"]
@@ -45,73 +51,69 @@ def silver_load():
     # loading block
     try:
 
-        engine,_ = get_engine_session(dbname, username, host, port, db_pass)
-        logger.info("Starting silver layer load into schema enforced tables....")
+        engine = get_analytics_engine(bulk_config, dbname, db_pass)
+        logger.info(f"Starting silver layer load into schema enforced tables on {analytics_backend(bulk_config)}....")
+        # single_pass dedups bronze inside each insert, chain reads the *_clean tables
+        logger.info(f"Silver transform : {silver_transform(bulk_config)}....")
 
-        # ohclv data load
-        try:
-            with engine.begin() as conn:
+        def build_ohclv_silver():
+            # ohclv data load
+            try:
+                with engine.begin() as conn:
 
-                conn.execute(text(f"TRUNCATE TABLE {dbname}.ohclv_silver"))
-                logger.info("ohclv_silver table truncated, starting the load")
-                conn.execute(text(f"""
+                    conn.execute(text(f"TRUNCATE TABLE {dbname}.ohclv_silver"))
+                    logger.info("ohclv_silver table truncated, starting the load")
+                    conn.execute(text(f"""
                     
-                    INSERT INTO {dbname}.ohclv_silver (ticker,date,open,high,low,close,volume,insert_datetime) 
-                    SELECT 
-                        ticker,
-                        date,
-                        open,
-                        high,
-                        low,
-                        close,
-                        volume,
-                        '{insert_ts}'
-                    FROM {dbname}.ohclv_clean
+                        INSERT INTO {dbname}.ohclv_silver (ticker,date,open,high,low,close,volume,insert_datetime) 
+                        SELECT 
+                            ticker,
+                            date,
+                            open,
+                            high,
+                            low,
+                            close,
+                            volume,
+                            '{insert_ts}'
+                        FROM {silver_source(bulk_config, "ohclv")}
             
-                """))
-                logger.info("ohclv_silver tabled data loaded successfully....")
-        except Exception as e:
-            logger.exception("Failed to insert ohclv_silver table")
-
-        try:
-
-            with engine.begin() as conn:
-                conn.execute(text(f"""TRUNCATE TABLE {dbname}.company_meta_data_silver"""))
-                logger.info("company_meta_data_silver table truncated, starting the load")
-                conn.execute(text(f"""INSERT INTO {dbname}.company_meta_data_silver (
-                
-                company_name, ticker, price, market_cap, sector, industry
-                
-                ) SELECT
-                    company_name,
-                    ticker,
-                    price,
-                    market_cap,
-                    sector,
-                    industry
-                FROM {dbname}.company_meta_data_clean
-                
-                """))
-                logger.info("company_meta_data_silver loaded successfully....")
-        except Exception as e:
-            logger.exception("Failed to insert company_meta_data_silver")
-
-        try:
-
-            with engine.begin() as conn:
-                conn.execute(text(f"""TRUNCATE TABLE {dbname}.macro_economic_data_silver"""))
-                logger.info("macro_economic_data_silver table truncated, starting the load")
-                conn.execute(text(f"""INSERT INTO {dbname}.macro_economic_data_silver (
+                    """))
+                    logger.info("ohclv_silver tabled data loaded successfully....")
+            except Exception as e:
+                record_error("transform", source="ohclv_silver")
+                logger.exception("Failed to insert ohclv_silver table")
+
+        def build_company_meta_data_silver():
+            try:
+
+                with engine.begin() as conn:
+                    # type 2 dimension : no truncate, only companies whose profile hash changed get a new version
+                    rows = [dict(r) for r in conn.execute(text(f"""SELECT
+                        company_name,
+                        ticker,
+                        price,
+                        market_cap,
+                        sector,
+                        industry
+                    FROM {silver_source(bulk_config, "company_meta_data")}
                 
-                country_name,
-                country_code,
-                year,
-                nominal_gdp,
-                real_gdp,
-                inflation,
-                unemployment
+                    """)).mappings()]
+                    versions = scd2_merge(conn, f"{dbname}.company_meta_data_silver", "ticker", rows,
+                                          bulk_config.get("meta_cdc_fields", META_CDC_FIELDS), insert_ts)
+                    logger.info(f"{versions} of {len(rows)} companies got a new company_meta_data_silver version....")
+                    logger.info("company_meta_data_silver loaded successfully....")
+            except Exception as e:
+                record_error("transform", source="company_meta_data_silver")
+                logger.exception("Failed to insert company_meta_data_silver")
+
+        def build_macro_economic_data_silver():
+            try:
+
+                with engine.begin() as conn:
+                    conn.execute(text(f"""TRUNCATE TABLE {dbname}.macro_economic_data_silver"""))
+                    logger.info("macro_economic_data_silver table truncated, starting the load")
+                    conn.execute(text(f"""INSERT INTO {dbname}.macro_economic_data_silver (
                 
-                ) SELECT
                     country_name,
                     country_code,
                     year,
@@ -119,36 +121,81 @@ def silver_load():
                     real_gdp,
                     inflation,
                     unemployment
-                FROM {dbname}.macro_economic_data_clean
                 
-                """))
-                logger.info("macro_economic_data_silver table loaded successfully....")
-
-        except Exception as e:
-            logger.exception("Failed to insert macro_economic_data_clean")
-
-        try:
-            with engine.begin() as conn:
-                conn.execute(text(f"TRUNCATE TABLE {dbname}.exchange_rates_silver"))
-                logger.info("exchange_rates_silver table truncated, starting the load")
-                conn.execute(text(f"""INSERT INTO {dbname}.exchange_rates_silver (
-                date, inr_rate, usd_amount,insert_datetime
-                )
-                SELECT
-                    date,
-                    inr_rate,
-                    usd_amount,
-                    '{insert_ts}'
-                FROM {dbname}.exchange_rates_clean
-                """))
-                logger.info("exchange_rates_silver loaded successfully....")
-        except Exception as e:
-            logger.exception("Failed to insert exchange_rates_silver")
+                    ) SELECT
+                        country_name,
+                        country_code,
+                        year,
+                        nominal_gdp,
+                        real_gdp,
+                        inflation,
+                        unemployment
+                    FROM {silver_source(bulk_config, "macro_economic_data")}
+                
+                    """))
+                    logger.info("macro_economic_data_silver table loaded successfully....")
+
+            except Exception as e:
+                record_error("transform", source="macro_economic_data_silver")
+                logger.exception("Failed to insert macro_economic_data_clean")
+
+        def build_exchange_rates_silver():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"TRUNCATE TABLE {dbname}.exchange_rates_silver"))
+                    logger.info("exchange_rates_silver table truncated, starting the load")
+                    conn.execute(text(f"""INSERT INTO {dbname}.exchange_rates_silver (
+                    date, inr_rate, usd_amount,insert_datetime
+                    )
+                    SELECT
+                        date,
+                        inr_rate,
+                        usd_amount,
+                        '{insert_ts}'
+                    FROM {silver_source(bulk_config, "exchange_rates")}
+                    """))
+                    logger.info("exchange_rates_silver loaded successfully....")
+            except Exception as e:
+                record_error("transform", source="exchange_rates_silver")
+                logger.exception("Failed to insert exchange_rates_silver")
+
+        def build_fx_rates_silver():
+            try:
+                # bronze already holds one row per date and pair, the upsert keeps earlier history
+                with engine.begin() as conn:
+                    conn.execute(text(f"""INSERT INTO {dbname}.fx_rates_silver (
+                    date, base, quote, rate, insert_datetime
+                    )
+                    SELECT
+                        date,
+                        base,
+                        quote,
+                        rate,
+                        '{insert_ts}'
+                    FROM {dbname_bronze}.fx_rates_bronze
+                    {upsert_clause(analytics_backend(bulk_config), ["date", "base", "quote"], ["rate", "insert_datetime"])}
+                    """))
+                    logger.info("fx_rates_silver loaded successfully....")
+                    since, filled = update_fx_calendar(conn, dbname)
+                    logger.info(f"fx_rates_calendar rewrote {filled} rows from {since}....")
+            except Exception as e:
+                record_error("transform", source="fx_rates_silver")
+                logger.exception("Failed to insert fx_rates_silver")
+
+        # independent per-table builds, transform_workers at a time on separate pooled connections
+        run_table_tasks({
+            "ohclv_silver": build_ohclv_silver,
+            "company_meta_data_silver": build_company_meta_data_silver,
+            "macro_economic_data_silver": build_macro_economic_data_silver,
+            "exchange_rates_silver": build_exchange_rates_silver,
+            "fx_rates_silver": build_fx_rates_silver,
+        }, table_workers(bulk_config, analytics_backend(bulk_config)), "transform", logger)
 
         runtime_end = dt.datetime.now()
         logger.info("Silver layer data loaded successfully....")
         logger.info(f"Runtime in - {runtime_end - runtime_start}")
     except Exception as e:
+        record_error("transform", source="silver_load")
         logger.exception("Error processing the silver load...")
         print(e)
 
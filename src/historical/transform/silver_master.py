@@ -1,11 +1,14 @@
 import logging
 import argparse
-from ...utils import mysql_connect_create_db,load_yml,get_engine_session
+from ...utils import mysql_connect_create_db,load_yml,get_analytics_engine,analytics_backend,create_schema_sql,surrogate_key,unique_key
 from dotenv import load_dotenv
 import os
-from sqlalchemy import text
+from sqlalchemy import text, inspect
 import datetime as dt
 from ...logger import setup_logging
+from ...metrics import timed_stage,record_error
+from ...table_tasks import run_table_tasks,table_workers
+from .silver_dedup import silver_transform
 
 # loading the db password
 load_dotenv(dotenv_path=".env")
@@ -16,6 +19,7 @@ parser.add_argument("--bulk", default = 'config/bulk.yaml')
 args = parser.parse_args()
 
 
+@timed_stage("transform", source="silver_ddl")
 def silver_ddl():
 
     #logging configuration
@@ -37,6 +41,12 @@ def silver_ddl():
     # silver db name
     dbname_silver = bulk_config["dbname"][1]
 
+    # silver / gold store : mysql or duckdb, bronze always stays on MySQL
+    backend = analytics_backend(bulk_config)
+
+    # the *_clean copies are only built for the chain transform, the drops run either way
+    chain = silver_transform(bulk_config) == "chain"
+
     # db pass
     db_pass = os.getenv("DB_PASS")
 
@@ -51,195 +61,290 @@ def silver_ddl():
     # working logic for silver layer
     try:
 
-        # getting the database engine for the bronze layer
-        engine, session = get_engine_session(dbname, username, host, port, db_pass)
+        # getting the database engine for the silver layer, bronze tables are read by their db name
+        engine = get_analytics_engine(bulk_config, dbname, db_pass)
+        logger.info(f"Using the {backend} backend for the silver layer....")
 
         try:
             # creating the silver db if not exist
-            with engine.connect() as conn:
-                conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {dbname_silver};"))
+            with engine.begin() as conn:
+                conn.execute(text(create_schema_sql(backend, dbname_silver)))
                 logger.info("Successfully silver DB created / silver DB exists...")
         except Exception as e:
+            record_error("transform", source="silver_ddl")
             logger.exception("Failed to create the database...")
 
-        # logical block to deduplicate the data from bronze layer and create clean table for ohclv
+        def build_ohclv_silver():
+            # logical block to deduplicate the data from bronze layer and create clean table for ohclv
 
-        try:
-            with engine.connect() as conn:
+            try:
+                with engine.begin() as conn:
 
-                conn.execute(text(f"DROP TABLE IF EXISTS {dbname_silver}.ohclv_clean"))
+                    conn.execute(text(f"DROP TABLE IF EXISTS {dbname_silver}.ohclv_clean"))
 
-                logger.info("Successfully dropped the ochlv_clean table...")
+                    logger.info("Successfully dropped the ochlv_clean table...")
 
-                conn.execute(text(f"""
+                    # chain only, single pass loads silver straight from bronze (silver_dedup.py)
+                    if chain:
+                        conn.execute(text(f"""
                 
-                CREATE TABLE {dbname_silver}.ohclv_clean AS
-                SELECT
-                    stock_id,
-                    ticker,
-                    date,
-                    open,
-                    high,
-                    low,
-                    close,
-                    volume
-                FROM {dbname}.ohclv_processed
-                WHERE rank_assigned = 1
+                        CREATE TABLE {dbname_silver}.ohclv_clean AS
+                        SELECT
+                            stock_id,
+                            ticker,
+                            date,
+                            open,
+                            high,
+                            low,
+                            close,
+                            volume
+                        FROM {dbname}.ohclv_processed
+                        WHERE rank_assigned = 1
                 
-                """))
+                        """))
 
-                logger.info("Successfully created the ohclv_clean table...")
+                        logger.info("Successfully created the ohclv_clean table...")
 
-                conn.execute(text(f"""
+                    # auto increment key, a sequence backs it on duckdb
+                    stock_key = surrogate_key(conn, backend, f"{dbname_silver}.ohclv_silver", "stock_id")
 
-                CREATE TABLE IF NOT EXISTS {dbname_silver}.ohclv_silver (
+                    conn.execute(text(f"""
+
+                    CREATE TABLE IF NOT EXISTS {dbname_silver}.ohclv_silver (
                         
-                        stock_id INT AUTO_INCREMENT PRIMARY KEY,
-                        ticker VARCHAR(10) NOT NULL,
-                        date DATE NOT NULL,
-                        open DECIMAL(6,2) NOT NULL,
-                        high DECIMAL(6,2) NOT NULL,
-                        low DECIMAL(6,2) NOT NULL,
-                        close DECIMAL(6,2) NOT NULL,
-                        volume BIGINT NOT NULL,
-                        insert_datetime DATE NOT NULL,
-                        UNIQUE KEY uq_ticker_date (ticker, date)
+                            {stock_key},
+                            ticker VARCHAR(10) NOT NULL,
+                            date DATE NOT NULL,
+                            open DECIMAL(6,2) NOT NULL,
+                            high DECIMAL(6,2) NOT NULL,
+                            low DECIMAL(6,2) NOT NULL,
+                            close DECIMAL(6,2) NOT NULL,
+                            volume BIGINT NOT NULL,
+                            insert_datetime DATE NOT NULL,
+                            {unique_key(backend, "uq_ticker_date", ["ticker", "date"])}
             
-                    )
-                """))
+                        )
+                    """))
 
-                logger.info("Successfully created the ohclv_silver table with schema enforced...")
+                    logger.info("Successfully created the ohclv_silver table with schema enforced...")
 
-        except Exception as e:
-            logger.exception("error processing the ohclv table load for silver...")
+            except Exception as e:
+                record_error("transform", source="ohclv_clean")
+                logger.exception("error processing the ohclv table load for silver...")
 
-        try:
+        def build_company_meta_data_silver():
+            try:
 
-            with engine.connect() as conn:
-                conn.execute(text(f"""DROP TABLE IF EXISTS {dbname_silver}.company_meta_data_clean"""))
-                logger.info("Successfully dropped the company_meta_data_clean table...")
+                with engine.begin() as conn:
+                    conn.execute(text(f"""DROP TABLE IF EXISTS {dbname_silver}.company_meta_data_clean"""))
+                    logger.info("Successfully dropped the company_meta_data_clean table...")
 
-                conn.execute(text(f"""
+                    # chain only, single pass loads silver straight from bronze (silver_dedup.py)
+                    if chain:
+                        conn.execute(text(f"""
                     
-                    CREATE TABLE {dbname_silver}.company_meta_data_clean AS
-                    SELECT
-                        company_id,
-                        company_name,
-                        ticker,
-                        price,
-                        market_cap,
-                        sector,
-                        industry
-                    FROM {dbname}.company_meta_data_processed
-                    WHERE rank_assigned = 1
+                            CREATE TABLE {dbname_silver}.company_meta_data_clean AS
+                            SELECT
+                                company_id,
+                                company_name,
+                                ticker,
+                                price,
+                                market_cap,
+                                sector,
+                                industry
+                            FROM {dbname}.company_meta_data_processed
+                            WHERE rank_assigned = 1
                 
-                """))
+                        """))
+
+                        logger.info("Successfully created the company_meta_data_clean table...")
 
-                logger.info("Successfully created the company_meta_data_clean table...")
+                    # the pre-SCD table only ever held the last reload, it is rebuilt from bronze as version history
+                    if inspect(conn).has_table("company_meta_data_silver", schema=dbname_silver) and "is_current" not in {
+                            c["name"] for c in inspect(conn).get_columns("company_meta_data_silver", schema=dbname_silver)}:
+                        conn.execute(text(f"DROP TABLE {dbname_silver}.company_meta_data_silver"))
+                        logger.info("Dropped the snapshot company_meta_data_silver table for the type 2 dimension....")
 
-                conn.execute(text(f"""
+                    company_key = surrogate_key(conn, backend, f"{dbname_silver}.company_meta_data_silver", "company_id")
+
+                    conn.execute(text(f"""
                 
-                CREATE TABLE IF NOT EXISTS {dbname_silver}.company_meta_data_silver (
+                    CREATE TABLE IF NOT EXISTS {dbname_silver}.company_meta_data_silver (
                 
-                    company_id INT AUTO_INCREMENT PRIMARY KEY,
-                    company_name VARCHAR(100) NOT NULL,
-                    ticker VARCHAR(10) NOT NULL,
-                    price DECIMAL(6,2) NOT NULL,
-                    market_cap BIGINT NOT NULL,
-                    sector VARCHAR(50) NOT NULL,
-                    industry VARCHAR(50) NOT NULL
+                        {company_key},
+                        company_name VARCHAR(100) NOT NULL,
+                        ticker VARCHAR(10) NOT NULL,
+                        price DECIMAL(6,2) NOT NULL,
+                        market_cap BIGINT NOT NULL,
+                        sector VARCHAR(50) NOT NULL,
+                        industry VARCHAR(50) NOT NULL,
+                        row_hash CHAR(64) NOT NULL,
+                        valid_from DATE NOT NULL,
+                        valid_to DATE NOT NULL,
+                        is_current BOOLEAN NOT NULL,
+                        {unique_key(backend, "uq_ticker_valid_from", ["ticker", "valid_from"])}
                     
-                )
+                    )
                 
-                """))
+                    """))
 
-                logger.info("Successfully created the company_meta_data_silver table with schema enforced....")
+                    logger.info("Successfully created the company_meta_data_silver type 2 dimension with schema enforced....")
 
-        except Exception as e:
-            logger.exception("error processing the company meta data table load for silver...")
+            except Exception as e:
+                record_error("transform", source="company_meta_data_clean")
+                logger.exception("error processing the company meta data table load for silver...")
 
-        try:
-            with engine.connect() as conn:
-                conn.execute(text(f"""DROP TABLE IF EXISTS {dbname_silver}.macro_economic_data_clean"""))
-                logger.info("Successfully dropped the macro_economic_data_clean table....")
+        def build_macro_economic_data_silver():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"""DROP TABLE IF EXISTS {dbname_silver}.macro_economic_data_clean"""))
+                    logger.info("Successfully dropped the macro_economic_data_clean table....")
 
-                conn.execute(text(f"""
+                    # chain only, single pass loads silver straight from bronze (silver_dedup.py)
+                    if chain:
+                        conn.execute(text(f"""
                 
-                    CREATE TABLE {dbname_silver}.macro_economic_data_clean AS
-                    SELECT
-                        data_id,
-                        country_name,
-                        country_code,
-                        year,
-                        nominal_gdp,
-                        real_gdp,
-                        inflation,
-                        unemployment
-                    FROM {dbname}.macro_economic_data_processed
-                    WHERE rank_assigned = 1
+                            CREATE TABLE {dbname_silver}.macro_economic_data_clean AS
+                            SELECT
+                                data_id,
+                                country_name,
+                                country_code,
+                                year,
+                                nominal_gdp,
+                                real_gdp,
+                                inflation,
+                                unemployment
+                            FROM {dbname}.macro_economic_data_processed
+                            WHERE rank_assigned = 1
                 
-                """))
+                        """))
+
+                        logger.info("Successfully created the macro_economic_data_clean table...")
 
-                logger.info("Successfully created the macro_economic_data_clean table...")
+                    data_key = surrogate_key(conn, backend, f"{dbname_silver}.macro_economic_data_silver", "data_id")
 
-                conn.execute(text(f"""CREATE TABLE IF NOT EXISTS {dbname_silver}.macro_economic_data_silver (
+                    conn.execute(text(f"""CREATE TABLE IF NOT EXISTS {dbname_silver}.macro_economic_data_silver (
                 
-                    data_id INT AUTO_INCREMENT PRIMARY KEY,
-                    country_name VARCHAR(50) NOT NULL,
-                    country_code VARCHAR(25) NOT NULL,
-                    year INT NOT NULL,
-                    nominal_gdp FLOAT NOT NULL,
-                    real_gdp FLOAT NOT NULL,
-                    inflation FLOAT NOT NULL,
-                    unemployment FLOAT NOT NULL
-                )
-                """))
-
-                logger.info("Successfully created the macro_economic_data_silver table with schema enforced....")
+                        {data_key},
+                        country_name VARCHAR(50) NOT NULL,
+                        country_code VARCHAR(25) NOT NULL,
+                        year INT NOT NULL,
+                        nominal_gdp FLOAT NOT NULL,
+                        real_gdp FLOAT NOT NULL,
+                        inflation FLOAT NOT NULL,
+                        unemployment FLOAT NOT NULL
+                    )
+                    """))
+
+                    logger.info("Successfully created the macro_economic_data_silver table with schema enforced....")
+
+            except Exception as e:
+                record_error("transform", source="macro_economic_data_clean")
+                logger.exception("error processing the macro_economic_data table load for silver...")
+
+        def build_exchange_rates_silver():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"""DROP TABLE IF EXISTS {dbname_silver}.exchange_rates_clean"""))
+                    logger.info("Successfully dropped the exchange_rates_clean table...")
+                    # chain only, single pass loads silver straight from bronze (silver_dedup.py)
+                    if chain:
+                        conn.execute(text(f"""
+                    
+                            CREATE TABLE {dbname_silver}.exchange_rates_clean AS
+                            SELECT
+                                rate_id,
+                                date,
+                                inr_rate,
+                                usd_amount
+                            FROM {dbname}.exchange_rates_processed
+                            WHERE rank_assigned = 1
+                    
+                        """))
+                        logger.info("Successfully created the exchange_rates_clean table...")
 
-        except Exception as e:
-            logger.exception("error processing the macro_economic_data table load for silver...")
+                    rate_key = surrogate_key(conn, backend, f"{dbname_silver}.exchange_rates_silver", "rate_id")
 
-        try:
-            with engine.connect() as conn:
-                conn.execute(text(f"""DROP TABLE IF EXISTS {dbname_silver}.exchange_rates_clean"""))
-                logger.info("Successfully dropped the exchange_rates_clean table...")
-                conn.execute(text(f"""
+                    conn.execute(text(f"""
+                
+                        CREATE TABLE IF NOT EXISTS {dbname_silver}.exchange_rates_silver (
+                    
+                        {rate_key},
+                        date DATE NOT NULL,
+                        inr_rate FLOAT NOT NULL,
+                        usd_amount SMALLINT NOT NULL,
+                        insert_datetime DATE NOT NULL,
+                        {unique_key(backend, "uq_exchange_rate", ["date"])}
+                                       
+                        )
+                
+                    """))
+
+                    logger.info("Successfully created the exchange_rates_silver table with schema enforced....")
+
+            except Exception as e:
+                record_error("transform", source="exchange_rates_clean")
+                logger.info("error processing the exchange_rate_data table load for silver...")
+
+        def build_fx_rates_silver():
+            try:
+                with engine.begin() as conn:
+
+                    fx_key = surrogate_key(conn, backend, f"{dbname_silver}.fx_rates_silver", "fx_id")
+
+                    # narrow rates, a new currency is new rows and never a schema change
+                    conn.execute(text(f"""
+                
+                        CREATE TABLE IF NOT EXISTS {dbname_silver}.fx_rates_silver (
                     
-                    CREATE TABLE {dbname_silver}.exchange_rates_clean AS
-                    SELECT
-                        rate_id,
-                        date,
-                        inr_rate,
-                        usd_amount
-                    FROM {dbname}.exchange_rates_processed
-                    WHERE rank_assigned = 1
+                        {fx_key},
+                        date DATE NOT NULL,
+                        base VARCHAR(3) NOT NULL,
+                        quote VARCHAR(3) NOT NULL,
+                        rate DOUBLE NOT NULL,
+                        insert_datetime DATE NOT NULL,
+                        {unique_key(backend, "uq_fx_date_base_quote", ["date", "base", "quote"])}
                     
-                """))
-                logger.info("Successfully created the exchange_rates_clean table...")
+                        )
+                
+                    """))
+
+                    logger.info("Successfully created the fx_rates_silver table with schema enforced....")
 
-                conn.execute(text(f"""
+                    # every calendar day per pair, forward filled from the last published rate
+                    conn.execute(text(f"""
                 
-                    CREATE TABLE IF NOT EXISTS {dbname_silver}.exchange_rates_silver (
+                        CREATE TABLE IF NOT EXISTS {dbname_silver}.fx_rates_calendar (
                     
-                    rate_id INT AUTO_INCREMENT PRIMARY KEY,
-                    date DATE NOT NULL,
-                    inr_rate FLOAT NOT NULL,
-                    usd_amount SMALLINT NOT NULL,
-                    insert_datetime DATE NOT NULL,
-                    UNIQUE KEY uq_exchange_rate (date)
-                                       
-                    )
+                        date DATE NOT NULL,
+                        base VARCHAR(3) NOT NULL,
+                        quote VARCHAR(3) NOT NULL,
+                        rate DOUBLE NOT NULL,
+                        rate_date DATE NOT NULL,
+                        {unique_key(backend, "uq_fx_calendar", ["date", "base", "quote"])}
+                    
+                        )
                 
-                """))
+                    """))
 
-                logger.info("Successfully created the exchange_rates_silver table with schema enforced....")
+                    logger.info("Successfully created the fx_rates_calendar table with schema enforced....")
 
-        except Exception as e:
-            logger.info("error processing the exchange_rate_data table load for silver...")
+            except Exception as e:
+                record_error("transform", source="fx_rates_silver")
+                logger.exception("error processing the fx_rates_silver table for silver...")
+
+        # independent per-table builds, transform_workers at a time on separate pooled connections
+        run_table_tasks({
+            "ohclv_silver": build_ohclv_silver,
+            "company_meta_data_silver": build_company_meta_data_silver,
+            "macro_economic_data_silver": build_macro_economic_data_silver,
+            "exchange_rates_silver": build_exchange_rates_silver,
+            "fx_rates_silver": build_fx_rates_silver,
+        }, table_workers(bulk_config, backend), "transform", logger)
 
     except Exception as e:
-        print(e)
+        record_error("transform", source="silver_ddl")
+        logger.exception("Error processing the silver DDL...")
 
     runtime_end = dt.datetime.now()
     logger.info("Successfully finished loading the data from bronze to silver and created schema enforced tables...")
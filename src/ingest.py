@@ -0,0 +1,118 @@
+"""
+
+Typed reads of the landing CSVs : pyarrow CSV engine with an explicit schema per source
+
+    df = read_landing(path, "ohclv")                  # whole file
+    for chunk in iter_landing(path, "ohclv", 50000):  # streamed, see utils.landing_chunks
+
+Tickers and other repeated labels become pandas categoricals, dates are date32 and
+prices float32 (the bronze FLOAT columns are single precision anyway), the other
+columns are Arrow-backed. Values come out of iterrows / to_dict as plain Python
+objects, so the ORM and to_sql paths in the loaders take them unchanged.
+
+"""
+
+from typing import Callable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+LABEL = pa.dictionary(pa.int32(), pa.string())
+PRICE = pa.float32()
+
+OHCLV_SCHEMA = {
+    "Date": pa.date32(),
+    "CLOSE": PRICE,
+    "HIGH": PRICE,
+    "LOW": PRICE,
+    "OPEN": PRICE,
+    "VOLUME": pa.int64(),
+    "COMPANY_TICKER": LABEL,
+}
+
+LANDING_SCHEMAS = {
+    "ohclv": OHCLV_SCHEMA,
+    "ohclv_daily": OHCLV_SCHEMA,
+    "company_meta": {
+        "companyName": pa.string(),
+        "symbol": LABEL,
+        "price": PRICE,
+        "marketCap": pa.int64(),
+        "sector": LABEL,
+        "industry": LABEL,
+    },
+    "exchange_rate": {
+        "Date": pa.date32(),
+        "INR_amount": PRICE,
+        "USD_rate": pa.float32(),
+    },
+    "exchange_rate_daily": {
+        "date": pa.date32(),
+        "inr_rate": PRICE,
+        "USD_rate": pa.int64(),
+    },
+    # JPY / IDR style rates need the digits, rates stay float64
+    "fx_rates": {
+        "date": pa.date32(),
+        "base": LABEL,
+        "quote": LABEL,
+        "rate": pa.float64(),
+    },
+    # GDP levels run past float32 precision, they stay float64
+    "macro_data": {
+        "ISO3": LABEL,
+        "countryname": LABEL,
+        "year": pa.int64(),
+        "id": LABEL,
+        "NOMINAL_GDP": pa.float64(),
+        "REAL_GDP": pa.float64(),
+        "INFLATION": pa.float64(),
+        "UNEMPLOYMENT": pa.float64(),
+    },
+}
+
+
+def _convert_options(source: str) -> pacsv.ConvertOptions:
+    if source not in LANDING_SCHEMAS:
+        raise ValueError(f"no landing schema for source {source!r}, expected one of {list(LANDING_SCHEMAS)}")
+    schema = LANDING_SCHEMAS[source]
+    return pacsv.ConvertOptions(column_types=schema, include_columns=list(schema), strings_can_be_null=True)
+
+
+def _types_mapper(arrow_type: pa.DataType):
+    # dictionaries fall through to the default conversion, which gives pandas categoricals
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    return table.to_pandas(types_mapper=_types_mapper)
+
+
+def read_landing(path, source: str) -> pd.DataFrame:
+    """Whole landing file as a typed frame"""
+    return _to_frame(pacsv.read_csv(path, convert_options=_convert_options(source)))
+
+
+def iter_landing(path, source: str, chunk_rows: int | Callable[[pd.DataFrame], int]):
+    """
+    Stream a landing file as typed frames of chunk_rows rows. chunk_rows may be a callable that
+    gets a sample of the first block and returns the size, so memory budgets see the typed frame
+    """
+    reader = pacsv.open_csv(path, convert_options=_convert_options(source))
+    pending, pending_rows, size = [], 0, None
+
+    for batch in reader:
+        if size is None:
+            size = chunk_rows(_to_frame(pa.Table.from_batches([batch.slice(0, 1000)]))) if callable(chunk_rows) else chunk_rows
+
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= size:
+            table = pa.Table.from_batches(pending)
+            yield _to_frame(table.slice(0, size))
+            rest = table.slice(size)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+
+    if pending_rows:
+        yield _to_frame(pa.Table.from_batches(pending))
@@ -0,0 +1,80 @@
+"""
+
+Content-hashed landing writes and the daily no-op short-circuit
+
+    if not write_landing(df, folder / f"fx_rates_{ts}.csv"):
+        ...   # same bytes as the partition's latest file, nothing was written
+
+The loads always read the latest CSV of a partition, so skipping an identical write leaves them
+reading the same file. The daily stages keep their input digests in a RunState (landing_state_path) :
+load digests the day's latest landing files, validate and transform take the digest load recorded.
+A stage already done for the same digest is skipped, an unchanged re-run stops after the extract.
+
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from .checkpoint import RunState, fingerprint
+
+DAILY_STAGES = ["extract", "load", "validate", "transform"]
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def latest_landing(folder) -> Path | None:
+    """Latest CSV of a partition folder, the one the loads pick"""
+    files = list(Path(folder).glob("*.csv"))
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def write_landing(df: pd.DataFrame, path) -> bool:
+    """
+    Write df as CSV unless its bytes match the latest file of the same partition.
+    Returns False for the no-op. The write goes through a .tmp file so a load never sees half a CSV
+    """
+    path = Path(path)
+    data = df.to_csv(index=False).encode()
+
+    previous = latest_landing(path.parent)
+    if previous is not None and previous.stat().st_size == len(data) and file_hash(previous) == content_hash(data):
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".csv.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return True
+
+
+def landing_digest(roots: list, day) -> str:
+    """Digest of the latest file in every one of the day's partitions under roots, ticker folders included"""
+
+    partition = f"{day.year}/{day.strftime('%b')}/{day.strftime('%d')}"
+    latest = {}
+    for root in roots:
+        for folder in Path(root).glob(f"**/{partition}"):
+            file = latest_landing(folder)
+            if file is not None:
+                latest[folder.as_posix()] = file_hash(file)
+    return fingerprint(latest)
+
+
+def daily_state(bulk_config: dict) -> RunState:
+    return RunState(bulk_config.get("landing_state_path", "data/run_state/daily_landing.json"), DAILY_STAGES, resume=True)
+
+
+def upstream_fingerprint(state: RunState, stage: str = "load") -> str | None:
+    """Input digest the upstream stage last completed with, None while it has not completed"""
+    entry = state.stages.get(stage, {})
+    return entry.get("fingerprint") if entry.get("status") == "done" else None
@@ -1,97 +1,160 @@
 import logging
+import logging.handlers
 import datetime as dt
-
-def setup_logging():
-    """This is the central configuration function to control logging functionality"""
+import json
+import os
+import queue
+import atexit
+import contextvars
+from contextlib import contextmanager
+
+# <--- logger name to log file mapping, {run_ts} is filled with the run date --->
+LOG_FILES = {
+    'pipeline-historical': 'logs/pipeline/historical/pipeline_{run_ts}.log',
+    'bronze-validation': 'logs/validations/bronze/bronze_validation_{run_ts}.log',
+    'bronze-execution': 'logs/executions/bronze/bronze_execution_{run_ts}.log',
+    'silver-execution': 'logs/executions/silver/silver_execution_{run_ts}.log',
+    'gold-execution': 'logs/executions/gold/gold_execution_{run_ts}.log',
+    'daily-execution': 'logs/executions/daily/daily_execution_{run_ts}.log',
+    'daily-validation-execution': 'logs/validations/bronze_daily/daily_validation_{run_ts}.log',
+}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# structured fields attached to every record, set through log_context
+_context = contextvars.ContextVar('log_context', default={})
+
+_listener = None
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach stage / source / ticker fields to the records logged inside the block"""
+    merged = {**_context.get(), **{k: v for k, v in fields.items() if v is not None}}
+    token = _context.set(merged)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> dict:
+    """The stage / source / ticker fields of the enclosing log_context blocks"""
+    return dict(_context.get())
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the context fields on the record in the calling thread, before it is queued"""
+
+    def __init__(self):
+        super().__init__()
+        # imported here, metrics itself imports log_context from this module
+        from .metrics import get_run_id
+        self._get_run_id = get_run_id
+
+    def filter(self, record):
+        fields = _context.get()
+        record.run_id = self._get_run_id()
+        record.stage = fields.get('stage')
+        record.source = fields.get('source')
+        record.ticker = fields.get('ticker')
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler without the copy + full format pass of the stdlib prepare(), the loggers own a single handler"""
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # tracebacks can't cross the queue, render them here
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line carrying the run_id / stage / ticker fields"""
+
+    def format(self, record):
+        payload = {
+            'ts': dt.datetime.fromtimestamp(record.created).isoformat(),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'run_id': getattr(record, 'run_id', None),
+            'stage': getattr(record, 'stage', None),
+            'source': getattr(record, 'source', None),
+            'ticker': getattr(record, 'ticker', None),
+        }
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        elif record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload)
+
+
+def setup_logging(json_format: bool | None = None):
+    """
+    This is the central configuration function to control logging functionality
+
+    Stages call this on every entry, only the first call configures anything. Loggers get a
+    QueueHandler so the calling code only enqueues records, a single QueueListener thread owns
+    the file handlers. Set PIPELINE_LOG_FORMAT=json (or pass json_format=True) for JSON lines.
+    """
+    global _listener
+
+    if _listener is not None:
+        return
+
+    if json_format is None:
+        json_format = os.getenv('PIPELINE_LOG_FORMAT', 'text').lower() == 'json'
 
     run_ts = dt.datetime.now().date().strftime("%Y-%m-%d")
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
 
-    # <--- Pipeline logger configuration ---->
-
-    pipeline_logger = logging.getLogger('pipeline-historical')
-    pipeline_logger.setLevel(logging.INFO)
-    pipeline_logger.propagate = False
-
-    if not pipeline_logger.handlers:
-        handler = logging.FileHandler(f'logs/pipeline/historical/pipeline_{run_ts}.log')
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        pipeline_logger.addHandler(handler)
+    log_queue = queue.SimpleQueue()
+    file_handlers = []
 
-    # <--- bronze layer validation logger configuration --->
-    bronze_logger = logging.getLogger('bronze-validation')
-    bronze_logger.setLevel(logging.INFO)
-    bronze_logger.propagate = False
+    for name, file_pattern in LOG_FILES.items():
+        log_file = file_pattern.format(run_ts=run_ts)
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
 
-    if not bronze_logger.handlers:
-        handler = logging.FileHandler(f'logs/validations/bronze/bronze_validation_{run_ts}.log')
+        # file handler runs on the listener thread, the name filter routes records to their own file
+        handler = logging.FileHandler(log_file)
         handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
-        bronze_logger.addHandler(handler)
+        handler.addFilter(logging.Filter(name))
+        file_handlers.append(handler)
 
-    # <--- bronze execution configuration -->
-    bronze_execution_logger = logging.getLogger('bronze-execution')
-    bronze_execution_logger.setLevel(logging.INFO)
-    bronze_execution_logger.propagate = False
+        queue_handler = _QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
 
-    if not bronze_execution_logger.handlers:
-        handler = logging.FileHandler(f'logs/executions/bronze/bronze_execution_{run_ts}.log')
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        bronze_execution_logger.addHandler(handler)
-
-    # <--- silver execution configuration -->
-    silver_execution_logger = logging.getLogger('silver-execution')
-    silver_execution_logger.setLevel(logging.INFO)
-    silver_execution_logger.propagate = False
-
-    if not silver_execution_logger.handlers:
-        handler = logging.FileHandler(f"logs/executions/silver/silver_execution_{run_ts}.log")
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        silver_execution_logger.addHandler(handler)
+        named_logger = logging.getLogger(name)
+        named_logger.setLevel(logging.INFO)
+        named_logger.propagate = False
+        for existing in list(named_logger.handlers):
+            named_logger.removeHandler(existing)
+        named_logger.addHandler(queue_handler)
 
-    # <--- gold execution configuration --->
-    gold_execution_logger = logging.getLogger('gold-execution')
-    gold_execution_logger.setLevel(logging.INFO)
-    gold_execution_logger.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, *file_handlers, respect_handler_level=True)
+    _listener.start()
 
-    if not gold_execution_logger.handlers:
-        handler = logging.FileHandler(f"logs/executions/gold/gold_execution_{run_ts}.log")
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        gold_execution_logger.addHandler(handler)
-
-    # <--- daily pipeline execution configuration --->
-    daily_exec_logger = logging.getLogger('daily-execution')
-    daily_exec_logger.setLevel(logging.INFO)
-    daily_exec_logger.propagate = False
-
-    if not daily_exec_logger.handlers:
-        handler = logging.FileHandler(f"logs/executions/daily/daily_execution_{run_ts}.log")
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        daily_exec_logger.addHandler(handler)
-
-    # <--- validation block for daily load data validation --->
-    daily_val_logger = logging.getLogger('daily-validation-execution')
-    daily_val_logger.setLevel(logging.INFO)
-    daily_val_logger.propagate = False
-
-    if not daily_val_logger.handlers:
-        handler = logging.FileHandler(f"logs/validations/bronze_daily/daily_validation_{run_ts}.log")
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        daily_val_logger.addHandler(handler)
 
+def shutdown_logging():
+    """Drain the queue and close the log files, registered to run at interpreter exit"""
+    global _listener
 
+    if _listener is None:
+        return
 
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
 
 
+atexit.register(shutdown_logging)
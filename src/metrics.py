@@ -0,0 +1,322 @@
+import atexit
+import datetime as dt
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from .logger import log_context
+
+# <--- metrics output locations, kept next to the pipeline logs --->
+METRICS_ROOT = Path("logs/metrics")
+PROM_TEXTFILE = METRICS_ROOT / "pipeline.prom"
+
+LABEL_NAMES = ("stage", "source", "ticker", "run_id")
+
+_lock = threading.Lock()
+_write_lock = threading.Lock()   # one writer of the metrics files per process
+_run_id = os.getenv("PIPELINE_RUN_ID") or uuid.uuid4().hex[:12]
+_events = []          # buffered JSON-lines events, written on flush
+_durations = {}       # label tuple -> [count, sum, last]
+_counters = {}        # (metric, label tuple) -> value
+_gauges = {}          # (metric, label tuple) -> value
+_depth = threading.local()
+_prom_enabled = True  # off in worker processes, their parent writes the merged textfile
+
+
+def set_run_id(run_id: str | None) -> None:
+    """Use the orchestrator run id (e.g. dagster) as the run_id label when one is available"""
+    global _run_id
+    if run_id:
+        _run_id = str(run_id)
+
+
+def get_run_id() -> str:
+    return _run_id
+
+
+def set_prom_textfile(enabled: bool) -> None:
+    """Worker processes keep their events but leave pipeline.prom to the parent, which merges their snapshots"""
+    global _prom_enabled
+    _prom_enabled = bool(enabled)
+
+
+def _labels(stage: str, source: str | None = None, ticker: str | None = None) -> tuple:
+    return stage, source or "", ticker or "", _run_id
+
+
+def _event(metric: str, value: float, labels: tuple) -> None:
+    _events.append({
+        "ts": dt.datetime.now().isoformat(),
+        "metric": metric,
+        "value": value,
+        **dict(zip(LABEL_NAMES, labels)),
+    })
+
+
+def observe_duration(seconds: float, stage: str, source: str | None = None, ticker: str | None = None) -> None:
+    labels = _labels(stage, source, ticker)
+    with _lock:
+        entry = _durations.setdefault(labels, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = seconds
+        _event("pipeline_stage_duration_seconds", round(seconds, 6), labels)
+
+
+def _inc(metric: str, value: float, stage: str, source: str | None, ticker: str | None) -> None:
+    labels = _labels(stage, source, ticker)
+    with _lock:
+        _counters[(metric, labels)] = _counters.get((metric, labels), 0) + value
+        _event(metric, value, labels)
+
+
+def record_rows(rows: int, stage: str, source: str | None = None, ticker: str | None = None) -> None:
+    """Count the rows produced / consumed by a stage"""
+    _inc("pipeline_rows_total", int(rows), stage, source, ticker)
+
+
+def record_error(stage: str, source: str | None = None, ticker: str | None = None) -> None:
+    """Count a handled error, the stages log and swallow most exceptions so this has to be called explicitly"""
+    _inc("pipeline_errors_total", 1, stage, source, ticker)
+
+
+def record_retry(stage: str, source: str | None = None, ticker: str | None = None) -> None:
+    """Count one retried call, see src/retry.py"""
+    _inc("pipeline_retries_total", 1, stage, source, ticker)
+
+
+def record_breaker_trip(stage: str, source: str | None = None, ticker: str | None = None) -> None:
+    """Count a circuit breaker opening on a failing source"""
+    _inc("pipeline_breaker_trips_total", 1, stage, source, ticker)
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # peak rather than current, kilobytes on Linux and bytes on macOS
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def record_peak_rss(rss_bytes: int, stage: str, source: str | None = None, ticker: str | None = None) -> None:
+    """Keep the highest RSS seen for a stage, used to size the workers that run it"""
+    labels = _labels(stage, source, ticker)
+    with _lock:
+        key = ("pipeline_peak_rss_bytes", labels)
+        _gauges[key] = max(_gauges.get(key, 0), int(rss_bytes))
+        _event("pipeline_peak_rss_bytes", int(rss_bytes), labels)
+
+
+def counter_value(metric: str, stage: str | None = None, source: str | None = None) -> float:
+    """Sum of a counter over all its label sets, optionally narrowed to one stage / source"""
+    with _lock:
+        return sum(
+            value for (name, labels), value in _counters.items()
+            if name == metric and stage in (None, labels[0]) and source in (None, labels[1])
+        )
+
+
+def snapshot() -> dict:
+    """Counters, durations and gauges of this process, picklable so a worker can hand them to its parent"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "durations": {labels: list(entry) for labels, entry in _durations.items()},
+            "gauges": dict(_gauges),
+        }
+
+
+def merge(other: dict) -> None:
+    """Fold a worker process's snapshot into this process, the worker already flushed its own events"""
+    with _lock:
+        for key, value in other["counters"].items():
+            _counters[key] = _counters.get(key, 0) + value
+        for labels, (count, total, last) in other["durations"].items():
+            entry = _durations.setdefault(labels, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += total
+            entry[2] = last
+        for key, value in other["gauges"].items():
+            _gauges[key] = max(_gauges.get(key, 0), value)
+
+
+def _prom_labels(labels: tuple) -> str:
+    pairs = []
+    for name, value in zip(LABEL_NAMES, labels):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _prom_text() -> str:
+    lines = [
+        "# HELP pipeline_stage_duration_seconds Wall time of pipeline stages.",
+        "# TYPE pipeline_stage_duration_seconds summary",
+    ]
+    for labels, (count, total, _) in sorted(_durations.items()):
+        lines.append(f"pipeline_stage_duration_seconds_sum{_prom_labels(labels)} {total:.6f}")
+        lines.append(f"pipeline_stage_duration_seconds_count{_prom_labels(labels)} {count}")
+
+    lines.append("# HELP pipeline_stage_last_duration_seconds Wall time of the latest run of a stage.")
+    lines.append("# TYPE pipeline_stage_last_duration_seconds gauge")
+    for labels, (_, _, last) in sorted(_durations.items()):
+        lines.append(f"pipeline_stage_last_duration_seconds{_prom_labels(labels)} {last:.6f}")
+
+    for metric, help_text in (("pipeline_rows_total", "Rows processed by pipeline stages."),
+                              ("pipeline_errors_total", "Errors handled by pipeline stages."),
+                              ("pipeline_retries_total", "Calls retried by the extract clients."),
+                              ("pipeline_breaker_trips_total", "Circuit breakers opened on failing sources.")):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), value in sorted(_counters.items()):
+            if name == metric:
+                lines.append(f"{metric}{_prom_labels(labels)} {value}")
+
+    lines.append("# HELP pipeline_peak_rss_bytes Highest resident set size sampled during a stage.")
+    lines.append("# TYPE pipeline_peak_rss_bytes gauge")
+    for (name, labels), value in sorted(_gauges.items()):
+        lines.append(f"{name}{_prom_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def flush() -> None:
+    """Append the buffered events to the JSON-lines file and rewrite the Prometheus textfile"""
+    with _lock:
+        if not (_events or _durations or _counters or _gauges):
+            return
+        events = list(_events)
+        _events.clear()
+        prom_text = _prom_text() if _prom_enabled else None
+
+    METRICS_ROOT.mkdir(parents=True, exist_ok=True)
+
+    # threads that each exit their own outermost stage_timer flush at the same time
+    with _write_lock:
+        if events:
+            run_ts = dt.datetime.now().date().strftime("%Y-%m-%d")
+            with open(METRICS_ROOT / f"metrics_{run_ts}.jsonl", "a") as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+
+        if prom_text is None:
+            return
+
+        # node exporter reads the textfile at any time, write to a temp file and swap it in,
+        # the temp name is unique so writers in other processes never replace each other's file
+        fd, tmp_path = tempfile.mkstemp(dir=METRICS_ROOT, prefix=".pipeline.", suffix=".prom.tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(prom_text)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, PROM_TEXTFILE)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class stage_timer:
+    """
+    Context manager timing one unit of work, usage:
+
+        with stage_timer("load", source="ohclv", ticker="AAPL") as timer:
+            ...
+            timer.rows(len(df))
+
+    Exceptions escaping the block are counted as errors and re-raised.
+    Metrics are flushed to disk when the outermost timer exits.
+    """
+
+    def __init__(self, stage: str, source: str | None = None, ticker: str | None = None):
+        self.stage = stage
+        self.source = source
+        self.ticker = ticker
+        self.seconds = None
+
+    def rows(self, count: int) -> None:
+        record_rows(count, self.stage, self.source, self.ticker)
+
+    def error(self) -> None:
+        record_error(self.stage, self.source, self.ticker)
+
+    def __enter__(self):
+        _depth.value = getattr(_depth, "value", 0) + 1
+        # stage fields show up on every log record emitted inside the block
+        self._log_context = log_context(stage=self.stage, source=self.source, ticker=self.ticker)
+        self._log_context.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        observe_duration(self.seconds, self.stage, self.source, self.ticker)
+        if exc_type is not None:
+            self.error()
+        self._log_context.__exit__(exc_type, exc, tb)
+        _depth.value -= 1
+        if _depth.value == 0:
+            flush()
+        return False
+
+
+class peak_rss:
+    """
+    Track the peak RSS of a block, usage:
+
+        with peak_rss("load", source="ohclv") as rss:
+            for chunk in chunks:
+                ...
+                rss.sample()
+
+    The peak is recorded as a gauge on exit and is kept in .peak (bytes).
+    """
+
+    def __init__(self, stage: str, source: str | None = None, ticker: str | None = None):
+        self.stage = stage
+        self.source = source
+        self.ticker = ticker
+        self.peak = 0
+
+    def sample(self) -> int:
+        self.peak = max(self.peak, current_rss())
+        return self.peak
+
+    def __enter__(self):
+        self.sample()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.sample()
+        record_peak_rss(self.peak, self.stage, self.source, self.ticker)
+        return False
+
+
+def timed_stage(stage: str, source: str | None = None):
+    """Decorator form of stage_timer for the stage entry functions"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage, source=source):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+atexit.register(flush)
@@ -0,0 +1,19 @@
+import datetime as dt
+from ...models.base_bronze import BaseBronze
+from typing import Optional
+from sqlmodel import Field
+from sqlalchemy import Column, Double, UniqueConstraint
+
+class FxRateData(BaseBronze, table=True):
+
+    # one row per date and currency pair, the unique key doubles as the lookup index
+    __tablename__ = "fx_rates_bronze"
+    __table_args__ = (UniqueConstraint("date", "base", "quote", name="uq_fx_date_base_quote"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    date: dt.date = Field(nullable=False)
+    base: str = Field(max_length=3, nullable=False)
+    quote: str = Field(max_length=3, nullable=False)
+    # double precision, JPY / IDR style rates need the digits (same as fx_rates_silver)
+    rate: float = Field(sa_column=Column(Double, nullable=False))
+    insert_datetime : dt.datetime = dt.datetime.now()
@@ -6,9 +6,10 @@ from sqlmodel import Field
 class OHCLVBronze(BaseBronze, table=True):
     __tablename__ = "ohclv_bronze"
 
-    id: Optional[int] = Field(default=None, primary_key=True)
+    # the table is RANGE partitioned by YEAR(date) (src/partitions.py), MySQL wants date in the primary key
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
     ticker: str
-    date: dt.date
+    date: dt.date = Field(primary_key=True)
     open: float
     high: float
     low: float
@@ -2,8 +2,11 @@ from dagster import AssetExecutionContext, asset
 
 from ..daily.extract.daily_extract import daily_extr
 from ..daily.load.daily_load import daily_load
+from ..daily.load.meta_cdc import meta_cdc
 from ..daily.validation.bronze_validation import daily_validation
 from ..daily.transform.daily_transform import daily_transform
+from ..daily.transform.fx_asof import fx_asof
+from ..daily.transform.gold_returns import gold_returns
 
 DEFAULT_CONFIG = "config/bulk.yaml"
 
@@ -17,6 +20,11 @@ def load_daily(context: AssetExecutionContext) -> None:
     # added dependency to load and passing the context
     daily_load(bulk=DEFAULT_CONFIG, dagster_run_id=context.run_id)
 
+@asset(name="cdc_company_meta", deps=[extract_daily])
+def cdc_company_meta(context: AssetExecutionContext) -> None:
+    # writes only the companies whose profile hash changed
+    meta_cdc(bulk=DEFAULT_CONFIG, dagster_run_id=context.run_id)
+
 @asset(name="validate_daily", deps=[load_daily])
 def validate_daily(context: AssetExecutionContext) -> None:
     daily_validation(bulk=DEFAULT_CONFIG, dagster_run_id=context.run_id)
@@ -25,4 +33,14 @@ def validate_daily(context: AssetExecutionContext) -> None:
 def transform_daily(context: AssetExecutionContext) -> None:
     daily_transform(bulk=DEFAULT_CONFIG, dagster_run_id=context.run_id)
 
-    
\ No newline at end of file
+    
+
+@asset(name="fx_asof_daily", deps=[transform_daily])
+def fx_asof_daily(context: AssetExecutionContext) -> None:
+    # calendar-complete fx and the INR stock facts, after the day's rates reach silver
+    fx_asof(bulk=DEFAULT_CONFIG, dagster_run_id=context.run_id)
+
+@asset(name="gold_returns_daily", deps=[transform_daily])
+def gold_returns_daily(context: AssetExecutionContext) -> None:
+    # multi-horizon returns and betas for the day's bars, once they reach silver
+    gold_returns(bulk=DEFAULT_CONFIG, dagster_run_id=context.run_id)
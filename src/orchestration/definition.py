@@ -1,12 +1,12 @@
 from dagster import Definitions
 
-from .assets import extract_daily,load_daily,validate_daily,transform_daily
+from .assets import extract_daily,load_daily,cdc_company_meta,validate_daily,transform_daily,fx_asof_daily,gold_returns_daily
 from .jobs import daily_pipeline_job
 from .schedules import daily_noon_schedule
 
 definitions = Definitions(
 
-    assets = [extract_daily,load_daily,validate_daily,transform_daily],
+    assets = [extract_daily,load_daily,cdc_company_meta,validate_daily,transform_daily,fx_asof_daily,gold_returns_daily],
     jobs = [daily_pipeline_job],
     schedules = [daily_noon_schedule],
 
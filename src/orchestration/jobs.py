@@ -6,8 +6,11 @@ daily_pipeline_job = define_asset_job(
     selection = AssetSelection.assets(
         "extract_daily",
         "load_daily",
+        "cdc_company_meta",
         "validate_daily",
         "transform_daily",
+        "fx_asof_daily",
+        "gold_returns_daily",
     ),
 
 )
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+
+Yearly RANGE partitions of bronze.ohclv_bronze
+
+    partition_by_year(conn, "bronze", "ohclv_bronze", 2020, 2027)    # right after the table is created
+    ensure_partitions(conn, "bronze", "ohclv_bronze", 2027)          # cheap, split the coming years out of p_future
+    truncate_years(conn, "bronze", "ohclv_bronze", [2020])           # instant, no DELETE
+
+One partition per year of YEAR(date) plus p_future (VALUES LESS THAN MAXVALUE), which keeps any later
+row instead of rejecting its insert. Only the historic load writes the table, and it recreates the
+partitions through ohclv_partitions_ahead years past the current one on every run. ensure_partitions
+(--ensure) splits later years out of p_future by hand, while p_future is still empty that split is a
+metadata change. Dropping or truncating a year discards its file instead of deleting row by row. MySQL wants the partition column in every unique key, so the
+table's primary key is (id, date).
+
+    python -m src.partitions --list
+    python -m src.partitions --drop-before 2015
+
+"""
+
+import argparse
+import logging
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from .utils import load_yml, get_engine_session
+
+FUTURE = "p_future"
+
+logger = logging.getLogger("bronze-execution")
+
+
+def partition_name(year: int) -> str:
+    return f"p{int(year)}"
+
+
+def _definitions(years) -> str:
+    return ", ".join(f"PARTITION {partition_name(year)} VALUES LESS THAN ({int(year) + 1})" for year in years)
+
+
+def partition_by_year(conn, schema: str, table: str, first_year: int, last_year: int) -> None:
+    """Partition the (still empty) table by YEAR(date), first_year also takes anything older"""
+    years = range(int(first_year), int(last_year) + 1)
+    conn.execute(text(f"""
+        ALTER TABLE {schema}.{table}
+        PARTITION BY RANGE (YEAR(date)) ({_definitions(years)}, PARTITION {FUTURE} VALUES LESS THAN MAXVALUE)
+    """))
+
+
+def partitions(conn, schema: str, table: str) -> list:
+    """(name, upper bound year or None for p_future, estimated rows) in partition order, [] when not partitioned"""
+    rows = conn.execute(text("""
+        SELECT partition_name, partition_description, table_rows FROM information_schema.PARTITIONS
+        WHERE table_schema = :schema AND table_name = :table AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+    """), {"schema": schema, "table": table}).fetchall()
+    return [(name, None if bound == "MAXVALUE" else int(bound), rows) for name, bound, rows in rows]
+
+
+def ensure_partitions(conn, schema: str, table: str, through_year: int) -> list:
+    """Split the years up to through_year out of p_future, returns the years added"""
+
+    existing = partitions(conn, schema, table)
+    if not existing or existing[-1][0] != FUTURE:
+        return []
+
+    last_bound = max((bound for _, bound, _ in existing if bound is not None), default=None)
+    if last_bound is None:
+        return []
+    years = list(range(last_bound, int(through_year) + 1))
+    if years:
+        conn.execute(text(f"""
+            ALTER TABLE {schema}.{table} REORGANIZE PARTITION {FUTURE} INTO
+            ({_definitions(years)}, PARTITION {FUTURE} VALUES LESS THAN MAXVALUE)
+        """))
+        logger.info(f"Added the {', '.join(map(str, years))} partitions of {schema}.{table}....")
+    return years
+
+
+def truncate_years(conn, schema: str, table: str, years) -> None:
+    names = ", ".join(partition_name(year) for year in sorted(set(years)))
+    conn.execute(text(f"ALTER TABLE {schema}.{table} TRUNCATE PARTITION {names}"))
+
+
+def drop_years_before(conn, schema: str, table: str, year: int) -> list:
+    """Drop every yearly partition that only holds years before year, the first one is kept"""
+    yearly = [(name, bound) for name, bound, _ in partitions(conn, schema, table) if bound is not None]
+    # the first partition is the catch-all for older rows, dropping it would leave rows without a home
+    dropped = [name for name, bound in yearly[1:] if bound <= int(year)]
+    if dropped:
+        conn.execute(text(f"ALTER TABLE {schema}.{table} DROP PARTITION {', '.join(dropped)}"))
+    return dropped
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", default="config/bulk.yaml")
+    parser.add_argument("--table", default="ohclv_bronze")
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--ensure", type=int, default=None, help="add the partitions through this year")
+    parser.add_argument("--truncate", default=None, help="comma separated years to empty")
+    parser.add_argument("--drop-before", type=int, default=None, help="drop the partitions of the years before this one")
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path=".env")
+    bulk_config = load_yml(args.bulk)
+    schema = bulk_config["dbname"][0]
+    engine, _ = get_engine_session(schema, bulk_config["user_name"], bulk_config["host"], bulk_config["port"], os.getenv("DB_PASS"))
+
+    with engine.begin() as conn:
+        if args.ensure:
+            print(f"added : {ensure_partitions(conn, schema, args.table, args.ensure)}")
+        if args.truncate:
+            truncate_years(conn, schema, args.table, [int(year) for year in args.truncate.split(",")])
+            print(f"truncated : {args.truncate}")
+        if args.drop_before:
+            print(f"dropped : {drop_years_before(conn, schema, args.table, args.drop_before)}")
+        if args.list or not (args.ensure or args.truncate or args.drop_before):
+            for name, bound, rows in partitions(conn, schema, args.table):
+                print(f"{name:<10} < {bound or 'MAXVALUE':<8} ~{rows} rows")
+
+
+if __name__ == "__main__":
+    main()
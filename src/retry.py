@@ -0,0 +1,200 @@
+"""
+
+Shared retry policy for the extract clients : backoff with jitter, a deadline and a circuit breaker
+
+    df = retry_call(bulk_config, "yfinance", yf.download, ticker, period="1d", empty=lambda df: df.empty)
+    profile = get_json(bulk_config, "fmp", url)
+
+Policies come per source from the retry block of the bulk config, unset values from retry.default.
+Retry n waits a random time up to min(max_delay, base_delay * 2**(n-1)) (full jitter, so parallel
+callers spread out), a Retry-After header sets the floor, and no wait starts past the deadline.
+A client error other than those in RETRY_STATUS fails the call without retries. Callers see
+RetryError either way, so one bad ticker is skipped like any other failed call.
+A source that fails breaker_failures calls in a row (each with its retries spent, or refused with
+one of BREAKER_STATUS) trips its breaker. An unknown or delisted ticker (404 and the like) is a
+bad request, not a provider outage, and leaves the breaker alone. Once tripped, every later call
+in the same run fails fast with CircuitOpenError instead of hammering a provider that is down or
+throttling. Retries and trips are counted in src/metrics.py.
+
+"""
+
+import logging
+import random
+import threading
+import time
+
+import requests
+
+from .metrics import get_run_id, record_retry, record_breaker_trip
+
+DEFAULT_POLICY = {
+    "attempts": 5,
+    "base_delay": 0.5,
+    "max_delay": 30.0,
+    "deadline": 120.0,
+    "timeout": 15.0,
+    "breaker_failures": 3,
+}
+
+# client errors are final except timeouts, too early and throttling
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# final errors that fail every call of the source (bad api key, plan without access), counted by the breaker
+BREAKER_STATUS = {401, 403}
+
+logger = logging.getLogger("bronze-execution")
+
+
+class RetryError(RuntimeError):
+    """Every attempt of a call failed, or the deadline ran out before the next one"""
+
+
+class CircuitOpenError(RetryError):
+    """The source's breaker tripped earlier in this run, the call was not made"""
+
+
+class EmptyResult(Exception):
+    """A call returned without raising but with nothing in it (yfinance reports failures this way)"""
+
+
+def policy(bulk_config: dict | None, source: str) -> dict:
+    block = (bulk_config or {}).get("retry") or {}
+    return {**DEFAULT_POLICY, **(block.get("default") or {}), **(block.get(source) or {})}
+
+
+class CircuitBreaker:
+    """Consecutive failed calls of one source, open for the rest of the run once it reaches the threshold"""
+
+    def __init__(self, source: str, threshold: int):
+        self.source = source
+        self.threshold = threshold
+        self.failures = 0
+        self.is_open = False
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        if self.is_open:
+            raise CircuitOpenError(f"{self.source} circuit is open after {self.failures} failed calls, skipping the call")
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.threshold and self.failures >= self.threshold and not self.is_open:
+                self.is_open = True
+                record_breaker_trip("extract", source=self.source)
+                logger.error(f"{self.source} failed {self.failures} calls in a row, circuit opened for the rest of the run....")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(source: str, rule: dict) -> CircuitBreaker:
+    """One breaker per source and run id, a new Dagster run starts with every circuit closed"""
+    with _breakers_lock:
+        key = (source, get_run_id())
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(source, int(rule["breaker_failures"]))
+        return _breakers[key]
+
+
+def reset_breakers() -> None:
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUS
+    return True
+
+
+def _breaks(error: Exception) -> bool:
+    return (isinstance(error, requests.HTTPError) and error.response is not None
+            and error.response.status_code in BREAKER_STATUS)
+
+
+def _describe(error: Exception) -> str:
+    """Short reason for the logs, request urls carry the api keys so they never end up there"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"HTTP {error.response.status_code}"
+    if isinstance(error, EmptyResult):
+        return "empty result"
+    return type(error).__name__
+
+
+def _retry_after(error: Exception | None) -> float:
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        try:
+            return float(error.response.headers.get("Retry-After", 0))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def backoff(rule: dict, retry: int, retry_after: float = 0.0) -> float:
+    """Full-jitter exponential wait before retry number retry (1-based)"""
+    cap = min(float(rule["max_delay"]), float(rule["base_delay"]) * 2 ** (retry - 1))
+    return max(random.uniform(0, cap), min(retry_after, float(rule["max_delay"])))
+
+
+def retry_call(bulk_config: dict | None, source: str, func, *args, empty=None, **kwargs):
+    """
+    func(*args, **kwargs) under the source's policy. empty(result) True counts as a failed attempt.
+    A non-retryable HTTP error (401 / 403 / 404 ...) fails the call at once, exhausted attempts after the
+    last one, both raise RetryError. Only 401 / 403 and exhausted attempts count against the breaker
+    """
+    rule = policy(bulk_config, source)
+    breaker = breaker_for(source, rule)
+    breaker.check()
+
+    deadline = time.monotonic() + float(rule["deadline"])
+    last = None
+    attempts = 0
+
+    for attempt in range(int(rule["attempts"])):
+        if attempt:
+            wait = backoff(rule, attempt, _retry_after(last))
+            if time.monotonic() + wait > deadline:
+                logger.warning(f"{source} deadline of {rule['deadline']}s reached, no further retries....")
+                break
+            record_retry("extract", source=source)
+            logger.info(f"Retrying {source} in {wait:.2f}s after {_describe(last)} (attempt {attempt + 1} of {rule['attempts']})....")
+            time.sleep(wait)
+
+        attempts += 1
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not _retryable(e):
+                if _breaks(e):
+                    breaker.failure()
+                raise RetryError(f"{source} failed with a non-retryable {_describe(e)}") from e
+            last = e
+            continue
+
+        if empty is not None and empty(result):
+            last = EmptyResult(f"{source} returned an empty result")
+            continue
+
+        breaker.success()
+        return result
+
+    breaker.failure()
+    raise RetryError(f"{source} failed after {attempts} attempts, last error : {_describe(last)}") from last
+
+
+def get_json(bulk_config: dict | None, source: str, url: str):
+    """GET url with the source's timeout and retry policy, the decoded JSON body"""
+
+    timeout = float(policy(bulk_config, source)["timeout"])
+
+    def fetch():
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    return retry_call(bulk_config, source, fetch)
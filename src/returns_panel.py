@@ -0,0 +1,214 @@
+"""
+
+Multi-horizon returns and rolling betas over a dates x tickers panel
+
+    with engine.begin() as conn:
+        rows = refresh_stock_returns(conn, "silver", "gold", bulk_config)            # full rebuild
+        rows = refresh_stock_returns(conn, "silver", "gold", bulk_config, since)     # trade dates from since on
+
+ohclv_silver is read once and laid out as a float64 panel, one row per trade date and one column
+per ticker (NaN where a ticker has no bar). Every horizon return is one array expression over the
+whole panel, close[t] / close[t - h] - 1 with h in trading rows. Rolling betas against the
+returns_benchmark ticker come from cumulative sums of x, y, xy and x² over the pairs where both
+returns exist : a window sum is the difference of two cumulative rows, so a window of any length
+costs the same. Returns and betas run one block of panel_block_tickers columns at a time, so the
+intermediate arrays stay at block size; the close panel and the long output are still full size.
+gold.stock_returns is written long, one row per ticker and trade date.
+
+"""
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+STOCK_RETURNS = "stock_returns"
+
+DEFAULT_HORIZONS = [1, 5, 21, 63, 252]
+DEFAULT_BETA_WINDOWS = [63, 252]
+DEFAULT_BLOCK = 1024
+WRITE_CHUNK = 50_000
+
+
+def panel_settings(bulk_config: dict) -> dict:
+    return {
+        "horizons": sorted({int(h) for h in bulk_config.get("return_horizons", DEFAULT_HORIZONS)}),
+        "beta_windows": sorted({int(w) for w in bulk_config.get("beta_windows", DEFAULT_BETA_WINDOWS)}),
+        "benchmark": bulk_config.get("returns_benchmark"),
+        "block": int(bulk_config.get("panel_block_tickers", DEFAULT_BLOCK)),
+    }
+
+
+def close_panel(frame: pd.DataFrame) -> tuple:
+    """(ticker, date, close) rows -> (dates, tickers, close[dates, tickers]) without a pivot"""
+    date_index, dates = pd.factorize(pd.to_datetime(frame["date"]), sort=True)
+    ticker_index, tickers = pd.factorize(frame["ticker"].astype(str), sort=True)
+
+    close = np.full((len(dates), len(tickers)), np.nan)
+    close[date_index, ticker_index] = frame["close"].to_numpy(dtype="float64")
+    return dates, tickers, close
+
+
+def horizon_returns(close: np.ndarray, horizons) -> dict:
+    """horizon -> simple returns over that many panel rows, NaN for the first rows and across gaps"""
+    returns = {}
+    for h in horizons:
+        r = np.full_like(close, np.nan)
+        if h < len(close):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                r[h:] = close[h:] / close[:-h] - 1.0
+        r[~np.isfinite(r)] = np.nan
+        returns[h] = r
+    return returns
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sums along the dates axis (shorter at the start) from one cumulative sum"""
+    cumulative = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    lower = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    return cumulative[1:] - cumulative[lower]
+
+
+def rolling_beta(returns: np.ndarray, benchmark: np.ndarray, window: int,
+                 min_periods: int | None = None, block: int = DEFAULT_BLOCK) -> np.ndarray:
+    """
+    cov(r, b) / var(b) over the trailing window of every column of returns, counting only the days
+    where both returns exist. NaN until min_periods (default window) such days are in the window
+    """
+    min_periods = window if min_periods is None else min_periods
+    beta = np.full_like(returns, np.nan)
+    x = benchmark.reshape(-1, 1)
+
+    for start in range(0, returns.shape[1], block):
+        y = returns[:, start:start + block]
+        valid = np.isfinite(y) & np.isfinite(x)
+        xv = np.where(valid, x, 0.0)
+        yv = np.where(valid, y, 0.0)
+
+        n = _window_sums(valid.astype("float64"), window)
+        sx, sy = _window_sums(xv, window), _window_sums(yv, window)
+        sxy, sxx = _window_sums(xv * yv, window), _window_sums(xv * xv, window)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = sxy - sx * sy / n
+            var = sxx - sx * sx / n
+            b = cov / var
+        b[(n < min_periods) | ~(var > 0)] = np.nan
+        beta[:, start:start + block] = b
+    return beta
+
+
+def compute_panel(frame: pd.DataFrame, settings: dict) -> pd.DataFrame:
+    """
+    (ticker, date, close) rows -> one row per bar with return_<h>d and beta_<w>d columns, computed
+    one block of tickers at a time so only the close panel and the output are full size
+    """
+
+    dates, tickers, close = close_panel(frame)
+    benchmark = settings["benchmark"] if settings["benchmark"] in tickers else None
+    bench = None
+    if benchmark is not None:
+        bench = horizon_returns(close[:, [tickers.get_loc(benchmark)]], [1])[1][:, 0]
+
+    blocks = []
+    # at least one (possibly empty) block, so an empty silver table still gives the output columns
+    for start in range(0, max(len(tickers), 1), settings["block"]):
+        block = close[:, start:start + settings["block"]]
+        returns = horizon_returns(block, settings["horizons"] + [1])
+
+        columns = {f"return_{h}d": returns[h] for h in settings["horizons"]}
+        for window in settings["beta_windows"]:
+            columns[f"beta_{window}d"] = (rolling_beta(returns[1], bench, window, block=block.shape[1])
+                                          if bench is not None else np.full_like(block, np.nan))
+
+        # long layout : the bars that exist, row major so each date's tickers stay together
+        date_index, ticker_index = np.nonzero(np.isfinite(block))
+        result = pd.DataFrame({
+            "ticker": tickers.to_numpy()[start + ticker_index],
+            "trade_date": dates[date_index].date,
+            "close_price": block[date_index, ticker_index],
+        })
+        for name, values in columns.items():
+            result[name] = values[date_index, ticker_index]
+        blocks.append(result)
+
+    result = pd.concat(blocks, ignore_index=True)
+    result["benchmark_ticker"] = benchmark
+    return result
+
+
+def lookback_start(conn, silver: str, since, rows: int):
+    """First trade date of the rows trading days before since, the history a window ending at since needs"""
+    return conn.execute(text(f"""
+        SELECT MIN(date) FROM (
+            SELECT DISTINCT date FROM {silver}.ohclv_silver WHERE date < :since ORDER BY date DESC LIMIT {int(rows)}
+        ) history
+    """), {"since": since}).scalar()
+
+
+def _create_table(conn, gold: str, metric_columns: list) -> None:
+    metrics = ",\n".join(f"            {column} DOUBLE" for column in metric_columns)
+    conn.execute(text(f"DROP TABLE IF EXISTS {gold}.{STOCK_RETURNS}"))
+    conn.execute(text(f"""
+        CREATE TABLE {gold}.{STOCK_RETURNS} (
+            ticker VARCHAR(10) NOT NULL,
+            trade_date DATE NOT NULL,
+            close_price DOUBLE NOT NULL,
+{metrics},
+            benchmark_ticker VARCHAR(10),
+            PRIMARY KEY (ticker, trade_date)
+        )
+    """))
+
+
+def _insert(conn, gold: str, result: pd.DataFrame) -> None:
+    columns = list(result.columns)
+    if conn.dialect.name == "duckdb":
+        # the DuckDB connection scans the frame in place, no row by row parameters
+        duck = conn.connection.driver_connection
+        duck.register("stock_returns_frame", result)
+        try:
+            conn.execute(text(f"INSERT INTO {gold}.{STOCK_RETURNS} ({', '.join(columns)}) "
+                              f"SELECT {', '.join(columns)} FROM stock_returns_frame"))
+        finally:
+            duck.unregister("stock_returns_frame")
+        return
+
+    insert = text(f"INSERT INTO {gold}.{STOCK_RETURNS} ({', '.join(columns)}) "
+                  f"VALUES ({', '.join(':' + c for c in columns)})")
+    # NaN -> NULL, pymysql batches each chunk into multi-row INSERTs
+    result = result.astype(object).where(result.notna(), None)
+    for start in range(0, len(result), WRITE_CHUNK):
+        conn.execute(insert, result.iloc[start:start + WRITE_CHUNK].to_dict("records"))
+
+
+def refresh_stock_returns(conn, silver: str, gold: str, bulk_config: dict, since=None) -> int:
+    """
+    gold.stock_returns from silver.ohclv_silver. Without since the table is rebuilt, with since only
+    trade dates from there on are replaced, computed from the history their longest window needs.
+    Returns the rows written
+    """
+
+    settings = panel_settings(bulk_config)
+    query = f"SELECT ticker, date, close FROM {silver}.ohclv_silver"
+    params = {}
+    if since is not None:
+        lookback = max(settings["horizons"] + settings["beta_windows"])
+        start = lookback_start(conn, silver, since, lookback)
+        if start is not None:
+            query += " WHERE date >= :start"
+            params = {"start": start}
+
+    frame = pd.read_sql(text(query), conn, params=params)
+    result = compute_panel(frame, settings)
+
+    if since is None:
+        metric_columns = [c for c in result.columns if c.startswith(("return_", "beta_"))]
+        _create_table(conn, gold, metric_columns)
+    else:
+        result = result[result["trade_date"] >= pd.Timestamp(since).date()]
+        conn.execute(text(f"DELETE FROM {gold}.{STOCK_RETURNS} WHERE trade_date >= :since"), {"since": since})
+
+    if len(result):
+        _insert(conn, gold, result)
+    return len(result)
@@ -0,0 +1,197 @@
+"""
+
+Per-run SQL profile : every statement's duration, rows and calling stage, with EXPLAIN for the slow ones
+
+    python -m src.sql_profile logs/sql_profile/sql_profile_<run_id>.jsonl --top 20
+
+Importing the module hooks every SQLAlchemy engine (cursor execute events on the Engine class), so
+the stages need no changes. A record holds the run id, the stage / source / ticker of the enclosing
+stage_timer, the statement (whitespace collapsed, parameters left out), a fingerprint that groups
+the same statement across calls, duration_ms and rows affected. A statement slower than sql_slow_ms
+gets its plan captured with EXPLAIN FORMAT=JSON on MySQL, EXPLAIN (FORMAT JSON) on DuckDB. A
+CREATE TABLE ... AS SELECT is explained through its SELECT. The plan runs on a raw cursor of the same
+connection, so it is not profiled itself. stream_results statements are never explained : their rows
+are still pending on that connection, and pymysql would drop them to run the EXPLAIN. Records are
+buffered and appended to <sql_profile_dir>/sql_profile_<run_id>.jsonl. A slow statement is written
+right away, the rest in batches and at exit.
+
+"""
+
+import argparse
+import atexit
+import datetime as dt
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .logger import current_context
+from .metrics import get_run_id
+
+DEFAULT_SETTINGS = {
+    "sql_profile": True,
+    "sql_slow_ms": 1000.0,
+    "sql_explain": True,
+    "sql_profile_dir": "logs/sql_profile",
+}
+
+BATCH = 200
+MAX_STATEMENT = 4000
+
+_settings = dict(DEFAULT_SETTINGS)
+_records = []
+_lock = threading.Lock()
+
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.I)
+CREATE_AS = re.compile(r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\b.*?\bAS\s*\(?\s*((?:SELECT|WITH)\b.*)", re.I | re.S)
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def configure(bulk_config: dict | None) -> None:
+    """Take the sql_* settings of the bulk config, unset ones keep their defaults"""
+    _settings.update({key: bulk_config[key] for key in DEFAULT_SETTINGS if bulk_config and key in bulk_config})
+
+
+def profile_path(run_id: str | None = None) -> Path:
+    return Path(_settings["sql_profile_dir"]) / f"sql_profile_{run_id or get_run_id()}.jsonl"
+
+
+def normalize(statement: str) -> str:
+    return " ".join(statement.split())
+
+
+def statement_fingerprint(statement: str) -> str:
+    """Same statement with different literals, same fingerprint"""
+    return hashlib.sha1(LITERALS.sub("?", statement).encode()).hexdigest()[:12]
+
+
+def explain_target(statement: str) -> str | None:
+    """The part of the statement EXPLAIN accepts, None for DDL and the like"""
+    match = CREATE_AS.match(statement)
+    if match:
+        return match.group(1).rstrip(" );")
+    return statement if EXPLAINABLE.match(statement) else None
+
+
+def _explain(conn, statement: str, parameters, executemany: bool):
+    target = explain_target(statement)
+    if executemany or target is None:
+        return None
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        sql = f"EXPLAIN FORMAT=JSON {target}"
+    elif dialect == "duckdb":
+        sql = f"EXPLAIN (FORMAT JSON) {target}"
+    else:
+        return None
+    try:
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(sql, parameters) if parameters else cursor.execute(sql)
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        plan = row[-1] if row else None
+        return json.loads(plan) if isinstance(plan, str) else plan
+    except Exception as e:
+        return {"explain_error": f"{type(e).__name__}: {e}"[:500]}
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _settings["sql_profile"]:
+        conn.info.setdefault("sql_profile_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("sql_profile_start")
+    if not _settings["sql_profile"] or not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+
+    text = normalize(statement)
+    fields = current_context()
+    record = {
+        "ts": dt.datetime.now().isoformat(),
+        "run_id": get_run_id(),
+        "stage": fields.get("stage"),
+        "source": fields.get("source"),
+        "ticker": fields.get("ticker"),
+        "dialect": conn.dialect.name,
+        "fingerprint": statement_fingerprint(text),
+        "statement": text[:MAX_STATEMENT],
+        "duration_ms": round(duration_ms, 3),
+        "rows": cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None,
+        "executemany": bool(executemany),
+        "slow": duration_ms >= float(_settings["sql_slow_ms"]),
+    }
+    # a streamed result is still unread on the connection, a second statement there would discard its rows
+    streamed = context is not None and context.execution_options.get("stream_results", False)
+    if record["slow"] and _settings["sql_explain"] and not streamed:
+        record["explain"] = _explain(conn, statement, parameters, executemany)
+
+    with _lock:
+        _records.append(record)
+        due = record["slow"] or len(_records) >= BATCH
+    if due:
+        flush()
+
+
+def flush() -> None:
+    with _lock:
+        if not _records:
+            return
+        records = list(_records)
+        _records.clear()
+
+    path = profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+
+
+def load_profile(path) -> pd.DataFrame:
+    return pd.read_json(path, lines=True)
+
+
+def summary(profile: pd.DataFrame, top: int = 20) -> pd.DataFrame:
+    """Statements by total time : calls, total / max ms, rows, the stages issuing them and whether a plan was captured"""
+    if profile.empty:
+        return profile
+    if "explain" not in profile:
+        profile = profile.assign(explain=None)
+    grouped = profile.groupby("fingerprint").agg(
+        calls=("duration_ms", "size"),
+        total_ms=("duration_ms", "sum"),
+        max_ms=("duration_ms", "max"),
+        rows=("rows", "sum"),
+        stages=("source", lambda values: ",".join(sorted({str(v) for v in values if pd.notna(v)}))),
+        explained=("explain", lambda values: bool(values.notna().any())),
+        statement=("statement", "first"),
+    )
+    grouped["statement"] = grouped["statement"].str.slice(0, 120)
+    return grouped.sort_values("total_ms", ascending=False).head(top).reset_index()
+
+
+atexit.register(flush)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="sql_profile_<run_id>.jsonl")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    with pd.option_context("display.width", 200, "display.max_colwidth", 120):
+        print(summary(load_profile(args.path), args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
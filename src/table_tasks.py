@@ -0,0 +1,67 @@
+"""
+
+Independent per-table builds of a transform stage, run side by side
+
+    timings = run_table_tasks({"ohclv": build_ohclv, "fx": build_fx}, table_workers(bulk_config), "transform", logger)
+
+Every task opens its own connection from the stage's engine (engine.begin() inside the task), so the
+builds share the connection pool and nothing else. A thread pool is enough, the work happens in the
+database. transform_workers caps the concurrency. On the duckdb backend the tasks run one after
+another, since one file has one writer and DuckDB already parallelizes every statement. Each task is
+timed under its table name (stage_timer), and the stage logs the builds slowest first.
+
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .metrics import stage_timer
+
+
+def table_workers(bulk_config: dict, backend: str = "mysql") -> int:
+    if backend == "duckdb":
+        return 1
+    return max(1, int(bulk_config.get("transform_workers", 4)))
+
+
+def _timed(task, stage: str, name: str) -> float:
+    start = time.perf_counter()
+    with stage_timer(stage, source=name):
+        task()
+    return time.perf_counter() - start
+
+
+def run_table_tasks(tasks: dict, workers: int, stage: str, logger) -> dict:
+    """
+    Run name -> task (no arguments, handles and records its own errors) with at most workers at a time.
+    Returns name -> seconds, None for a task that raised
+    """
+    timings = {}
+
+    if workers <= 1 or len(tasks) <= 1:
+        for name, task in tasks.items():
+            try:
+                timings[name] = _timed(task, stage, name)
+            except Exception:
+                # stage_timer already counted the error
+                logger.exception(f"{name} build failed....")
+                timings[name] = None
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(tasks)), thread_name_prefix=stage) as pool:
+            # each task carries the caller's log context (stage, run id fields) into its thread
+            futures = {pool.submit(contextvars.copy_context().run, _timed, task, stage, name): name
+                       for name, task in tasks.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    timings[name] = future.result()
+                except Exception:
+                    logger.exception(f"{name} build failed....")
+                    timings[name] = None
+
+    ranked = sorted(((seconds, name) for name, seconds in timings.items() if seconds is not None), reverse=True)
+    if ranked:
+        logger.info("Table build times : " + ", ".join(f"{name} {seconds:.2f}s" for seconds, name in ranked)
+                    + f" (slowest {ranked[0][1]}, {min(workers, len(tasks))} at a time)....")
+    return timings
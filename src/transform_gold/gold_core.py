@@ -1,11 +1,14 @@
 import argparse
 import datetime as dt
-from ..utils import mysql_connect_create_db,get_engine_session,load_yml
+from ..utils import mysql_connect_create_db,load_yml,get_analytics_engine,analytics_backend,create_schema_sql,asof_join_sql
 from sqlalchemy import text
 from dotenv import load_dotenv
 import os
 import logging
 from ..logger import setup_logging
+from ..fx_calendar import refresh_stock_facts_inr
+from ..returns_panel import refresh_stock_returns
+from ..metrics import timed_stage,record_error,record_rows
 
 # loading the database password
 load_dotenv(dotenv_path='.env')
@@ -17,6 +20,7 @@ parser.add_argument("--bulk", default = 'config/bulk.yaml')
 args = parser.parse_args()
 bulk_config = load_yml(args.bulk)
 
+@timed_stage("transform", source="gold")
 def gold_exec():
 
     #logging configuration
@@ -33,18 +37,21 @@ def gold_exec():
     user_name = bulk_config["user_name"]
     host = bulk_config["host"]
     port = bulk_config["port"]
+    backend = analytics_backend(bulk_config)
 
-    # start a connection to - MySQL server
+    # start a connection to - MySQL server, the gold db lives there only on the mysql backend
     try:
-        mysql_connect_create_db(db_name, user_name, host, port, db_pass, create_flag=True)
+        mysql_connect_create_db(db_name, user_name, host, port, db_pass, create_flag=(backend == "mysql"))
         logger.info("successfully connected to the MySql Server....")
     except Exception as e:
         logger.exception("Connection to the MySql Server failed...")
         raise RuntimeError("Cannot connect to the MySql Server...")
 
     try:
-        engine,_ = get_engine_session(db_name, user_name,host, port, db_pass)
-        logger.info("successfully created engine for using gold layer....")
+        engine = get_analytics_engine(bulk_config, db_name, db_pass)
+        with engine.begin() as conn:
+            conn.execute(text(create_schema_sql(backend, db_name)))
+        logger.info(f"successfully created {backend} engine for using gold layer....")
 
         # <----  STOCK FACTS BLOCK  ---->
         try:
@@ -123,8 +130,61 @@ def gold_exec():
             logger.info("Successfully created view for stocks facts in gold layer....")
 
         except Exception as e:
+            record_error("transform", source="stock_facts")
             logger.exception("Error processing the view for stock facts....")
 
+        # <----  STOCK COMPANY FACTS BLOCK  ---->
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"""
+                
+                CREATE OR REPLACE VIEW {db_name}.stock_company_facts AS
+                
+                    -- company attributes as they were on each trade date, from the type 2 dimension
+                    SELECT
+                        o.stock_id AS UUID,
+                        o.ticker,
+                        o.date AS trade_date,
+                        o.close AS close_price,
+                        o.volume AS stock_volume,
+                        c.company_name,
+                        c.sector,
+                        c.industry,
+                        c.market_cap,
+                        c.valid_from AS company_valid_from
+                    FROM {db_silver}.ohclv_silver o
+                    {asof_join_sql(f"{db_silver}.company_meta_data_silver", "c", "o", "ticker", "date")}
+                
+                """))
+            logger.info("Successfully created view for stock company facts in gold layer....")
+
+        except Exception as e:
+            record_error("transform", source="stock_company_facts")
+            logger.exception("Error processing the view for stock company facts....")
+
+        # <----  STOCK FACTS INR BLOCK  ---->
+        try:
+            # materialized, the daily fx_asof stage keeps it current from there on
+            with engine.begin() as conn:
+                refresh_stock_facts_inr(conn, db_silver, db_name)
+            logger.info("Successfully materialized stock facts in INR in gold layer....")
+
+        except Exception as e:
+            record_error("transform", source="stock_facts_inr")
+            logger.exception("Error processing the table for stock facts in INR....")
+
+        # <----  STOCK RETURNS BLOCK  ---->
+        try:
+            # multi-horizon returns and rolling betas, computed over the dates x tickers panel in numpy
+            with engine.begin() as conn:
+                rows = refresh_stock_returns(conn, db_silver, db_name, bulk_config)
+            record_rows(rows, "transform", source="stock_returns")
+            logger.info(f"Successfully materialized {rows} stock returns rows in gold layer....")
+
+        except Exception as e:
+            record_error("transform", source="stock_returns")
+            logger.exception("Error processing the table for stock returns....")
+
         # <----  MACRO INDICATORS FACTS BLOCK  ---->
         try:
             with engine.begin() as conn:
@@ -201,6 +261,7 @@ def gold_exec():
                 """))
             logger.info("Successfully created view for macro facts in gold layer....")
         except Exception as e:
+            record_error("transform", source="macro_facts")
             logger.exception("Error processing the view for macro facts....")
 
 
@@ -0,0 +1,325 @@
+"""
+
+Queryable store of validation outcomes : one row per run and one per run x expectation
+
+    run_id = save_validation(result, "ohclv", bulk_config, Path("reports/bronzeValidation/ohclv"), "ohclv_bronze_report")
+    pass_rates(bulk_config, source="ohclv", freq="W")       # pass rate per expectation and week
+    started_failing(bulk_config, since="2026-01-01")        # expectations failing now whose streak began since
+
+Results go to a single SQLite file (validation_store_path) with the observed value and unexpected
+counts of every expectation, instead of a pretty-printed JSON per run. Each run also keeps the
+fingerprint of the table it checked and of the suite's expectations, a suite whose latest run passed
+with the same fingerprint reuses that result instead of scanning again (reusable_run). The raw JSON is still written
+next to it when validation_raw_json is true. Old JSON reports can be imported once :
+
+    python -m src.validation_store --import-json reports/bronzeValidation
+    python -m src.validation_store --trend ohclv --freq W
+
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import sqlite3
+import datetime as dt
+from pathlib import Path
+
+import pandas as pd
+
+from .utils import load_yml
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS validation_runs (
+    run_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    suite TEXT,
+    table_name TEXT,
+    run_time TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    evaluated INTEGER,
+    successful INTEGER,
+    pipeline_run_id TEXT,
+    table_fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_runs_source_time ON validation_runs (source, run_time);
+
+CREATE TABLE IF NOT EXISTS validation_results (
+    run_id TEXT NOT NULL REFERENCES validation_runs (run_id),
+    position INTEGER NOT NULL,
+    expectation TEXT NOT NULL,
+    expectation_type TEXT NOT NULL,
+    column_name TEXT,
+    success INTEGER NOT NULL,
+    element_count INTEGER,
+    unexpected_count REAL,
+    unexpected_percent REAL,
+    observed_value TEXT,
+    raised_exception INTEGER NOT NULL,
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS ix_results_expectation ON validation_results (expectation);
+"""
+
+
+def store_path(bulk_config: dict | None) -> Path:
+    return Path((bulk_config or {}).get("validation_store_path", "reports/validation_store.sqlite"))
+
+
+@contextlib.contextmanager
+def connect(bulk_config: dict | None):
+    """Store connection committed and closed on exit, WAL so the parallel validation workers can write while others read"""
+    path = store_path(bulk_config)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        # stores created before table fingerprints existed
+        if "table_fingerprint" not in {row[1] for row in conn.execute("PRAGMA table_info(validation_runs)")}:
+            conn.execute("ALTER TABLE validation_runs ADD COLUMN table_fingerprint TEXT")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def expectation_key(config: dict) -> str:
+    """Readable identity of an expectation, stable across runs : type(column, other kwargs)"""
+    kwargs = {k: v for k, v in (config.get("kwargs") or {}).items() if k != "batch_id"}
+    args = [str(kwargs.pop(k)) for k in ("column", "column_A", "column_B") if k in kwargs]
+    args += [f"{k}={v}" for k, v in sorted(kwargs.items())]
+    return f"{config.get('type')}({', '.join(args)})"
+
+
+def _run_time(result: dict) -> str:
+    meta = result.get("meta") or {}
+    run_time = (meta.get("run_id") or {}).get("run_time")
+    if run_time:
+        return dt.datetime.fromisoformat(run_time).astimezone(dt.timezone.utc).isoformat(timespec="seconds")
+    return dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+
+
+def result_rows(result: dict, source: str, pipeline_run_id: str | None = None, fingerprint: str | None = None) -> tuple:
+    """A GX validation result (to_json_dict) as one run row and its expectation rows"""
+
+    meta = result.get("meta") or {}
+    stats = result.get("statistics") or {}
+    run_time = _run_time(result)
+    run_id = hashlib.sha256(f"{source}|{run_time}".encode()).hexdigest()[:16]
+
+    run = {
+        "run_id": run_id,
+        "source": source,
+        "suite": result.get("suite_name") or meta.get("expectation_suite_name"),
+        "table_name": (meta.get("batch_spec") or {}).get("table_name"),
+        "run_time": run_time,
+        "success": int(bool(result.get("success"))),
+        "evaluated": stats.get("evaluated_expectations"),
+        "successful": stats.get("successful_expectations"),
+        "pipeline_run_id": pipeline_run_id,
+        "table_fingerprint": fingerprint,
+    }
+
+    rows = []
+    for position, item in enumerate(result.get("results") or []):
+        config = item.get("expectation_config") or {}
+        outcome = item.get("result") or {}
+        kwargs = config.get("kwargs") or {}
+        observed = outcome.get("observed_value")
+        rows.append({
+            "run_id": run_id,
+            "position": position,
+            "expectation": expectation_key(config),
+            "expectation_type": config.get("type"),
+            "column_name": kwargs.get("column") or ",".join(str(kwargs[k]) for k in ("column_A", "column_B") if k in kwargs) or None,
+            "success": int(bool(item.get("success"))),
+            "element_count": outcome.get("element_count"),
+            "unexpected_count": outcome.get("unexpected_count"),
+            "unexpected_percent": outcome.get("unexpected_percent"),
+            "observed_value": None if observed is None else json.dumps(observed, default=str),
+            "raised_exception": int(bool((item.get("exception_info") or {}).get("raised_exception"))),
+        })
+    return run, rows
+
+
+def record_validation(bulk_config: dict | None, result: dict, source: str, pipeline_run_id: str | None = None,
+                      fingerprint: str | None = None) -> str:
+    """Insert one validation result, a run already stored (same source and run time) is left as it is"""
+
+    run, rows = result_rows(result, source, pipeline_run_id, fingerprint)
+    with connect(bulk_config) as conn:
+        inserted = conn.execute(
+            f"INSERT OR IGNORE INTO validation_runs ({', '.join(run)}) VALUES ({', '.join('?' * len(run))})",
+            list(run.values()),
+        ).rowcount
+        if inserted and rows:
+            conn.executemany(
+                f"INSERT INTO validation_results ({', '.join(rows[0])}) VALUES ({', '.join('?' * len(rows[0]))})",
+                [list(row.values()) for row in rows],
+            )
+    return run["run_id"]
+
+
+def save_validation(result: dict, source: str, bulk_config: dict | None, report_dir, report_name: str,
+                    fingerprint: str | None = None) -> str:
+    """Store the result, plus the old pretty-printed JSON report when validation_raw_json is on"""
+    from .metrics import get_run_id
+
+    run_id = record_validation(bulk_config, result, source, get_run_id(), fingerprint)
+    if (bulk_config or {}).get("validation_raw_json", False):
+        report_dir = Path(report_dir)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        with open(report_dir / f'{report_name}.json_{dt.datetime.now().strftime("%Y-%m-%dT%H-%M-%S")}', 'w') as f:
+            json.dump(result, f, indent=4)
+    return run_id
+
+
+# <--- table fingerprints : skip a suite while its table and expectations are unchanged since its latest run passed --->
+
+def suite_digest(files) -> str:
+    """Digest of the source files that define a suite's expectations, an edited expectation changes it"""
+    digest = hashlib.sha256()
+    for file in sorted(str(f) for f in files):
+        digest.update(Path(file).read_bytes())
+    return digest.hexdigest()
+
+
+def table_fingerprint(engine, table: str, schema: str, bulk_config: dict | None = None, suite=()) -> str:
+    """
+    Cheap digest of a table : row count, max primary key, max insert_datetime when the table has one,
+    and CHECKSUM TABLE on MySQL unless validation_checksum is off. Bulk reloads of identical data
+    recreate the same ids, so they give the same fingerprint. suite lists the files holding the
+    suite's expectations, their contents are part of the digest so a changed suite validates again
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    columns = {c["name"] for c in inspector.get_columns(table, schema=schema)}
+    keys = inspector.get_pk_constraint(table, schema=schema).get("constrained_columns") or []
+
+    select = ["COUNT(*) AS row_count"]
+    select += [f"MAX({key}) AS max_{key}" for key in keys]
+    if "insert_datetime" in columns:
+        select.append("MAX(insert_datetime) AS max_insert_datetime")
+
+    with engine.connect() as conn:
+        parts = dict(conn.execute(text(f"SELECT {', '.join(select)} FROM {schema}.{table}")).mappings().one())
+        if engine.dialect.name == "mysql" and (bulk_config or {}).get("validation_checksum", True):
+            parts["checksum"] = conn.execute(text(f"CHECKSUM TABLE {schema}.{table}")).fetchone()[1]
+
+    if suite:
+        parts["suite"] = suite_digest(suite)
+
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def reusable_run(bulk_config: dict | None, source: str, fingerprint: str) -> str | None:
+    """
+    Run id of the source's most recent run when it passed on a table with this fingerprint. A later
+    failing run is the latest one, so an older pass on the same fingerprint is never reused over it
+    """
+
+    if not (bulk_config or {}).get("validation_fingerprint", True):
+        return None
+    with connect(bulk_config) as conn:
+        row = conn.execute("""
+            SELECT run_id, table_fingerprint, success FROM validation_runs
+            WHERE source = ?
+            ORDER BY run_time DESC LIMIT 1
+        """, (source,)).fetchone()
+    return row[0] if row and row[2] == 1 and row[1] == fingerprint else None
+
+
+# <--- query api --->
+
+def results(bulk_config: dict | None, source: str | None = None, since=None) -> pd.DataFrame:
+    """Expectation rows joined with their run, oldest run first"""
+
+    where, params = [], []
+    if source:
+        where.append("r.source = ?")
+        params.append(source)
+    if since:
+        where.append("r.run_time >= ?")
+        params.append(str(since))
+    with connect(bulk_config) as conn:
+        df = pd.read_sql_query(f"""
+            SELECT r.source, r.suite, r.run_time, r.run_id, e.position, e.expectation, e.expectation_type,
+                   e.column_name, e.success, e.element_count, e.unexpected_count, e.unexpected_percent,
+                   e.observed_value, e.raised_exception
+            FROM validation_results e
+            JOIN validation_runs r ON r.run_id = e.run_id
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY r.run_time, e.position
+        """, conn, params=params)
+    df["run_time"] = pd.to_datetime(df["run_time"], utc=True, format="ISO8601")
+    return df
+
+
+def pass_rates(bulk_config: dict | None, source: str | None = None, since=None, freq: str = "D") -> pd.DataFrame:
+    """Share of passing runs per source, expectation and period (freq as in pandas, D / W / MS)"""
+
+    df = results(bulk_config, source, since)
+    if df.empty:
+        return pd.DataFrame(columns=["source", "expectation", "period", "runs", "pass_rate", "unexpected_count"])
+    df["period"] = df["run_time"].dt.tz_localize(None).dt.to_period(freq).dt.start_time
+    return (df.groupby(["source", "expectation", "period"], as_index=False)
+              .agg(runs=("success", "size"), pass_rate=("success", "mean"), unexpected_count=("unexpected_count", "sum")))
+
+
+def started_failing(bulk_config: dict | None, since, source: str | None = None) -> pd.DataFrame:
+    """Expectations whose latest run failed, with the run their current failing streak started on, when that is since or later"""
+
+    df = results(bulk_config, source)
+    if df.empty:
+        return pd.DataFrame(columns=["source", "expectation", "failing_since", "failed_runs", "unexpected_count"])
+
+    keys = ["source", "expectation"]
+    df = df.sort_values(["run_time", "position"])
+    # streak id grows on every pass, so the rows after an expectation's last pass share one id
+    df["streak"] = df.groupby(keys)["success"].cumsum()
+    last = df.groupby(keys).tail(1)
+    failing = last[last["success"] == 0][keys + ["streak"]]
+
+    streaks = df.merge(failing, on=keys + ["streak"])
+    streaks = streaks[streaks["success"] == 0]
+    out = (streaks.groupby(keys, as_index=False)
+                  .agg(failing_since=("run_time", "min"), failed_runs=("run_id", "nunique"), unexpected_count=("unexpected_count", "last")))
+    return out[out["failing_since"] >= pd.Timestamp(since, tz="UTC")].sort_values("failing_since").reset_index(drop=True)
+
+
+def import_json_reports(bulk_config: dict | None, root) -> int:
+    """Load the per-run JSON reports under root/<source>/ into the store, returns the runs added"""
+
+    def count():
+        with connect(bulk_config) as conn:
+            return conn.execute("SELECT COUNT(*) FROM validation_runs").fetchone()[0]
+
+    before = count()
+    for path in sorted(Path(root).glob("*/*.json_*")):
+        with open(path) as f:
+            record_validation(bulk_config, json.load(f), path.parent.name)
+    return count() - before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bulk", default="config/bulk.yaml")
+    parser.add_argument("--import-json", default=None, help="folder holding <source>/<report>.json_<ts> files")
+    parser.add_argument("--trend", nargs="?", const="", default=None, help="pass rates, optionally for one source")
+    parser.add_argument("--freq", default="D")
+    parser.add_argument("--since", default=None)
+    args = parser.parse_args()
+
+    bulk_config = load_yml(args.bulk)
+    if args.import_json:
+        print(f"imported {import_json_reports(bulk_config, args.import_json)} runs into {store_path(bulk_config)}")
+    if args.trend is not None:
+        print(pass_rates(bulk_config, args.trend or None, args.since, args.freq).to_string(index=False))
+    if args.since and args.trend is None:
+        print(started_failing(bulk_config, args.since).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()